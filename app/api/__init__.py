@@ -1,5 +1,7 @@
 from .auth import router as auth_router
 from .users import router as users_router
 from .content import router as content_router
+from .admin import router as admin_router
+from .groups import router as groups_router
 
-__all__ = ["auth_router", "users_router", "content_router"] 
\ No newline at end of file
+__all__ = ["auth_router", "users_router", "content_router", "admin_router", "groups_router"] 
\ No newline at end of file
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.controllers.admin import AdminController
+from app.schemas.admin import ProfilingToggle, ProfilingTarget, ProfilingStatus, AnalyticsResponse
+from app.models.user import User
+from app.api.users import get_current_user
+from app.utils.request_context import TimedRoute, query_budget
+
+router = APIRouter(prefix="/admin", tags=["admin"], route_class=TimedRoute)
+
+def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
+    """Get current user, if they are an administrator"""
+    return AdminController.require_admin(current_user)
+
+@router.get("/profiling", response_model=ProfilingStatus)
+def get_profiling_status(admin: User = Depends(get_admin_user)):
+    """Users being profiled and the stored profiles, newest first"""
+    return AdminController.get_profiling_status()
+
+@router.post("/profiling", response_model=ProfilingTarget)
+def enable_profiling(toggle: ProfilingToggle, admin: User = Depends(get_admin_user), db: Session = Depends(get_db)):
+    """Profile the next requests of a user"""
+    return AdminController.enable_profiling(toggle, db)
+
+@router.delete("/profiling/{user_id}")
+def disable_profiling(user_id: str, admin: User = Depends(get_admin_user)):
+    """Stop profiling a user"""
+    return AdminController.disable_profiling(user_id)
+
+@router.get("/profiling/profiles/{name}")
+def download_profile(name: str, admin: User = Depends(get_admin_user)):
+    """Folded stacks of one profile (flamegraph.pl, speedscope)"""
+    return FileResponse(AdminController.get_profile_path(name), media_type="text/plain", filename=f"{name}.folded")
+
+
+# Budget: worst case 3 (admin user, day_stats, date_stats) + 1 headroom
+@router.get("/analytics", response_model=AnalyticsResponse, dependencies=[Depends(query_budget(4))])
+def get_analytics(
+    dates: int = Query(30, ge=1, le=366, description="Most recent dates to include"),
+    admin: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Users per day, completion rate and drop-off per day, registrations and completions per date"""
+    return AdminController.get_analytics(db, dates)
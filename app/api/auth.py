@@ -4,17 +4,21 @@ from app.database import get_db
 from app.controllers.auth import AuthController
 from app.schemas.user import UserCreate, UserLogin, Token, LoginResponse
 from app.utils.rate_limiter import auth_rate_limiter
+from app.utils.request_context import TimedRoute, query_budget
 from fastapi.security import HTTPBearer
 
-router = APIRouter(prefix="/auth", tags=["authentication"])
+router = APIRouter(prefix="/auth", tags=["authentication"], route_class=TimedRoute)
 security = HTTPBearer()
 
-@router.post("/register", response_model=LoginResponse)
+# Budget: worst case 7 + 1 headroom: email check; day_stats and date_stats upserts; user
+# INSERT and refresh; first progress row INSERT; user reload after the commit
+@router.post("/register", response_model=LoginResponse, dependencies=[Depends(query_budget(8))])
 def register(user: UserCreate, db: Session = Depends(get_db)):
     """Register a new user"""
     return AuthController.register(user, db)
 
-@router.post("/login", response_model=LoginResponse)
+# Budget: worst case 1 (user by email) + 1 headroom
+@router.post("/login", response_model=LoginResponse, dependencies=[Depends(query_budget(2))])
 def login(user_credentials: UserLogin, request: Request, db: Session = Depends(get_db)):
     """Login user and return tokens with user profile"""
     # Use IP address for rate limiting login attempts
@@ -36,7 +40,8 @@ def login(user_credentials: UserLogin, request: Request, db: Session = Depends(g
     
     return AuthController.login(user_credentials, db)
 
-@router.post("/refresh", response_model=Token)
+# Budget: worst case 1 (user) + 1 headroom
+@router.post("/refresh", response_model=Token, dependencies=[Depends(query_budget(2))])
 def refresh_token(token: str = Depends(security), db: Session = Depends(get_db)):
     """Refresh access token using refresh token"""
     return AuthController.refresh_token(token, db) 
\ No newline at end of file
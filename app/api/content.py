@@ -1,18 +1,26 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response, status
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.controllers.content import ContentController
 from app.schemas.content import DailyContentResponse
+from app.services.content_cache import content_cache
+from app.utils.request_context import TimedRoute, query_budget
 from typing import List
 
-router = APIRouter(prefix="/content", tags=["content"])
+router = APIRouter(prefix="/content", tags=["content"], route_class=TimedRoute)
 
-@router.get("/daily/{day}", response_model=DailyContentResponse)
+# Budget: worst case 1 (content on a cache miss) + 1 headroom
+@router.get("/daily/{day}", response_model=DailyContentResponse, dependencies=[Depends(query_budget(2))])
 def get_daily_content(day: int, db: Session = Depends(get_db)):
     """Get daily content for a specific day"""
     return ContentController.get_daily_content(day, db)
 
-@router.get("/all", response_model=List[DailyContentResponse])
-def get_all_content(db: Session = Depends(get_db)):
+# Budget: worst case 1 (content on a cache miss) + 1 headroom
+@router.get("/all", response_model=List[DailyContentResponse], responses={304: {"description": "El contenido no cambió"}}, dependencies=[Depends(query_budget(2))])
+def get_all_content(request: Request, response: Response, db: Session = Depends(get_db)):
     """Get all daily content"""
+    etag = f'"{content_cache.get(db).version}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return ContentController.get_all_content(db)
\ No newline at end of file
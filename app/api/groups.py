@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.controllers.groups import GroupController
+from app.schemas.group import GroupCreate, GroupJoin, GroupResponse, GroupDashboardResponse
+from app.models.user import User
+from app.api.users import get_current_user
+from app.utils.request_context import TimedRoute, query_budget
+from typing import List
+
+router = APIRouter(prefix="/groups", tags=["groups"], route_class=TimedRoute)
+
+# Budget: worst case 7 + 1 headroom: user; group ids (limit); group and membership INSERT;
+# completed days; group_day_stats upsert; group reload after the commit
+@router.post("", response_model=GroupResponse, dependencies=[Depends(query_budget(8))])
+def create_group(
+    group_data: GroupCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Create a group (parish, cohort) and join it; share its invite_code with the other members"""
+    return GroupController.create_group(group_data, current_user, db)
+
+# Budget: worst case 2 (user, groups) + 1 headroom
+@router.get("", response_model=List[GroupResponse], dependencies=[Depends(query_budget(3))])
+def get_groups(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Groups of the current user"""
+    return GroupController.get_groups(current_user, db)
+
+# Budget: worst case 8 + 1 headroom: user; group by code; group ids (limit); member_count
+# UPDATE; membership INSERT; completed days; group_day_stats upsert; group reload
+@router.post("/join", response_model=GroupResponse, dependencies=[Depends(query_budget(9))])
+def join_group(
+    join_data: GroupJoin,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Join a group with its invite code"""
+    return GroupController.join_group(join_data, current_user, db)
+
+# Budget: worst case 3 (user, group, group_day_stats on a cache miss) + 1 headroom
+@router.get("/{group_id}", response_model=GroupDashboardResponse, dependencies=[Depends(query_budget(4))])
+def get_group_dashboard(
+    group_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Members per day and members who completed each day, for members of the group"""
+    return GroupController.get_group_dashboard(group_id, current_user, db)
+
+# Budget: worst case 5 + 1 headroom: user; membership DELETE; member_count UPDATE;
+# completed days; group_day_stats upsert
+@router.delete("/{group_id}/membership", dependencies=[Depends(query_budget(6))])
+def leave_group(
+    group_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Leave a group"""
+    return GroupController.leave_group(group_id, current_user, db)
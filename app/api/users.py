@@ -1,27 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query
 from sqlalchemy.orm import Session
-from app.database import get_db
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from app.database import get_db, SessionLocal
 from app.controllers.users import UserController
-from app.schemas.user import UserResponse, UserUpdate, LibreModeToggle, StartDaySelection
-from app.schemas.content import UserProgressCreate, UserProgressResponse, UserProgressSummary
+from app.schemas.user import UserResponse, UserUpdate, LibreModeToggle, StartDaySelection, EventsToken
+from app.schemas.content import UserProgressCreate, UserProgressResponse, UserProgressSummary, CompactProgress, ProgressSyncResponse
+from app.schemas.dashboard import DashboardResponse, BootstrapResponse
 from app.models.user import User
 from app.utils.rate_limiter import progress_rate_limiter, libre_mode_rate_limiter
-from fastapi.security import HTTPBearer
-from typing import List
+from app.utils.progress_codec import wants_compact_progress
+from app.utils.request_context import TimedRoute, query_budget
+from app.services.unlock_notifier import unlock_notifier, HEARTBEAT_SECONDS
+from app.services.day_advancement import DayAdvancementService
+from app.services.analytics import AnalyticsService
+from app.services.data_export import DataExportService, MEDIA_TYPES as EXPORT_MEDIA_TYPES
+from app.config import settings
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from typing import List, Optional, Union
+from datetime import datetime
+import asyncio
+import json
+import pytz
 
-router = APIRouter(prefix="/users", tags=["users"])
+router = APIRouter(prefix="/users", tags=["users"], route_class=TimedRoute)
 security = HTTPBearer()
+# EventSource can't send headers, so the events stream also accepts ?token= (events tokens only)
+optional_security = HTTPBearer(auto_error=False)
 
 def get_current_user(token: str = Depends(security), db: Session = Depends(get_db)) -> User:
     """Get current authenticated user"""
     return UserController.get_current_user(token, db)
 
-@router.get("/profile", response_model=UserResponse)
+# Budget: worst case 1 (user) + 1 headroom
+@router.get("/profile", response_model=UserResponse, dependencies=[Depends(query_budget(2))])
 def get_profile(current_user: User = Depends(get_current_user)):
     """Get current user profile"""
     return UserController.get_profile(current_user)
 
-@router.put("/profile", response_model=UserResponse)
+# Budget: worst case 11 + 1 headroom, changing current_day and timezone at once: user;
+# group ids, day_stats and group_day_stats upserts (day change); version UPDATE and SELECT;
+# user UPDATE (flush); zone, progress rows and counters UPDATE (streak refresh); refresh
+@router.put("/profile", response_model=UserResponse, dependencies=[Depends(query_budget(12))])
 def update_profile(
     user_update: UserUpdate,
     current_user: User = Depends(get_current_user),
@@ -30,12 +50,40 @@ def update_profile(
     """Update current user profile"""
     return UserController.update_profile(user_update, current_user, db)
 
-@router.get("/progress", response_model=List[UserProgressSummary])
-def get_progress(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+# Budget: worst case 2 (user, progress rows) + 1 headroom
+@router.get("/progress", response_model=Union[List[UserProgressSummary], CompactProgress], dependencies=[Depends(query_budget(3))])
+def get_progress(
+    request: Request,
+    response: Response,
+    format: Optional[str] = Query(None, description="Use 'compact' for the bitmask representation"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """Get user progress for all days"""
-    return UserController.get_progress(current_user, db)
+    response.headers["Vary"] = "Accept"
+    compact = wants_compact_progress(format, request.headers.get("accept"))
+    return UserController.get_progress(current_user, db, compact=compact)
+
+# Budget: worst case 2 (user, changed progress rows) + 1 headroom
+@router.get("/progress/sync", response_model=ProgressSyncResponse, responses={304: {"description": "Sin cambios desde la versión indicada"}}, dependencies=[Depends(query_budget(3))])
+def sync_progress(
+    response: Response,
+    since: int = Query(0, description="Last progress version the client has seen"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get only the progress days that changed since the client's last version"""
+    result = UserController.sync_progress(current_user, since, db)
+    if result is None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": f'"pv-{since}"'})
+    response.headers["ETag"] = f'"pv-{result["version"]}"'
+    return result
 
-@router.post("/progress", response_model=UserProgressResponse)
+# Budget: worst case 12 + 1 headroom: user; progress row; version and counters UPDATE and
+# version SELECT; group ids, day_stats, date_stats and group_day_stats upserts; progress
+# INSERT/UPDATE; user reload and progress refresh after the commit; plus either the streak
+# dates (unchecking a completed day) or the current_day UPDATE (libre advance), never both
+@router.post("/progress", response_model=UserProgressResponse, dependencies=[Depends(query_budget(13))])
 def update_progress(
     progress_data: UserProgressCreate,
     current_user: User = Depends(get_current_user),
@@ -58,16 +106,130 @@ def update_progress(
     
     result = UserController.update_progress(progress_data, current_user, db)
     
+    # Completing the current day starts the unlock timer; push it to open event streams
+    if (result.user_id in unlock_notifier.subscribers
+            and result.day == current_user.current_day
+            and not (settings.debug_mode or current_user.libre_mode)):
+        if result.completed_at:
+            unlock_notifier.schedule(
+                result.user_id,
+                UserController.get_next_available_time(result.completed_at, current_user.timezone)
+            )
+        else:
+            # Unchecking a task locks the next day again: no day_unlocked at midnight
+            unlock_notifier.cancel(result.user_id)
+    
     # Return the result directly - FastAPI will handle the response model conversion
     # We'll add headers in a middleware or use a different approach
     return result
 
-@router.get("/dashboard")
-def get_dashboard(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+# Budget: worst case 3 (user, progress rows, content on a cache miss) + 1 headroom
+@router.get("/dashboard", response_model=DashboardResponse, dependencies=[Depends(query_budget(4))])
+def get_dashboard(
+    request: Request,
+    response: Response,
+    format: Optional[str] = Query(None, description="Use 'compact' for the bitmask progress representation"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """Get all dashboard data for the user (profile, progress, available day, daily content)"""
-    return UserController.get_dashboard_data(current_user, db)
+    response.headers["Vary"] = "Accept"
+    compact = wants_compact_progress(format, request.headers.get("accept"))
+    return UserController.get_dashboard_data(current_user, db, compact=compact)
+
+# Budget: worst case 3 (user, progress rows, content on a cache miss) + 1 headroom
+@router.get("/bootstrap", response_model=BootstrapResponse, responses={304: {"description": "El paquete no cambió"}}, dependencies=[Depends(query_budget(4))])
+def get_bootstrap(
+    request: Request,
+    response: Response,
+    content_version: Optional[str] = Query(None, description="Content version the client already has cached"),
+    format: Optional[str] = Query(None, description="Use 'compact' for the bitmask progress representation"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get profile, progress, dashboard state, all daily content and server time in one response"""
+    compact = wants_compact_progress(format, request.headers.get("accept"))
+    bundle = UserController.get_bootstrap_bundle(current_user, db, content_version=content_version, compact=compact)
+    etag = f'"{bundle["version"]}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    response.headers["Vary"] = "Accept"
+    return bundle
+
+def _load_event_stream_state(credentials: HTTPAuthorizationCredentials, token_type: str):
+    """Authenticate and read the unlock state with a short-lived session"""
+    db = SessionLocal()
+    try:
+        user = UserController.get_current_user(credentials, db, token_type=token_type)
+        return user.id, user.current_day, UserController.get_pending_unlock_time(user, db)
+    finally:
+        db.close()
+
+def _format_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# Budget: worst case 1 (user) + 1 headroom
+@router.post("/events/token", response_model=EventsToken, dependencies=[Depends(query_budget(2))])
+def create_events_token(current_user: User = Depends(get_current_user)):
+    """Short-lived token for opening /users/events from EventSource, which can't send headers"""
+    return UserController.create_events_token(current_user)
+
+@router.get("/events")
+async def unlock_events(
+    token: Optional[str] = Query(None, description="Events token from POST /users/events/token, for clients that can't set headers"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+):
+    """Server-Sent Events stream that pushes `day_unlocked` when the next day becomes available"""
+    # Only events tokens go in the URL (proxies and access logs keep it): an access
+    # token passed as ?token= is rejected like any other wrong token type
+    token_type = "access"
+    if credentials is None:
+        if not token:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token inválido"
+            )
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+        token_type = "events"
+    
+    # No DB session is held while the stream is open
+    user_id, current_day, unlock_at = await run_in_threadpool(_load_event_stream_state, credentials, token_type)
+    
+    async def event_stream():
+        queue = unlock_notifier.subscribe(user_id)
+        try:
+            yield "retry: 5000\n\n"
+            yield _format_event("state", {
+                "current_day": current_day,
+                "next_available_time": unlock_at.isoformat() if unlock_at else None
+            })
+            if unlock_at:
+                if unlock_at <= datetime.now(pytz.UTC):
+                    yield _format_event("day_unlocked", {"type": "day_unlocked"})
+                else:
+                    unlock_notifier.schedule(user_id, unlock_at)
+            
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield _format_event(event["type"], event)
+        finally:
+            unlock_notifier.unsubscribe(user_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-@router.put("/libre-mode", response_model=UserResponse)
+# Budget: worst case 9 + 1 headroom, turning libre mode on with the current day done: user;
+# current day progress; group ids, day_stats and group_day_stats upserts; version UPDATE
+# and SELECT; user UPDATE; refresh
+@router.put("/libre-mode", response_model=UserResponse, dependencies=[Depends(query_budget(10))])
 def toggle_libre_mode(
     libre_mode_data: LibreModeToggle,
     current_user: User = Depends(get_current_user),
@@ -98,6 +260,9 @@ def toggle_libre_mode(
         
         # Update with transaction safety
         current_user.libre_mode = libre_mode_data.libre_mode
+        # Switching to libre mode with the current day done unlocks the next one right away
+        if DayAdvancementService.advance_immediately(current_user, db):
+            UserController._bump_progress_version(current_user, db)
         db.commit()
         db.refresh(current_user)
         return current_user
@@ -111,7 +276,9 @@ def toggle_libre_mode(
             detail="Error al actualizar el modo libre"
         )
 
-@router.post("/set-start-day", response_model=UserResponse)
+# Budget: worst case 8 + 1 headroom: user; group ids, day_stats and group_day_stats upserts;
+# version UPDATE and SELECT; user UPDATE; refresh
+@router.post("/set-start-day", response_model=UserResponse, dependencies=[Depends(query_budget(9))])
 def set_start_day(
     start_day_data: StartDaySelection,
     current_user: User = Depends(get_current_user),
@@ -141,9 +308,11 @@ def set_start_day(
     
     try:
         # Update user's start day and current day
+        AnalyticsService.record_start_day(db, current_user, start_day_data.start_day)
         current_user.start_day = start_day_data.start_day
         current_user.current_day = start_day_data.start_day
         current_user.has_chosen_start_day = True
+        UserController._bump_progress_version(current_user, db)
         
         db.commit()
         db.refresh(current_user)
@@ -156,7 +325,32 @@ def set_start_day(
             detail="Error al establecer el día de inicio"
         )
 
-@router.delete("/account")
+# Budget: worst case 1 (user; the streamed rows use their own session) + 1 headroom
+@router.get("/export", dependencies=[Depends(query_budget(2))])
+def export_data(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    current_user: User = Depends(get_current_user)
+):
+    """Download a copy of the user's data: profile and full progress history"""
+    user_id = current_user.id
+    
+    def export_stream():
+        # Own session: the rows are read while the response streams
+        db = SessionLocal()
+        try:
+            yield from DataExportService.export(db, format, user_id=user_id)
+        finally:
+            db.close()
+    
+    return StreamingResponse(
+        export_stream(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="totus-tuus-datos.{format}"'}
+    )
+
+# Budget: worst case 9 + 1 headroom: user; progress rows; day_stats and date_stats upserts;
+# group ids; memberships DELETE; member_count UPDATE; group_day_stats upsert; user UPDATE
+@router.delete("/account", dependencies=[Depends(query_budget(10))])
 def delete_account(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Delete user account and all associated data"""
     return UserController.delete_account(current_user, db) 
\ No newline at end of file
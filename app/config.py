@@ -14,6 +14,7 @@ class Settings(BaseSettings):
     algorithm: str = os.getenv("ALGORITHM", "HS256")
     access_token_expire_minutes: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
     refresh_token_expire_days: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+    events_token_expire_seconds: int = int(os.getenv("EVENTS_TOKEN_EXPIRE_SECONDS", "60"))
     
     # API
     api_v1_str: str = os.getenv("API_V1_STR", "/api/v1")
@@ -47,6 +48,63 @@ class Settings(BaseSettings):
     # Debug mode - disables day progression timer for testing
     debug_mode: bool = os.getenv("DEBUG_MODE", "false").lower() == "true"
     
+    # Fast start - skip create_all and only verify the Alembic head (migrations already ran)
+    fast_start: bool = os.getenv("FAST_START", "false").lower() == "true"
+    
+    # Day advancement - batch job that unlocks the next day at each Lima midnight
+    day_advancement_scheduler: bool = os.getenv("DAY_ADVANCEMENT_SCHEDULER", "true").lower() == "true"
+    day_advancement_chunk_size: int = int(os.getenv("DAY_ADVANCEMENT_CHUNK_SIZE", "1000"))
+    
+    # Account purge - deleted accounts are soft-deleted at once and removed in batches after the grace period
+    account_purger: bool = os.getenv("ACCOUNT_PURGER", "true").lower() == "true"
+    account_purge_grace_hours: int = int(os.getenv("ACCOUNT_PURGE_GRACE_HOURS", "24"))
+    account_purge_batch_size: int = int(os.getenv("ACCOUNT_PURGE_BATCH_SIZE", "200"))
+    account_purge_interval_seconds: int = int(os.getenv("ACCOUNT_PURGE_INTERVAL_SECONDS", "3600"))
+    
+    # Progress event log - every task toggle is queued in memory and inserted in batches in the background
+    progress_event_log: bool = os.getenv("PROGRESS_EVENT_LOG", "true").lower() == "true"
+    progress_event_batch_size: int = int(os.getenv("PROGRESS_EVENT_BATCH_SIZE", "500"))
+    progress_event_flush_interval_ms: int = int(os.getenv("PROGRESS_EVENT_FLUSH_INTERVAL_MS", "500"))
+    progress_event_queue_size: int = int(os.getenv("PROGRESS_EVENT_QUEUE_SIZE", "100000"))
+    
+    # Admission control - shed low-priority reads with 503 when these targets are breached
+    admission_control: bool = os.getenv("ADMISSION_CONTROL", "true").lower() == "true"
+    admission_latency_target_ms: int = int(os.getenv("ADMISSION_LATENCY_TARGET_MS", "2000"))
+    admission_pool_wait_target_ms: int = int(os.getenv("ADMISSION_POOL_WAIT_TARGET_MS", "500"))
+    admission_max_in_flight: int = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "256"))
+    admission_max_threadpool_queue: int = int(os.getenv("ADMISSION_MAX_THREADPOOL_QUEUE", "64"))
+    
+    # Request timing - Server-Timing header and per-route phase stats: off, basic or detailed
+    request_timing: str = os.getenv("REQUEST_TIMING", "basic").lower()
+    
+    # Query budgets - per-route statement limits and repeated-statement (N+1) checks: off, warn or enforce
+    query_budget_mode: str = os.getenv(
+        "QUERY_BUDGET_MODE", "enforce" if os.getenv("ENVIRONMENT") == "test" else "warn"
+    ).lower()
+    
+    # Slow-query log - JSON lines for statements slower than the threshold ("{pid}" in the path: one file per worker)
+    slow_query_log: str = os.getenv("SLOW_QUERY_LOG", "logs/slow_queries.{pid}.jsonl")
+    slow_query_threshold_ms: int = int(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+    slow_query_log_max_bytes: int = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    slow_query_log_backups: int = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5"))
+    
+    # Metrics - Prometheus text on /metrics; METRICS_DIR lets workers merge their values (serve.py sets it)
+    metrics_enabled: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    metrics_dir: str = os.getenv("METRICS_DIR", "")
+    
+    # Admins - comma separated emails allowed on /api/v1/admin
+    admin_emails: str = os.getenv("ADMIN_EMAILS", "")
+    
+    @property
+    def admin_email_set(self) -> set:
+        return {email.strip().lower() for email in self.admin_emails.split(",") if email.strip()}
+    
+    # Profiling - signed X-Debug-Profile header or admin toggle; profiles kept in a ring in PROFILE_DIR
+    profiling_enabled: bool = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+    profile_dir: str = os.getenv("PROFILE_DIR", "./profiles")
+    profile_ring_size: int = int(os.getenv("PROFILE_RING_SIZE", "50"))
+    profile_sample_interval_ms: float = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "2"))
+    
     class Config:
         case_sensitive = True
 
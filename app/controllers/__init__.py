@@ -1,5 +1,6 @@
 from .auth import AuthController
 from .users import UserController
 from .content import ContentController
+from .admin import AdminController
 
-__all__ = ["AuthController", "UserController", "ContentController"] 
\ No newline at end of file
+__all__ = ["AuthController", "UserController", "ContentController", "AdminController"] 
\ No newline at end of file
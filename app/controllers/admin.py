@@ -0,0 +1,73 @@
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from app.schemas.admin import ProfilingToggle, ProfilingTarget, ProfilingStatus, ProfileSummary, AnalyticsResponse
+from app.services.analytics import AnalyticsService
+from app.models.user import User
+from app.utils.profiler import profile_store, profiling_targets
+from app.config import settings
+
+class AdminController:
+    @staticmethod
+    def require_admin(current_user: User) -> User:
+        """Only users listed in ADMIN_EMAILS may use the admin endpoints"""
+        if current_user.email.lower() not in settings.admin_email_set:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Acceso restringido a administradores"
+            )
+        return current_user
+
+    @staticmethod
+    def enable_profiling(toggle: ProfilingToggle, db: Session) -> ProfilingTarget:
+        """Profile the next ``requests`` requests of a user within ``minutes``"""
+        query = db.query(User.id)
+        if toggle.user_id:
+            query = query.filter(User.id == toggle.user_id)
+        elif toggle.email:
+            query = query.filter(User.email == toggle.email)
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Indica user_id o email"
+            )
+        user = query.first()
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Usuario no encontrado"
+            )
+
+        target = profiling_targets.enable(user.id, toggle.requests, toggle.minutes)
+        return ProfilingTarget(user_id=user.id, **target)
+
+    @staticmethod
+    def disable_profiling(user_id: str) -> dict:
+        if not profiling_targets.disable(user_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="El perfilado no estaba activo para este usuario"
+            )
+        return {"message": "Perfilado desactivado", "user_id": user_id}
+
+    @staticmethod
+    def get_profiling_status() -> ProfilingStatus:
+        profiling_targets.refresh()  # Toggles changed by other workers since the last background refresh
+        return ProfilingStatus(
+            targets=[ProfilingTarget(user_id=user_id, **target) for user_id, target in profiling_targets.active().items()],
+            profiles=[ProfileSummary(**profile) for profile in profile_store.list()]
+        )
+
+    @staticmethod
+    def get_profile_path(name: str) -> str:
+        path = profile_store.path(name)
+        if not path:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Perfil no encontrado"
+            )
+        return path
+
+
+    @staticmethod
+    def get_analytics(db: Session, dates: int) -> AnalyticsResponse:
+        return AnalyticsResponse(**AnalyticsService.summary(db, recent_dates=dates))
@@ -1,7 +1,7 @@
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 from app.schemas.content import DailyContentResponse
-from app.models.content import DailyContent
+from app.services.content_cache import content_cache
 from typing import List
 
 class ContentController:
@@ -14,7 +14,7 @@ class ContentController:
                 detail="El día debe estar entre 1 y 33"
             )
         
-        content = db.query(DailyContent).filter(DailyContent.day == day).first()
+        content = content_cache.get(db).by_day.get(day)
         if not content:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -26,5 +26,4 @@ class ContentController:
     @staticmethod
     def get_all_content(db: Session) -> List[DailyContentResponse]:
         """Get all daily content"""
-        content_list = db.query(DailyContent).order_by(DailyContent.day).all()
-        return content_list 
\ No newline at end of file
+        return content_cache.get(db).items 
\ No newline at end of file
@@ -0,0 +1,44 @@
+from sqlalchemy.orm import Session
+from app.schemas.group import GroupCreate, GroupJoin, GroupResponse, GroupDayProgress, GroupDashboardResponse
+from app.models.user import User
+from app.services.groups import GroupService
+from app.services.group_cache import group_stats_cache
+from typing import List
+
+class GroupController:
+    @staticmethod
+    def create_group(group_data: GroupCreate, current_user: User, db: Session) -> GroupResponse:
+        return GroupService.create_group(db, current_user, group_data.name)
+
+    @staticmethod
+    def join_group(join_data: GroupJoin, current_user: User, db: Session) -> GroupResponse:
+        return GroupService.join_group(db, current_user, join_data.invite_code)
+
+    @staticmethod
+    def leave_group(group_id: str, current_user: User, db: Session) -> dict:
+        GroupService.leave_group(db, current_user, group_id)
+        return {"message": "Has salido del grupo"}
+
+    @staticmethod
+    def get_groups(current_user: User, db: Session) -> List[GroupResponse]:
+        return GroupService.groups_of(db, current_user)
+
+    @staticmethod
+    def get_group_dashboard(group_id: str, current_user: User, db: Session) -> GroupDashboardResponse:
+        """
+        Aggregate progress of the group: one query for the group (and membership)
+        plus the cached day statistics, whatever the number of members.
+        """
+        group = GroupService.get_member_group(db, current_user, group_id)
+        stats = {row["day"]: row for row in group_stats_cache.get(db, group.id)}
+        days = []
+        for day in range(1, 34):
+            row = stats.get(day)
+            completed = row["completed_members"] if row else 0
+            days.append(GroupDayProgress(
+                day=day,
+                current_members=row["current_members"] if row else 0,
+                completed_members=completed,
+                completion_rate=round(completed / group.member_count, 4) if group.member_count else None
+            ))
+        return GroupDashboardResponse(group=GroupResponse.model_validate(group), days=days)
@@ -1,15 +1,25 @@
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
-from app.schemas.user import UserResponse, UserUpdate
-from app.schemas.content import UserProgressCreate, UserProgressResponse, UserProgressSummary, DailyContentResponse
+from app.schemas.user import UserResponse, UserUpdate, EventsToken
+from app.schemas.content import UserProgressCreate, UserProgressResponse, UserProgressSummary, DailyContentResponse, CompactProgress, ProgressSyncResponse
 from app.models.user import User
-from app.models.content import UserProgress, DailyContent
-from app.utils.security import verify_token
+from app.models.content import UserProgress
+from app.utils.security import verify_token, create_events_token
+from app.utils.progress_codec import encode_progress
+from app.utils.gating import gate, boundaries_for, to_epoch, from_epoch
+from app.utils.request_context import phase, set_request_user
 from app.services.auth import AuthService
+from app.services.content_cache import content_cache
+from app.services.day_advancement import DayAdvancementService
+from app.services.account_purge import AccountPurgeService
+from app.services.analytics import AnalyticsService, StatsDelta
+from app.services.progress_events import progress_event_writer, toggle_events
+from app.services.user_counters import UserCounterService
 from fastapi.security import HTTPBearer
-from typing import List
+from typing import List, Optional, Union
 import uuid
-from datetime import datetime, timedelta
+import hashlib
+from datetime import datetime
 import pytz
 from app.config import settings
 
@@ -17,17 +27,19 @@ security = HTTPBearer()
 
 class UserController:
     @staticmethod
-    def get_current_user(token: str, db: Session) -> User:
-        """Get current authenticated user"""
-        payload = verify_token(token.credentials)
-        if not payload or payload.get("type") != "access":
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token inválido"
-            )
-        
-        user_id = str(payload.get("sub"))
-        user = AuthService.get_user_by_id(db, user_id)
+    def get_current_user(token: str, db: Session, token_type: str = "access") -> User:
+        """Get current authenticated user from a token of ``token_type``"""
+        with phase("auth"):
+            payload = verify_token(token.credentials)
+            if not payload or payload.get("type") != token_type:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Token inválido"
+                )
+            
+            user_id = str(payload.get("sub"))
+            set_request_user(user_id)
+            user = AuthService.get_user_by_id(db, user_id)
         if not user or not user.is_active:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -35,6 +47,14 @@ class UserController:
             )
         return user
 
+    @staticmethod
+    def create_events_token(current_user: User) -> EventsToken:
+        """Issue the short-lived token EventSource clients pass as ?token= to /users/events"""
+        return EventsToken(
+            events_token=create_events_token(data={"sub": str(current_user.id)}),
+            expires_in=settings.events_token_expire_seconds
+        )
+
     @staticmethod
     def get_profile(current_user: User) -> UserResponse:
         """Get current user profile"""
@@ -43,16 +63,35 @@ class UserController:
     @staticmethod
     def update_profile(user_update: UserUpdate, current_user: User, db: Session) -> UserResponse:
         """Update current user profile"""
-        for field, value in user_update.dict(exclude_unset=True).items():
+        # An explicit null means "no change" for the other optional fields
+        changes = {field: value for field, value in user_update.dict(exclude_unset=True).items() if value is not None}
+        if changes.get("current_day") is not None:
+            AnalyticsService.record_day_change(db, current_user, changes["current_day"])
+        for field, value in changes.items():
             setattr(current_user, field, value)
         
+        if "current_day" in changes:
+            UserController._bump_progress_version(current_user, db)
+        if "timezone" in changes:
+            # Streaks count local dates, which move with the time zone
+            db.flush()
+            UserCounterService.refresh(db, [current_user.id])
         db.commit()
         db.refresh(current_user)
         return current_user
 
     @staticmethod
-    def get_progress(current_user: User, db: Session) -> List[UserProgressSummary]:
+    def get_progress(current_user: User, db: Session, compact: bool = False) -> Union[List[UserProgressSummary], CompactProgress]:
         """Get user progress for all days"""
+        if compact:
+            rows = db.query(
+                UserProgress.day,
+                UserProgress.meditation_completed,
+                UserProgress.video_completed,
+                UserProgress.rosary_completed
+            ).filter(UserProgress.user_id == current_user.id).all()
+            return encode_progress(rows)
+        
         progress_list = db.query(UserProgress).filter(UserProgress.user_id == current_user.id).all()
         
         # Create a dictionary to map day to progress
@@ -101,68 +140,169 @@ class UserController:
             UserProgress.day == progress_data.day
         ).first()
         
+        tasks = (progress_data.meditation_completed, progress_data.video_completed, progress_data.rosary_completed)
+        previous_tasks = (
+            (existing_progress.meditation_completed, existing_progress.video_completed, existing_progress.rosary_completed)
+            if existing_progress else (False, False, False)
+        )
+        was_completed_at = existing_progress.completed_at if existing_progress else None
+        now = datetime.utcnow()
+        # Set completed_at when the last task is completed (resending a completed day keeps it)
+        # and clear it if the day is no longer fully completed
+        completed_at = (was_completed_at or now) if all(tasks) else None
+        
+        # The user's counters change in the same UPDATE that bumps the version
+        version = UserController._bump_progress_version(current_user, db, UserCounterService.progress_changes(
+            db, current_user, progress_data.day, previous_tasks, tasks, was_completed_at, completed_at, now
+        ))
+        # Day advance and completion change the statistics with one upsert per table
+        stats = StatsDelta()
+        
+        # Libre/debug mode unlocks the next day as soon as the current one is complete
+        if progress_data.day == current_user.current_day:
+            DayAdvancementService.advance_immediately(
+                current_user, db,
+                current_day_completed=all(tasks),
+                stats=stats
+            )
+        
         if existing_progress:
             # Update existing progress
+            existing_progress.version = version
             existing_progress.meditation_completed = progress_data.meditation_completed
             existing_progress.video_completed = progress_data.video_completed
             existing_progress.rosary_completed = progress_data.rosary_completed
-            
-            from datetime import datetime
-            # Update completed_at timestamp when all tasks are completed
-            if (progress_data.meditation_completed and 
-                progress_data.video_completed and 
-                progress_data.rosary_completed):
-                existing_progress.completed_at = datetime.utcnow()
-            else:
-                # Clear completed_at if day is no longer fully completed
-                existing_progress.completed_at = None
-            
-            db.commit()
-            db.refresh(existing_progress)
-            return existing_progress
+            existing_progress.completed_at = completed_at
+            progress = existing_progress
         else:
             # Create new progress
-            from datetime import datetime
-            completed_at = None
-            
-            # Set completed_at only when all tasks are completed
-            if (progress_data.meditation_completed and 
-                progress_data.video_completed and 
-                progress_data.rosary_completed):
-                completed_at = datetime.utcnow()
-            
-            new_progress = UserProgress(
+            progress = UserProgress(
                 user_id=current_user.id,
                 day=progress_data.day,
                 meditation_completed=progress_data.meditation_completed,
                 video_completed=progress_data.video_completed,
                 rosary_completed=progress_data.rosary_completed,
-                completed_at=completed_at
+                completed_at=completed_at,
+                version=version
             )
-            
-            db.add(new_progress)
+            db.add(progress)
+        
+        # Unchecking and completing a day again moves its completion to today
+        stats.completion(progress_data.day, was_completed_at, completed_at, user_id=current_user.id).apply(db)
+        
+        with phase("commit"):
             db.commit()
-            db.refresh(new_progress)
-            return new_progress
+        progress_event_writer.enqueue(
+            toggle_events(current_user.id, progress_data.day, previous_tasks, tasks, now, version)
+        )
+        db.refresh(progress)
+        return progress
+
+    @staticmethod
+    def _bump_progress_version(current_user: User, db: Session, extra: Optional[dict] = None) -> int:
+        """Atomically increment the user's progress version inside the current transaction"""
+        # UPDATE ... SET v = v + 1 takes the row lock, so concurrent updates get distinct versions
+        db.query(User).filter(User.id == current_user.id).update(
+            {User.progress_version: User.progress_version + 1, **(extra or {})},
+            synchronize_session=False
+        )
+        return db.query(User.progress_version).filter(User.id == current_user.id).scalar()
+
+    @staticmethod
+    def sync_progress(current_user: User, since: int, db: Session) -> Optional[ProgressSyncResponse]:
+        """
+        Return the progress days changed after version ``since``.
+        Returns None when the client is already up to date.
+        """
+        version = current_user.progress_version or 0
+        if since == version:
+            return None
+        
+        # A version ahead of the server (reset DB, other account) forces a full resync
+        full = since < 0 or since > version
+        query = db.query(
+            UserProgress.day,
+            UserProgress.meditation_completed,
+            UserProgress.video_completed,
+            UserProgress.rosary_completed
+        ).filter(UserProgress.user_id == current_user.id)
+        if not full:
+            query = query.filter(UserProgress.version > since)
+        
+        changes = []
+        for p in query.order_by(UserProgress.day).all():
+            meditation = bool(p.meditation_completed)
+            video = bool(p.video_completed)
+            rosary = bool(p.rosary_completed)
+            changes.append({
+                "day": p.day,
+                "meditation_completed": meditation,
+                "video_completed": video,
+                "rosary_completed": rosary,
+                "total_completed": meditation + video + rosary
+            })
+        
+        return {
+            "version": version,
+            "current_day": current_user.current_day,
+            "full": full,
+            "changes": changes
+        }
+
+    @staticmethod
+    def get_next_available_time(completed_at: datetime, tz_name: Optional[str] = None) -> datetime:
+        """Return when the day after one completed at ``completed_at`` unlocks (UTC)"""
+        # Midnight next day in the user's time zone, from the cached boundary table
+        return from_epoch(boundaries_for(tz_name).next_after(to_epoch(completed_at)))
+
+    @staticmethod
+    def get_pending_unlock_time(current_user: User, db: Session) -> Optional[datetime]:
+        """Return when the user's next day unlocks, or None when no timer is running"""
+        if settings.debug_mode or current_user.libre_mode or current_user.current_day >= 33:
+            return None
+        
+        progress = db.query(
+            UserProgress.meditation_completed,
+            UserProgress.video_completed,
+            UserProgress.rosary_completed,
+            UserProgress.completed_at
+        ).filter(
+            UserProgress.user_id == current_user.id,
+            UserProgress.day == current_user.current_day
+        ).first()
+        
+        if not (progress and progress.meditation_completed and progress.video_completed
+                and progress.rosary_completed and progress.completed_at):
+            return None
+        _, next_epoch = gate(
+            current_user.current_day, to_epoch(progress.completed_at), False, to_epoch(datetime.utcnow()),
+            boundaries=boundaries_for(current_user.timezone)
+        )
+        return from_epoch(next_epoch) if next_epoch else None
 
     @staticmethod
-    def get_dashboard_data(current_user: User, db: Session):
+    def get_dashboard_data(current_user: User, db: Session, compact: bool = False):
         """Return dashboard data with progress gating logic"""
-        # Get all progress for user in one query, ordered by day
-        progress_list = db.query(UserProgress).filter(
+        # Get all progress for user in one query as plain row tuples, ordered by day
+        progress_list = db.query(
+            UserProgress.day,
+            UserProgress.meditation_completed,
+            UserProgress.video_completed,
+            UserProgress.rosary_completed,
+            UserProgress.completed_at
+        ).filter(
             UserProgress.user_id == current_user.id
         ).order_by(UserProgress.day).all()
         
         # Create progress dict and find last completed day efficiently
         progress_dict = {p.day: p for p in progress_list}
-        last_completed_day = 0
-        last_completed_at = None
         
         # NEW LOGIC: Use user.current_day as the day user is currently working on
-        # User can never go backwards, only stay on current day or advance forward
+        # User can never go backwards, only stay on current day or advance forward.
+        # Advancement itself happens in DayAdvancementService (immediately for
+        # libre/debug mode, at Lima midnight for everyone else); here we only read it.
         
         current_day = current_user.current_day
-        now = datetime.now(pytz.UTC)
         next_available_time = None
         
         # Check if current day is fully completed
@@ -175,115 +315,154 @@ class UserController:
             current_day_progress.completed_at
         )
         
-        if current_day_completed and current_day < 33:
-            # Current day is completed, check if user can advance to next day
-            if settings.debug_mode or current_user.libre_mode:
-                # DEBUG MODE or LIBRE MODE: Allow immediate advancement
-                current_user.current_day = min(current_day + 1, 33)
-                db.commit()
-                current_day = current_user.current_day
-            else:
-                # NORMAL MODE: Check 24-hour timer
-                completed_at = current_day_progress.completed_at
-                if completed_at.tzinfo is None:
-                    completed_at = pytz.UTC.localize(completed_at)
-                
-                # Convert to Peru timezone (UTC-5)
-                peru_tz = pytz.timezone('America/Lima')
-                completed_at_peru = completed_at.astimezone(peru_tz)
-                
-                # Calculate when next day becomes available (midnight next day in Peru time)
-                next_day_peru = (completed_at_peru + timedelta(days=1)).replace(
-                    hour=0, minute=0, second=0, microsecond=0
-                )
-                
-                # Convert back to UTC for storage and comparison
-                next_available_time = next_day_peru.astimezone(pytz.UTC)
-                
-                if now >= next_available_time:
-                    # Timer expired, advance to next day
-                    current_user.current_day = min(current_day + 1, 33)
-                    db.commit()
-                    current_day = current_user.current_day
-                    next_available_time = None
-                # else: stay on current day, show timer
-        
-        available_day = current_day
+        # Libre/debug users were advanced when they completed the day; for everyone
+        # else the gate shows the timer, or the next day once midnight has passed
+        # even if the nightly job hasn't persisted it yet
+        available_day, next_epoch = gate(
+            current_day,
+            to_epoch(current_day_progress.completed_at) if current_day_completed else None,
+            bool(current_user.libre_mode),
+            to_epoch(datetime.utcnow()),
+            debug_mode=settings.debug_mode,
+            boundaries=boundaries_for(current_user.timezone)
+        )
+        if next_epoch:
+            next_available_time = from_epoch(next_epoch)
         
-        # Get daily content for available day
-        daily_content = db.query(DailyContent).filter(
-            DailyContent.day == available_day
-        ).first()
+        # Get daily content for available day from the in-process snapshot
+        daily_content = content_cache.get(db).by_day.get(available_day)
         
         # Get user progress for the available day (which is user's current_day)
         user_progress = progress_dict.get(available_day)
         
-        # If no progress record exists for current day, create one
-        if not user_progress:
-            user_progress = UserProgress(
-                user_id=current_user.id,
-                day=available_day,
-                meditation_completed=False,
-                video_completed=False,
-                rosary_completed=False,
-                completed_at=None
-            )
-            db.add(user_progress)
-            db.commit()
-            db.refresh(user_progress)
-        
-        # Clear timer in debug mode, libre mode, or if current day is not completed
-        if settings.debug_mode or current_user.libre_mode or not current_day_completed:
-            next_available_time = None
+        # A missing progress record for the current day means nothing is done yet
+        tasks = {
+            "meditationCompleted": bool(user_progress.meditation_completed) if user_progress else False,
+            "videoCompleted": bool(user_progress.video_completed) if user_progress else False,
+            "rosaryCompleted": bool(user_progress.rosary_completed) if user_progress else False
+        }
         
         # Add tasks to daily content
         if daily_content:
             daily_content_dict = {
-                "id": daily_content.id,
-                "day": daily_content.day,
-                "title": daily_content.title,
-                "description": daily_content.description,
+                "id": daily_content["id"],
+                "day": daily_content["day"],
+                "title": daily_content["title"],
+                "description": daily_content["description"],
                 "readingTime": "5 min",  # Default reading time
-                "mysteries": daily_content.mysteries or "Misterios del Rosario",
+                "mysteries": daily_content["mysteries"] or "Misterios del Rosario",
                 "mysteriesDescription": "Reza el rosario completo con devoción",
                 "video": {
-                    "title": f"Video del Día {daily_content.day}",
-                    "youtubeUrl": daily_content.video_url or ""
+                    "title": f"Video del Día {daily_content['day']}",
+                    "youtubeUrl": daily_content["video_url"] or ""
                 },
                 "rosaryVideo": {
                     "title": "Guía para Rezar el Rosario",
-                    "youtubeUrl": daily_content.rosary_video_url or ""
+                    "youtubeUrl": daily_content["rosary_video_url"] or ""
                 },
                 "quote": {
-                    "text": daily_content.quote,
+                    "text": daily_content["quote"],
                     "author": "San Luis María Grignion de Montfort"
                 },
-                "tasks": {
-                    "meditationCompleted": user_progress.meditation_completed if user_progress else False,
-                    "videoCompleted": user_progress.video_completed if user_progress else False,
-                    "rosaryCompleted": user_progress.rosary_completed if user_progress else False
-                },
-                "meditationPdfUrl": daily_content.meditation_pdf_url or ""
+                "tasks": tasks,
+                "meditationPdfUrl": daily_content["meditation_pdf_url"] or ""
             }
         else:
             daily_content_dict = None
         
         # Build progress summaries efficiently
+        if compact:
+            progress = encode_progress(
+                (p.day, p.meditation_completed, p.video_completed, p.rosary_completed)
+                for p in progress_list
+            )
+        else:
+            progress = UserController._build_progress_summaries(progress_dict)
+        
+        # Prepare user dict for frontend (explicit columns, never the ORM __dict__,
+        # which carries the SQLAlchemy instance state and the password hash)
+        total_tasks = 33 * 3
+        completed_tasks = current_user.tasks_completed or 0
+        user_dict = {
+            "id": current_user.id,
+            "name": current_user.name,
+            "email": current_user.email,
+            "current_day": current_user.current_day,
+            "start_day": current_user.start_day,
+            "has_chosen_start_day": current_user.has_chosen_start_day,
+            "libre_mode": current_user.libre_mode,
+            "timezone": current_user.timezone,
+            "start_date": current_user.start_date,
+            "is_active": current_user.is_active,
+            "created_at": current_user.created_at,
+            "updated_at": current_user.updated_at,
+            "totalDays": 33,
+            "currentDay": available_day,
+            # Progress percentage from the stored counter, not the 33 summaries
+            "progressPercentage": int((completed_tasks / total_tasks) * 100) if total_tasks else 0,
+            "tasksCompleted": completed_tasks,
+            "daysCompleted": current_user.days_completed or 0,
+            "currentStreak": UserCounterService.current_streak(current_user),
+            "longestStreak": current_user.longest_streak or 0
+        }
+
+        return {
+            "user": user_dict,
+            "available_day": available_day,
+            "progress": progress,
+            "daily_content": daily_content_dict,
+            "next_available_time": next_available_time.isoformat() if next_available_time else None
+        }
+
+    @staticmethod
+    def get_bootstrap_bundle(current_user: User, db: Session, content_version: Optional[str] = None, compact: bool = False) -> dict:
+        """
+        Everything the app needs on cold start in one response: dashboard data,
+        all daily content (omitted when the client already has ``content_version``),
+        versions and server time. ``version`` identifies the bundle for If-None-Match.
+        """
+        dashboard = UserController.get_dashboard_data(current_user, db, compact=compact)
+        snapshot = content_cache.get(db)
+        include_content = content_version != snapshot.version
+        progress_version = current_user.progress_version or 0
+        
+        version_source = "|".join([
+            str(current_user.id),
+            str(progress_version),
+            str(dashboard["available_day"]),
+            str(current_user.libre_mode),
+            str(current_user.updated_at),
+            dashboard["next_available_time"] or "",
+            snapshot.version,
+            "content" if include_content else "",
+            "compact" if compact else ""
+        ])
+        
+        dashboard.update({
+            "server_time": datetime.now(pytz.UTC),
+            "version": hashlib.sha256(version_source.encode("utf-8")).hexdigest()[:16],
+            "content_version": snapshot.version,
+            "progress_version": progress_version,
+            "content": snapshot.items if include_content else None
+        })
+        return dashboard
+
+    @staticmethod
+    def _build_progress_summaries(progress_dict: dict) -> List[dict]:
+        """Build the 33 progress summary dicts from day -> progress row"""
         summaries = []
         for day in range(1, 34):
             p = progress_dict.get(day)
             if p:
-                total_completed = sum([
-                    p.meditation_completed,
-                    p.video_completed,
-                    p.rosary_completed
-                ])
+                meditation = bool(p.meditation_completed)
+                video = bool(p.video_completed)
+                rosary = bool(p.rosary_completed)
                 summaries.append({
                     "day": day,
-                    "meditation_completed": p.meditation_completed,
-                    "video_completed": p.video_completed,
-                    "rosary_completed": p.rosary_completed,
-                    "total_completed": total_completed
+                    "meditation_completed": meditation,
+                    "video_completed": video,
+                    "rosary_completed": rosary,
+                    "total_completed": meditation + video + rosary
                 })
             else:
                 summaries.append({
@@ -293,34 +472,13 @@ class UserController:
                     "rosary_completed": False,
                     "total_completed": 0
                 })
-        
-        # Prepare user dict for frontend
-        user_dict = current_user.__dict__.copy()
-        user_dict["totalDays"] = 33
-        user_dict["currentDay"] = available_day
-        # Calculate progress percentage
-        completed_tasks = sum([d["total_completed"] for d in summaries])
-        total_tasks = 33 * 3
-        user_dict["progressPercentage"] = int((completed_tasks / total_tasks) * 100) if total_tasks else 0
-
-        return {
-            "user": user_dict,
-            "available_day": available_day,
-            "progress": summaries,
-            "daily_content": daily_content_dict,
-            "next_available_time": next_available_time.isoformat() if next_available_time else None
-        }
+        return summaries
 
     @staticmethod
     def delete_account(user: User, db: Session) -> dict:
-        """Delete user account and all associated data"""
+        """Delete the account: soft-deleted now, purged with its progress in the background"""
         try:
-            # Delete user progress first (foreign key constraint)
-            db.query(UserProgress).filter(UserProgress.user_id == user.id).delete()
-            
-            # Delete the user
-            db.delete(user)
-            db.commit()
+            AccountPurgeService.soft_delete(user, db)
             
             return {
                 "message": "Cuenta eliminada exitosamente",
@@ -1,15 +1,51 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
+from app.utils.admission import TimedQueuePool
+from app.utils.request_context import INSTRUMENTED, instrument_engine
+from app.utils.slow_query_log import instrument_slow_queries
+from app.utils.metrics import metrics, db_pool_connections
+
+engine_options = {}
+if make_url(settings.database_url).database not in (None, "", ":memory:"):
+    # Pool checkout waits feed admission control; in-memory SQLite keeps its own pool
+    engine_options["poolclass"] = TimedQueuePool
 
 # Create SQLAlchemy engine
 engine = create_engine(
     settings.database_url,
     pool_pre_ping=True,
     # echo=settings.environment == "development"
+    **engine_options
 )
 
+if engine.dialect.name == "sqlite":
+    # SQLite ignores foreign keys (and ON DELETE CASCADE) unless enabled per connection
+    @event.listens_for(engine, "connect")
+    def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+if INSTRUMENTED:
+    instrument_engine(engine)
+
+# Slow statements are logged from anywhere, including the batch jobs
+if settings.slow_query_log:
+    instrument_slow_queries(engine)
+
+def collect_pool_metrics():
+    pool = engine.pool
+    if isinstance(pool, TimedQueuePool):
+        db_pool_connections.labels("checked_out").set(pool.checkedout())
+        db_pool_connections.labels("idle").set(pool.checkedin())
+        db_pool_connections.labels("overflow").set(max(pool.overflow(), 0))
+        db_pool_connections.labels("size").set(pool.size())
+
+metrics.add_collector(collect_pool_metrics)
+
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -1,50 +1,46 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response
+from starlette.concurrency import run_in_threadpool
 from app.config import settings
-from app.api import auth_router, users_router, content_router
-from app.database import engine, Base
+from app.api import auth_router, users_router, content_router, admin_router, groups_router
+from app import startup
+from app.startup import run_startup, run_worker_startup, startup_timings
+from app.utils.admission import AdmissionMiddleware, admission_controller
+from app.utils.request_context import INSTRUMENTED, RequestTimingMiddleware, timing_stats
+from app.utils.profiler import ProfilerMiddleware, profiling_targets
+from app.utils.metrics import MetricsMiddleware, metrics, metrics_flusher, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from app.services.unlock_notifier import unlock_notifier
+from app.services.day_advancement import day_advancement_scheduler
+from app.services.account_purge import account_purge_scheduler
+from app.services.progress_events import progress_event_writer
 import uvicorn
 import uuid
+import os
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
-# Load daily content if database is empty
-def load_initial_data():
-    """Load initial data if database is empty"""
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Database checks, cache warm-up and background tasks run here, not at import time"""
+    await run_in_threadpool(run_worker_startup if startup.preloaded else run_startup)
+    await unlock_notifier.start()
+    await day_advancement_scheduler.start()
+    await account_purge_scheduler.start()
+    await progress_event_writer.start()
+    if settings.profiling_enabled:
+        await profiling_targets.start()
+    if settings.metrics_enabled:
+        await metrics_flusher.start(settings.metrics_dir or None)
     try:
-        from sqlalchemy.orm import Session
-        from app.models.content import DailyContent
-        from app.database import SessionLocal
-        import json
-        import os
-        
-        db = SessionLocal()
-        try:
-            # Check if daily content exists
-            existing_content = db.query(DailyContent).first()
-            if not existing_content:
-                # Load from JSON file
-                json_file_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "daily_content.json")
-                if os.path.exists(json_file_path):
-                    with open(json_file_path, 'r', encoding='utf-8') as file:
-                        content_data = json.load(file)
-                    
-                    for day_data in content_data:
-                        content = DailyContent(**day_data)
-                        db.add(content)
-                    
-                    db.commit()
-                    print(f"✅ Loaded {len(content_data)} days of content into database")
-        except Exception as e:
-            print(f"⚠️  Could not load initial data: {e}")
-        finally:
-            db.close()
-    except Exception as e:
-        print(f"⚠️  Error in load_initial_data: {e}")
-
-# Load initial data
-load_initial_data()
+        yield
+    finally:
+        # Queued progress events are written before the metrics' final flush
+        await progress_event_writer.stop()
+        await profiling_targets.stop()
+        await metrics_flusher.stop()
+        await account_purge_scheduler.stop()
+        await day_advancement_scheduler.stop()
+        await unlock_notifier.stop()
 
 # Create FastAPI app
 app = FastAPI(
@@ -52,7 +48,10 @@ app = FastAPI(
     description="API para la aplicación de consagración total a María",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    # orjson-backed responses for every route; typed routes skip jsonable_encoder
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Configure CORS based on environment
@@ -73,6 +72,10 @@ else:
     cors_methods = ["*"]
     cors_headers = ["*"]
 
+# Admission control sits inside CORS so shed responses still carry CORS headers
+if settings.admission_control:
+    app.add_middleware(AdmissionMiddleware)
+
 # Add CORS middleware with secure configuration
 app.add_middleware(
     CORSMiddleware,
@@ -80,12 +83,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=cors_methods,
     allow_headers=cors_headers,
+    expose_headers=["Server-Timing"]
 )
 
+# Inside the timing middleware, so it can read the request's query count
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
+# Outermost, so the Server-Timing total covers the whole request
+if INSTRUMENTED:
+    app.add_middleware(RequestTimingMiddleware)
+
+# Profiles cover the whole request, including the other middlewares
+if settings.profiling_enabled:
+    app.add_middleware(ProfilerMiddleware)
+
 # Include routers
 app.include_router(auth_router, prefix=settings.api_v1_str)
 app.include_router(users_router, prefix=settings.api_v1_str)
 app.include_router(content_router, prefix=settings.api_v1_str)
+app.include_router(admin_router, prefix=settings.api_v1_str)
+app.include_router(groups_router, prefix=settings.api_v1_str)
 
 @app.get("/")
 def read_root():
@@ -99,6 +117,30 @@ def read_root():
 def health_check():
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    """503 while this instance is saturated so the platform routes elsewhere"""
+    reason = admission_controller.saturation_reason()
+    body = {"status": "saturated" if reason else "ready", "reason": reason, **admission_controller.snapshot()}
+    return ORJSONResponse(body, status_code=503 if reason else 200)
+
+@app.get("/health/startup")
+def startup_check():
+    """Milliseconds spent in each startup phase of this process"""
+    return {"pid": os.getpid(), "fast_start": settings.fast_start, "timings_ms": startup_timings}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    """Prometheus text format, merged across all workers"""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return Response(metrics.render(settings.metrics_dir or None), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/health/timings")
+def request_timings():
+    """Per-route phase averages of this process since it started"""
+    return {"pid": os.getpid(), "mode": settings.request_timing, "routes": timing_stats.snapshot()}
+
 if __name__ == "__main__":
     uvicorn.run(
         "app.main:app",
@@ -1,5 +1,11 @@
 from app.database import Base
 from .user import User
 from .content import DailyContent, UserProgress
+from .analytics import DayStats, DateStats
+from .group import Group, GroupMembership, GroupDayStats
+from .progress_event import ProgressEvent
 
-__all__ = ["Base", "User", "DailyContent", "UserProgress"] 
\ No newline at end of file
+__all__ = [
+    "Base", "User", "DailyContent", "UserProgress", "DayStats", "DateStats",
+    "Group", "GroupMembership", "GroupDayStats", "ProgressEvent"
+] 
\ No newline at end of file
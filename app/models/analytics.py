@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, Date
+from app.database import Base
+
+class DayStats(Base):
+    """Per consecration day, over accounts that are not deleted; kept up to date by AnalyticsService"""
+    __tablename__ = "day_stats"
+    
+    day = Column(Integer, primary_key=True, autoincrement=False)
+    current_users = Column(Integer, default=0, nullable=False)  # Usuarios cuyo día actual es este
+    reached_users = Column(Integer, default=0, nullable=False)  # Usuarios que llegaron a este día (start_day..current_day)
+    completed_users = Column(Integer, default=0, nullable=False)  # Usuarios con las tres tareas del día completas
+
+class DateStats(Base):
+    """Per calendar date (UTC), over accounts that are not deleted"""
+    __tablename__ = "date_stats"
+    
+    date = Column(Date, primary_key=True)
+    registrations = Column(Integer, default=0, nullable=False)
+    completions = Column(Integer, default=0, nullable=False)  # Días completados (completed_at en esta fecha)
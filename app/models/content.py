@@ -23,12 +23,14 @@ class UserProgress(Base):
     __tablename__ = "user_progress"
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), unique=True, index=True, nullable=False)
-    user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
+    user_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     day = Column(Integer, nullable=False)
     meditation_completed = Column(Boolean, default=False)
     video_completed = Column(Boolean, default=False)
     rosary_completed = Column(Boolean, default=False)
     completed_at = Column(DateTime, nullable=True, default=None)
+    version = Column(Integer, default=0, nullable=False)  # users.progress_version when this row last changed
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
     # Relationship
     user = relationship("User", back_populates="progress")
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.database import Base
+import uuid
+
+class Group(Base):
+    """A parish or cohort doing the consecration together"""
+    __tablename__ = "groups"
+    
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), unique=True, index=True, nullable=False)
+    name = Column(String, nullable=False)
+    invite_code = Column(String(16), unique=True, index=True, nullable=False)  # Código para unirse al grupo
+    created_by = Column(String(36), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    member_count = Column(Integer, default=0, nullable=False)  # Se mantiene al entrar y salir miembros
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+class GroupMembership(Base):
+    __tablename__ = "group_memberships"
+    
+    group_id = Column(String(36), ForeignKey("groups.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, index=True)
+    joined_at = Column(DateTime, default=func.now())
+
+class GroupDayStats(Base):
+    """Per group and consecration day, over its members; kept up to date by StatsDelta"""
+    __tablename__ = "group_day_stats"
+    
+    group_id = Column(String(36), ForeignKey("groups.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Integer, primary_key=True, autoincrement=False)
+    current_members = Column(Integer, default=0, nullable=False)  # Miembros cuyo día actual es este
+    completed_members = Column(Integer, default=0, nullable=False)  # Miembros con las tres tareas del día completas
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Boolean, ForeignKey, Index
+from app.database import Base
+
+class ProgressEvent(Base):
+    """Append-only log of task toggles; user_progress can be rebuilt from it (scripts/replay_progress_events.py)"""
+    __tablename__ = "progress_events"
+    
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    user_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Integer, nullable=False)
+    task = Column(String(16), nullable=False)  # meditation, video o rosary
+    completed = Column(Boolean, nullable=False)  # Nuevo valor de la tarea
+    occurred_at = Column(DateTime, nullable=False)
+    version = Column(Integer, nullable=False)  # users.progress_version del cambio
+    
+    __table_args__ = (Index('ix_progress_events_user_id_day', 'user_id', 'day'),)
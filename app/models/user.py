@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Date, DateTime, Boolean
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -15,10 +15,20 @@ class User(Base):
     start_day = Column(Integer, default=1)  # Día elegido para empezar la consagración
     has_chosen_start_day = Column(Boolean, default=False)  # Flag para una sola elección
     libre_mode = Column(Boolean, default=False)
+    timezone = Column(String(64), default='America/Lima', nullable=False, index=True)  # Zona horaria para el desbloqueo a medianoche
+    progress_version = Column(Integer, default=0, nullable=False)  # Se incrementa en cada cambio de progreso
+    day_advanced_at = Column(DateTime, nullable=True)  # Medianoche (UTC) del último avance por lote
+    # Contadores mantenidos por UserCounterService (scripts/verify_user_counters.py los verifica)
+    tasks_completed = Column(Integer, default=0, nullable=False)
+    days_completed = Column(Integer, default=0, nullable=False)
+    current_streak = Column(Integer, default=0, nullable=False)  # Fechas locales seguidas con un día completado
+    longest_streak = Column(Integer, default=0, nullable=False)
+    last_completed_on = Column(Date, nullable=True)  # Fecha local del último día completado
     start_date = Column(DateTime, default=func.now())
     is_active = Column(Boolean, default=True)
+    deleted_at = Column(DateTime, nullable=True, index=True)  # Baja solicitada; el purgador borra la fila después
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
     # Relationships
-    progress = relationship("UserProgress", back_populates="user") 
\ No newline at end of file
+    progress = relationship("UserProgress", back_populates="user", passive_deletes=True) 
\ No newline at end of file
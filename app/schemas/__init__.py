@@ -1,7 +1,13 @@
 from .user import UserCreate, UserUpdate, UserResponse, UserLogin, Token, TokenData, LoginResponse
-from .content import DailyContentResponse, UserProgressCreate, UserProgressResponse, UserProgressSummary
+from .content import DailyContentResponse, UserProgressCreate, UserProgressResponse, UserProgressSummary, CompactProgress, ProgressSyncResponse
+from .dashboard import DashboardResponse, BootstrapResponse
+from .admin import ProfilingToggle, ProfilingTarget, ProfilingStatus, AnalyticsResponse
+from .group import GroupCreate, GroupJoin, GroupResponse, GroupDashboardResponse
 
 __all__ = [
     "UserCreate", "UserUpdate", "UserResponse", "UserLogin", "Token", "TokenData", "LoginResponse",
-    "DailyContentResponse", "UserProgressCreate", "UserProgressResponse", "UserProgressSummary"
+    "DailyContentResponse", "UserProgressCreate", "UserProgressResponse", "UserProgressSummary",
+    "CompactProgress", "ProgressSyncResponse", "DashboardResponse",
+    "BootstrapResponse", "ProfilingToggle", "ProfilingTarget", "ProfilingStatus",
+    "AnalyticsResponse", "GroupCreate", "GroupJoin", "GroupResponse", "GroupDashboardResponse"
 ] 
\ No newline at end of file
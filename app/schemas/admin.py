@@ -0,0 +1,58 @@
+from pydantic import BaseModel, validator
+from datetime import date
+from typing import Optional, List
+
+class ProfilingToggle(BaseModel):
+    user_id: Optional[str] = None
+    email: Optional[str] = None
+    requests: int = 10
+    minutes: int = 15
+
+    @validator('requests')
+    def validate_requests(cls, v):
+        if v < 1 or v > 100:
+            raise ValueError('El número de peticiones debe estar entre 1 y 100')
+        return v
+
+    @validator('minutes')
+    def validate_minutes(cls, v):
+        if v < 1 or v > 24 * 60:
+            raise ValueError('La duración debe estar entre 1 minuto y 24 horas')
+        return v
+
+class ProfilingTarget(BaseModel):
+    user_id: str
+    until: float
+    remaining: int
+
+class ProfileSummary(BaseModel):
+    name: str
+    method: Optional[str] = None
+    path: Optional[str] = None
+    status: Optional[int] = None
+    trigger: Optional[str] = None
+    duration_ms: Optional[float] = None
+    samples: Optional[int] = None
+    created_at: Optional[float] = None
+
+class ProfilingStatus(BaseModel):
+    targets: List[ProfilingTarget]
+    profiles: List[ProfileSummary]
+
+
+class DayAnalytics(BaseModel):
+    day: int
+    current_users: int
+    reached_users: int
+    completed_users: int
+    completion_rate: Optional[float] = None
+    drop_off: Optional[float] = None
+
+class DateAnalytics(BaseModel):
+    date: date
+    registrations: int
+    completions: int
+
+class AnalyticsResponse(BaseModel):
+    days: List[DayAnalytics]
+    dates: List[DateAnalytics]
@@ -32,6 +32,7 @@ class UserProgressResponse(BaseModel):
     video_completed: bool
     rosary_completed: bool
     completed_at: Optional[datetime] = None
+    version: int = 0
     
     class Config:
         from_attributes = True
@@ -42,4 +43,20 @@ class UserProgressSummary(BaseModel):
     video_completed: bool
     rosary_completed: bool
     total_completed: int
-    total_tasks: int = 3 
\ No newline at end of file
+    total_tasks: int = 3 
+
+class CompactProgress(BaseModel):
+    """Bitmask encoding of UserProgressSummary, see app.utils.progress_codec"""
+    format: str = "compact"
+    days: int
+    tasks_per_day: int
+    bits: str
+    total_completed: int
+    completed_days: int
+
+class ProgressSyncResponse(BaseModel):
+    """Progress days that changed after the client's last known version"""
+    version: int
+    current_day: int
+    full: bool = False
+    changes: List[UserProgressSummary]
\ No newline at end of file
@@ -0,0 +1,67 @@
+from pydantic import BaseModel
+from typing import Optional, List, Union
+from datetime import datetime
+from .content import UserProgressSummary, CompactProgress, DailyContentResponse
+
+class DashboardUser(BaseModel):
+    id: str
+    name: str
+    email: str
+    current_day: int
+    start_day: int
+    has_chosen_start_day: bool
+    libre_mode: bool
+    timezone: str = 'America/Lima'
+    start_date: Optional[datetime] = None
+    is_active: bool
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    totalDays: int = 33
+    currentDay: int
+    progressPercentage: int
+    tasksCompleted: int = 0
+    daysCompleted: int = 0
+    currentStreak: int = 0
+    longestStreak: int = 0
+
+class DashboardVideo(BaseModel):
+    title: str
+    youtubeUrl: str
+
+class DashboardQuote(BaseModel):
+    text: str
+    author: str
+
+class DashboardTasks(BaseModel):
+    meditationCompleted: bool
+    videoCompleted: bool
+    rosaryCompleted: bool
+
+class DashboardDailyContent(BaseModel):
+    id: str
+    day: int
+    title: str
+    description: str
+    readingTime: str
+    mysteries: str
+    mysteriesDescription: str
+    video: DashboardVideo
+    rosaryVideo: DashboardVideo
+    quote: DashboardQuote
+    tasks: DashboardTasks
+    meditationPdfUrl: str
+
+class DashboardResponse(BaseModel):
+    user: DashboardUser
+    available_day: int
+    progress: Union[List[UserProgressSummary], CompactProgress]
+    daily_content: Optional[DashboardDailyContent] = None
+    next_available_time: Optional[str] = None
+
+
+class BootstrapResponse(DashboardResponse):
+    server_time: datetime
+    version: str
+    content_version: str
+    progress_version: int
+    content: Optional[List[DailyContentResponse]] = None
\ No newline at end of file
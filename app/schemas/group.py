@@ -0,0 +1,40 @@
+from pydantic import BaseModel, validator
+from datetime import datetime
+from typing import List, Optional
+
+class GroupCreate(BaseModel):
+    name: str
+
+    @validator('name')
+    def validate_name(cls, v):
+        v = v.strip()
+        if len(v) < 3 or len(v) > 100:
+            raise ValueError('El nombre del grupo debe tener entre 3 y 100 caracteres')
+        return v
+
+class GroupJoin(BaseModel):
+    invite_code: str
+
+    @validator('invite_code')
+    def normalize_invite_code(cls, v):
+        return v.strip().upper()
+
+class GroupResponse(BaseModel):
+    id: str
+    name: str
+    invite_code: str
+    member_count: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class GroupDayProgress(BaseModel):
+    day: int
+    current_members: int  # Miembros que están en este día
+    completed_members: int  # Miembros que completaron este día
+    completion_rate: Optional[float] = None  # completed_members / member_count
+
+class GroupDashboardResponse(BaseModel):
+    group: GroupResponse
+    days: List[GroupDayProgress]
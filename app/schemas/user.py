@@ -1,8 +1,14 @@
 from pydantic import BaseModel, EmailStr, validator
 from typing import Optional
 from datetime import datetime
+from app.utils.gating import is_valid_timezone
 import re
 
+def validate_timezone_name(v):
+    if v is not None and not is_valid_timezone(v):
+        raise ValueError('Zona horaria no válida')
+    return v
+
 class UserBase(BaseModel):
     name: str
     email: EmailStr
@@ -21,6 +27,9 @@ class UserBase(BaseModel):
 
 class UserCreate(UserBase):
     password: str
+    timezone: Optional[str] = None
+    
+    _validate_timezone = validator('timezone', allow_reuse=True)(validate_timezone_name)
     
     @validator('password')
     def validate_password(cls, v):
@@ -41,6 +50,14 @@ class UserUpdate(BaseModel):
     email: Optional[EmailStr] = None
     current_day: Optional[int] = None
     libre_mode: Optional[bool] = None
+    timezone: Optional[str] = None
+
+    @validator('timezone')
+    def validate_timezone(cls, v):
+        # Omitting the field keeps the zone; an explicit null would clear a NOT NULL column
+        if v is None:
+            raise ValueError('La zona horaria no puede ser nula')
+        return validate_timezone_name(v)
 
     @validator('email')
     def validate_email_provider(cls, v):
@@ -62,6 +79,7 @@ class UserResponse(UserBase):
     start_day: int
     has_chosen_start_day: bool
     libre_mode: bool
+    timezone: str = 'America/Lima'
     start_date: datetime
     is_active: bool
     created_at: datetime
@@ -79,6 +97,10 @@ class Token(BaseModel):
     refresh_token: str
     token_type: str
 
+class EventsToken(BaseModel):
+    events_token: str
+    expires_in: int
+
 class TokenData(BaseModel):
     email: Optional[str] = None
 
@@ -1,3 +1,4 @@
 from .auth import AuthService
+from .content_cache import ContentCache, content_cache
 
-__all__ = ["AuthService"] 
\ No newline at end of file
+__all__ = ["AuthService", "ContentCache", "content_cache"] 
\ No newline at end of file
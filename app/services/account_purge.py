@@ -0,0 +1,112 @@
+from sqlalchemy.orm import Session
+from app.models.user import User
+from app.config import settings
+from app.services.analytics import AnalyticsService
+from app.services.groups import GroupService
+from app.utils.metrics import metrics
+from datetime import datetime, timedelta
+from typing import Optional
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Pause between purge batches so hot tables are never locked for long in a row
+PURGE_BATCH_PAUSE_SECONDS = 0.05
+
+accounts_purged = metrics.counter("accounts_purged_total", "Soft-deleted accounts removed by the purger")
+
+class AccountPurgeService:
+    @staticmethod
+    def soft_delete(user: User, db: Session):
+        """
+        Deactivate the account in one UPDATE: access is revoked at once (every token
+        check requires is_active) and the email is anonymized so it can be registered
+        again. The user leaves the statistics and their groups in the same transaction;
+        the rows themselves are removed later by purge_deleted.
+        """
+        completed_days = AnalyticsService.record_deletion(db, user)
+        GroupService.leave_all(db, user, completed_days)
+        db.query(User).filter(User.id == user.id).update({
+            User.is_active: False,
+            User.deleted_at: datetime.utcnow(),
+            User.email: f"deleted-{user.id}@deleted.invalid",
+            User.name: "Cuenta eliminada",
+        }, synchronize_session=False)
+        db.commit()
+
+    @staticmethod
+    def purge_deleted(db: Session, grace_hours: Optional[int] = None, batch_size: Optional[int] = None,
+                      now: Optional[datetime] = None) -> int:
+        """
+        Remove accounts deleted more than ``grace_hours`` ago, ``batch_size`` users
+        per transaction. Their progress goes with them through ON DELETE CASCADE, so
+        each batch touches at most ``batch_size`` * 33 progress rows.
+        """
+        grace_hours = settings.account_purge_grace_hours if grace_hours is None else grace_hours
+        batch_size = batch_size or settings.account_purge_batch_size
+        cutoff = (now or datetime.utcnow()) - timedelta(hours=grace_hours)
+
+        purged = 0
+        while True:
+            ids = [row.id for row in db.query(User.id).filter(
+                User.deleted_at.isnot(None),
+                User.deleted_at <= cutoff
+            ).order_by(User.deleted_at).limit(batch_size).all()]
+            if not ids:
+                break
+
+            deleted = db.query(User).filter(
+                User.id.in_(ids),
+                User.deleted_at.isnot(None)
+            ).delete(synchronize_session=False)
+            db.commit()
+            purged += deleted
+            accounts_purged.inc(deleted)
+            if len(ids) < batch_size:
+                break
+            time.sleep(PURGE_BATCH_PAUSE_SECONDS)
+
+        if purged:
+            logger.info("Account purge removed %d users deleted before %s", purged, cutoff.isoformat())
+        return purged
+
+class AccountPurgeScheduler:
+    """Runs AccountPurgeService.purge_deleted every ACCOUNT_PURGE_INTERVAL_SECONDS"""
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None and settings.account_purger:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await loop.run_in_executor(None, self.run_once)
+            await asyncio.sleep(settings.account_purge_interval_seconds)
+
+    def run_once(self) -> int:
+        from app.database import SessionLocal
+        db = SessionLocal()
+        try:
+            return AccountPurgeService.purge_deleted(db)
+        except Exception:
+            db.rollback()
+            logger.exception("Account purge failed")
+            return 0
+        finally:
+            db.close()
+
+# Global scheduler instance
+account_purge_scheduler = AccountPurgeScheduler()
@@ -0,0 +1,301 @@
+from collections import defaultdict
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models.analytics import DayStats, DateStats
+from app.models.content import UserProgress
+from app.models.group import Group, GroupMembership, GroupDayStats
+from app.models.user import User
+from app.services.group_cache import GROUP_DAY_COLUMNS, group_stats_cache
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+DAY_COLUMNS = ("current_users", "reached_users", "completed_users")
+DATE_COLUMNS = ("registrations", "completions")
+
+def _group_day_counts():
+    return defaultdict(lambda: dict.fromkeys(GROUP_DAY_COLUMNS, 0))
+
+class StatsDelta:
+    """
+    Changes to day_stats, date_stats and group_day_stats collected while a request
+    or job changes users and progress; apply() writes them in the caller's transaction.
+    Changes of individual users (``user_id=``) are added to every group they belong to.
+    """
+    def __init__(self):
+        self.days: Dict[int, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(DAY_COLUMNS, 0))
+        self.dates: Dict[date, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(DATE_COLUMNS, 0))
+        self.members: Dict[str, Dict[int, Dict[str, int]]] = defaultdict(_group_day_counts)
+        self.groups: Dict[Tuple[str, int], Dict[str, int]] = defaultdict(lambda: dict.fromkeys(GROUP_DAY_COLUMNS, 0))
+
+    def day(self, day: int, **changes: int) -> "StatsDelta":
+        for column, amount in changes.items():
+            self.days[day][column] += amount
+        return self
+
+    def date(self, when, **changes: int) -> "StatsDelta":
+        when = when.date() if isinstance(when, datetime) else when
+        for column, amount in changes.items():
+            self.dates[when][column] += amount
+        return self
+
+    def member(self, user_id: str, day: int, **changes: int) -> "StatsDelta":
+        for column, amount in changes.items():
+            self.members[user_id][day][column] += amount
+        return self
+
+    def group(self, group_id: str, day: int, **changes: int) -> "StatsDelta":
+        for column, amount in changes.items():
+            self.groups[(group_id, day)][column] += amount
+        return self
+
+    def advance(self, from_day: int, to_day: int, users: int = 1, user_id: Optional[str] = None,
+                start_day: int = 1) -> "StatsDelta":
+        """
+        ``users`` moved from ``from_day`` to ``to_day`` and reached every day in
+        between. Days before ``start_day`` are never reached (like compute counts them),
+        even when a user's current day was set below their start day.
+        """
+        self.day(from_day, current_users=-users)
+        self.day(to_day, current_users=users)
+        for day in range(max(from_day + 1, start_day or 1), to_day + 1):
+            self.day(day, reached_users=users)
+        if user_id is not None:
+            self.member(user_id, from_day, current_members=-1).member(user_id, to_day, current_members=1)
+        return self
+
+    def completion(self, day: int, was_completed_at: Optional[datetime], completed_at: Optional[datetime],
+                   user_id: Optional[str] = None) -> "StatsDelta":
+        """A progress row went from ``was_completed_at`` to ``completed_at`` (None: not complete)"""
+        if was_completed_at is not None:
+            self.day(day, completed_users=-1).date(was_completed_at, completions=-1)
+        if completed_at is not None:
+            self.day(day, completed_users=1).date(completed_at, completions=1)
+        if user_id is not None:
+            self.member(user_id, day, completed_members=(completed_at is not None) - (was_completed_at is not None))
+        return self
+
+    def apply(self, db: Session):
+        """
+        One upsert per table that changed; member changes cost one more query to
+        find their groups. The caller commits.
+        """
+        self._add_member_changes(db)
+        _upsert_increments(db, DayStats, ("day",), [
+            {"day": day, **changes} for day, changes in self.days.items()
+        ])
+        _upsert_increments(db, DateStats, ("date",), [
+            {"date": when, **changes} for when, changes in self.dates.items()
+        ])
+        group_rows = [
+            {"group_id": group_id, "day": day, **changes} for (group_id, day), changes in self.groups.items()
+        ]
+        if _upsert_increments(db, GroupDayStats, ("group_id", "day"), group_rows):
+            group_stats_cache.invalidate_after_commit(db, {row["group_id"] for row in group_rows})
+        self.days.clear()
+        self.dates.clear()
+        self.members.clear()
+        self.groups.clear()
+
+    def _add_member_changes(self, db: Session):
+        changed = {
+            user_id: days for user_id, days in self.members.items()
+            if any(any(changes.values()) for changes in days.values())
+        }
+        if not changed:
+            return
+        for user_id, group_id in db.query(GroupMembership.user_id, GroupMembership.group_id).filter(
+            GroupMembership.user_id.in_(list(changed))
+        ):
+            for day, changes in changed[user_id].items():
+                self.group(group_id, day, **changes)
+
+def _upsert_increments(db: Session, model, keys: Tuple[str, ...], rows: List[dict]) -> bool:
+    """Add the non-key values of ``rows`` to the existing rows (inserting missing ones) in one statement"""
+    rows = [row for row in rows if any(value for column, value in row.items() if column not in keys)]
+    if not rows:
+        return False
+    # Rows are locked in VALUES order: sorting by key gives every writer (nightly chunks,
+    # concurrent requests) the same order on these hot rows, so they can't deadlock
+    rows.sort(key=lambda row: tuple(row[key] for key in keys))
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(model).values(rows)
+    table = model.__table__
+    columns = [column for column in rows[0] if column not in keys]
+    db.execute(statement.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={column: table.c[column] + statement.excluded[column] for column in columns}
+    ))
+    return True
+
+class AnalyticsService:
+    @staticmethod
+    def record_registration(db: Session, start_day: int = 1, when: Optional[datetime] = None):
+        StatsDelta().day(start_day, current_users=1, reached_users=1).date(
+            when or datetime.utcnow(), registrations=1
+        ).apply(db)
+
+    @staticmethod
+    def record_start_day(db: Session, user: User, new_start_day: int):
+        """The user restarts the journey at ``new_start_day`` (called before the user row changes)"""
+        delta = StatsDelta().day(user.current_day, current_users=-1).day(new_start_day, current_users=1, reached_users=1)
+        delta.member(user.id, user.current_day, current_members=-1).member(user.id, new_start_day, current_members=1)
+        for day in range(user.start_day or 1, user.current_day + 1):
+            delta.day(day, reached_users=-1)
+        delta.apply(db)
+
+    @staticmethod
+    def record_day_change(db: Session, user: User, new_day: int):
+        """The user's current day is set directly (profile update; called before the user row changes)"""
+        if new_day == user.current_day:
+            return
+        start_day = user.start_day or 1
+        delta = StatsDelta().day(user.current_day, current_users=-1).day(new_day, current_users=1)
+        delta.member(user.id, user.current_day, current_members=-1).member(user.id, new_day, current_members=1)
+        reached_before = set(range(start_day, user.current_day + 1))
+        reached_after = set(range(start_day, new_day + 1))
+        for day in reached_after - reached_before:
+            delta.day(day, reached_users=1)
+        for day in reached_before - reached_after:
+            delta.day(day, reached_users=-1)
+        delta.apply(db)
+
+    @staticmethod
+    def record_deletion(db: Session, user: User) -> List[int]:
+        """
+        Take a soft-deleted user (and their completed days) out of the global
+        statistics; returns the completed days for the group statistics.
+        """
+        delta = StatsDelta().day(user.current_day, current_users=-1)
+        for day in range(user.start_day or 1, user.current_day + 1):
+            delta.day(day, reached_users=-1)
+        if user.created_at is not None:
+            delta.date(user.created_at, registrations=-1)
+        completed_days = []
+        for day, completed_at in db.query(UserProgress.day, UserProgress.completed_at).filter(
+            UserProgress.user_id == user.id,
+            UserProgress.completed_at.isnot(None)
+        ):
+            delta.completion(day, completed_at, None)
+            completed_days.append(day)
+        delta.apply(db)
+        return completed_days
+
+    @staticmethod
+    def compute(db: Session) -> Tuple[Dict[int, Dict[str, int]], Dict[date, Dict[str, int]], Dict[Tuple[str, int], Dict[str, int]]]:
+        """Statistics recomputed from users, user_progress and group_memberships with full scans (rebuilds and checks)"""
+        delta = StatsDelta()
+        active = User.deleted_at.is_(None)
+        for start_day, current_day, users in db.query(
+            User.start_day, User.current_day, func.count()
+        ).filter(active).group_by(User.start_day, User.current_day):
+            delta.day(current_day, current_users=users)
+            for day in range(start_day or 1, current_day + 1):
+                delta.day(day, reached_users=users)
+        for created, users in db.query(func.date(User.created_at), func.count()).filter(active).group_by(func.date(User.created_at)):
+            delta.date(_as_date(created), registrations=users)
+
+        completed = db.query(UserProgress.day, func.date(UserProgress.completed_at), func.count()).join(
+            User, User.id == UserProgress.user_id
+        ).filter(active, UserProgress.completed_at.isnot(None)).group_by(
+            UserProgress.day, func.date(UserProgress.completed_at)
+        )
+        for day, completed_on, rows in completed:
+            delta.day(day, completed_users=rows).date(_as_date(completed_on), completions=rows)
+
+        for group_id, day, members in db.query(GroupMembership.group_id, User.current_day, func.count()).join(
+            User, User.id == GroupMembership.user_id
+        ).filter(active).group_by(GroupMembership.group_id, User.current_day):
+            delta.group(group_id, day, current_members=members)
+        for group_id, day, members in db.query(GroupMembership.group_id, UserProgress.day, func.count()).join(
+            UserProgress, UserProgress.user_id == GroupMembership.user_id
+        ).join(User, User.id == GroupMembership.user_id).filter(
+            active, UserProgress.completed_at.isnot(None)
+        ).group_by(GroupMembership.group_id, UserProgress.day):
+            delta.group(group_id, day, completed_members=members)
+        return dict(delta.days), dict(delta.dates), dict(delta.groups)
+
+    @staticmethod
+    def stored(db: Session) -> Tuple[Dict[int, Dict[str, int]], Dict[date, Dict[str, int]], Dict[Tuple[str, int], Dict[str, int]]]:
+        days = {row.day: {column: getattr(row, column) for column in DAY_COLUMNS} for row in db.query(DayStats)}
+        dates = {row.date: {column: getattr(row, column) for column in DATE_COLUMNS} for row in db.query(DateStats)}
+        groups = {
+            (row.group_id, row.day): {column: getattr(row, column) for column in GROUP_DAY_COLUMNS}
+            for row in db.query(GroupDayStats)
+        }
+        return days, dates, groups
+
+    @staticmethod
+    def member_count_differences(db: Session) -> List[Tuple[str, int, int]]:
+        """``(group_id, stored member_count, actual members)`` for every group where they differ"""
+        return [
+            (group_id, stored, actual) for group_id, stored, actual in db.query(
+                Group.id, Group.member_count, func.count(GroupMembership.user_id)
+            ).outerjoin(GroupMembership, GroupMembership.group_id == Group.id).group_by(Group.id, Group.member_count)
+            if stored != actual
+        ]
+
+    @staticmethod
+    def differences(db: Session) -> List[str]:
+        """Where the incrementally maintained tables disagree with a full recomputation"""
+        computed = AnalyticsService.compute(db)
+        stored = AnalyticsService.stored(db)
+        problems = []
+        for label, computed_rows, stored_rows, columns in zip(
+            ("day", "date", "group day"), computed, stored, (DAY_COLUMNS, DATE_COLUMNS, GROUP_DAY_COLUMNS)
+        ):
+            for key in sorted(set(computed_rows) | set(stored_rows)):
+                expected = computed_rows.get(key, dict.fromkeys(columns, 0))
+                actual = stored_rows.get(key, dict.fromkeys(columns, 0))
+                for column in columns:
+                    if expected[column] != actual[column]:
+                        problems.append(f"{label} {key} {column}: stored {actual[column]}, expected {expected[column]}")
+        for group_id, stored_count, actual in AnalyticsService.member_count_differences(db):
+            problems.append(f"group {group_id} member_count: stored {stored_count}, expected {actual}")
+        return problems
+
+    @staticmethod
+    def rebuild(db: Session):
+        """Replace the statistics tables (and group member counts) with a full recomputation, in one transaction"""
+        days, dates, groups = AnalyticsService.compute(db)
+        db.query(DayStats).delete(synchronize_session=False)
+        db.query(DateStats).delete(synchronize_session=False)
+        db.query(GroupDayStats).delete(synchronize_session=False)
+        db.bulk_insert_mappings(DayStats, [{"day": day, **values} for day, values in days.items()])
+        db.bulk_insert_mappings(DateStats, [{"date": when, **values} for when, values in dates.items()])
+        db.bulk_insert_mappings(GroupDayStats, [
+            {"group_id": group_id, "day": day, **values} for (group_id, day), values in groups.items()
+        ])
+        for group_id, _, actual in AnalyticsService.member_count_differences(db):
+            db.query(Group).filter(Group.id == group_id).update({Group.member_count: actual}, synchronize_session=False)
+        db.commit()
+        group_stats_cache.clear()
+
+    @staticmethod
+    def summary(db: Session, recent_dates: int = 30) -> dict:
+        """Per-day funnel and the last ``recent_dates`` dates: reads at most 33 + ``recent_dates`` rows"""
+        days = []
+        rows = {row.day: row for row in db.query(DayStats).order_by(DayStats.day)}
+        for day in range(1, 34):
+            row = rows.get(day)
+            reached = row.reached_users if row else 0
+            next_row = rows.get(day + 1)
+            days.append({
+                "day": day,
+                "current_users": row.current_users if row else 0,
+                "reached_users": reached,
+                "completed_users": row.completed_users if row else 0,
+                "completion_rate": round(row.completed_users / reached, 4) if row and reached else None,
+                # Share of the users who reached this day that never reached the next
+                "drop_off": round(1 - (next_row.reached_users if next_row else 0) / reached, 4)
+                            if reached and day < 33 else None,
+            })
+        dates = [
+            {"date": row.date, "registrations": row.registrations, "completions": row.completions}
+            for row in db.query(DateStats).order_by(DateStats.date.desc()).limit(recent_dates)
+        ]
+        return {"days": days, "dates": dates}
+
+def _as_date(value) -> date:
+    """func.date() returns a date on PostgreSQL and an ISO string on SQLite"""
+    return date.fromisoformat(value) if isinstance(value, str) else value
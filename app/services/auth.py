@@ -5,6 +5,7 @@ from app.utils.security import get_password_hash, verify_password, create_access
 from fastapi import HTTPException, status
 from typing import Optional
 from app.models.content import UserProgress
+from app.services.analytics import AnalyticsService
 import uuid
 
 class AuthService:
@@ -25,7 +26,10 @@ class AuthService:
             email=user.email,
             password_hash=hashed_password
         )
+        if user.timezone:
+            db_user.timezone = user.timezone
         db.add(db_user)
+        AnalyticsService.record_registration(db)
         db.commit()
         db.refresh(db_user)
         # Create initial progress for day 1
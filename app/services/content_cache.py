@@ -0,0 +1,62 @@
+from sqlalchemy.orm import Session
+from app.models.content import DailyContent
+from app.utils.metrics import cache_requests
+from typing import Dict, List, Optional
+import hashlib
+import json
+import threading
+import time
+
+# Content only changes through the load scripts, so a few minutes of staleness is fine
+CONTENT_CACHE_TTL_SECONDS = 300
+
+CACHE_HITS = cache_requests.labels("content", "hit")
+CACHE_MISSES = cache_requests.labels("content", "miss")
+
+CONTENT_COLUMNS = (
+    "id", "day", "title", "description", "video_url", "rosary_video_url",
+    "meditation_pdf_url", "mysteries", "quote", "created_at", "updated_at"
+)
+
+class ContentSnapshot:
+    """Immutable view of all daily content plus a version hash of it"""
+    def __init__(self, items: List[dict]):
+        self.items = items
+        self.by_day: Dict[int, dict] = {item["day"]: item for item in items}
+        canonical = json.dumps(items, sort_keys=True, default=str, ensure_ascii=False)
+        self.version = hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+        self.loaded_at = time.monotonic()
+
+class ContentCache:
+    def __init__(self, ttl_seconds: int = CONTENT_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._snapshot: Optional[ContentSnapshot] = None
+        self._lock = threading.Lock()
+
+    def get(self, db: Session) -> ContentSnapshot:
+        """Return the current snapshot, loading it with one query when missing or expired"""
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - snapshot.loaded_at < self.ttl_seconds:
+            CACHE_HITS.inc()
+            return snapshot
+
+        with self._lock:
+            # Another thread may have refreshed it while we waited
+            snapshot = self._snapshot
+            if snapshot is not None and time.monotonic() - snapshot.loaded_at < self.ttl_seconds:
+                CACHE_HITS.inc()
+                return snapshot
+
+            CACHE_MISSES.inc()
+            columns = [getattr(DailyContent, name) for name in CONTENT_COLUMNS]
+            rows = db.query(*columns).order_by(DailyContent.day).all()
+            snapshot = ContentSnapshot([dict(zip(CONTENT_COLUMNS, row)) for row in rows])
+            self._snapshot = snapshot
+            return snapshot
+
+    def invalidate(self):
+        """Drop the snapshot so the next request reloads it"""
+        self._snapshot = None
+
+# Global content cache instance
+content_cache = ContentCache()
@@ -0,0 +1,94 @@
+from sqlalchemy.orm import Session
+from app.models.user import User
+from app.models.content import UserProgress
+from typing import Iterable, Iterator, Optional
+import csv
+import io
+import orjson
+
+# Rows fetched per round trip; with stream_results PostgreSQL uses a server-side cursor
+EXPORT_BATCH_SIZE = 1000
+
+# CSV rows buffered before a chunk is yielded
+CSV_ROWS_PER_CHUNK = 500
+
+USER_FIELDS = (
+    "id", "name", "email", "current_day", "start_day", "has_chosen_start_day", "libre_mode",
+    "timezone", "start_date", "is_active", "deleted_at", "created_at", "updated_at"
+)
+PROGRESS_FIELDS = (
+    "day", "meditation_completed", "video_completed", "rosary_completed", "completed_at", "updated_at"
+)
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+class DataExportService:
+    @staticmethod
+    def iter_records(db: Session, user_id: Optional[str] = None, include_deleted: bool = False) -> Iterator[dict]:
+        """
+        ``{"user": {...}, "progress": [...]}`` per user, in id order. One
+        users LEFT JOIN user_progress query is streamed in batches and grouped on
+        the fly, so memory stays constant however many users are exported.
+        """
+        columns = [getattr(User, name) for name in USER_FIELDS]
+        columns += [getattr(UserProgress, name).label(f"progress_{name}") for name in PROGRESS_FIELDS]
+        query = db.query(*columns).outerjoin(UserProgress, UserProgress.user_id == User.id)
+        if user_id is not None:
+            query = query.filter(User.id == user_id)
+        elif not include_deleted:
+            query = query.filter(User.deleted_at.is_(None))
+        rows = query.order_by(User.id, UserProgress.day).execution_options(
+            stream_results=True, yield_per=EXPORT_BATCH_SIZE
+        )
+
+        record = None
+        for row in rows:
+            if record is None or record["user"]["id"] != row.id:
+                if record is not None:
+                    yield record
+                record = {"user": {name: getattr(row, name) for name in USER_FIELDS}, "progress": []}
+            if row.progress_day is not None:
+                record["progress"].append({name: getattr(row, f"progress_{name}") for name in PROGRESS_FIELDS})
+        if record is not None:
+            yield record
+
+    @staticmethod
+    def to_ndjson(records: Iterable[dict]) -> Iterator[bytes]:
+        """One JSON document per user and line"""
+        for record in records:
+            yield orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+
+    @staticmethod
+    def to_csv(records: Iterable[dict]) -> Iterator[bytes]:
+        """One row per progress day (users without progress get one row with empty progress columns)"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(list(USER_FIELDS) + [f"progress_{name}" for name in PROGRESS_FIELDS])
+        empty_progress = [None] * len(PROGRESS_FIELDS)
+        pending = 0
+        for record in records:
+            user = [_csv_value(record["user"][name]) for name in USER_FIELDS]
+            for progress in record["progress"] or [None]:
+                values = [_csv_value(progress[name]) for name in PROGRESS_FIELDS] if progress else empty_progress
+                writer.writerow(user + values)
+                pending += 1
+            if pending >= CSV_ROWS_PER_CHUNK:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+        yield buffer.getvalue().encode("utf-8")
+
+    @staticmethod
+    def export(db: Session, export_format: str, user_id: Optional[str] = None,
+               include_deleted: bool = False) -> Iterator[bytes]:
+        records = DataExportService.iter_records(db, user_id, include_deleted)
+        if export_format == "csv":
+            return DataExportService.to_csv(records)
+        return DataExportService.to_ndjson(records)
+
+def _csv_value(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
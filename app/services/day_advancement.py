@@ -0,0 +1,219 @@
+from collections import Counter
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import Session
+from app.models.user import User
+from app.models.content import UserProgress
+from app.config import settings
+from app.services.analytics import StatsDelta
+from app.services.user_counters import UserCounterService
+from app.utils.gating import LAST_DAY, UNLOCK_TZ_NAME, gate, gate_many, boundaries_for, to_epoch, from_epoch
+from datetime import datetime
+from typing import Iterable, List, Optional
+import asyncio
+import logging
+import pytz
+
+logger = logging.getLogger(__name__)
+
+class DayAdvancementService:
+    @staticmethod
+    def latest_boundary(now: Optional[datetime] = None, tz_name: Optional[str] = None) -> datetime:
+        """Most recent local midnight at or before ``now``, as naive UTC (the storage format)"""
+        now = now or datetime.now(pytz.UTC)
+        epoch = boundaries_for(tz_name).latest_at_or_before(to_epoch(now))
+        return from_epoch(epoch).replace(tzinfo=None)
+
+    @staticmethod
+    def next_boundary(now: Optional[datetime] = None, zones: Optional[Iterable[str]] = None) -> datetime:
+        """Earliest local midnight strictly after ``now`` among ``zones``, as aware UTC"""
+        now_epoch = to_epoch(now or datetime.now(pytz.UTC))
+        return from_epoch(min(
+            boundaries_for(tz_name).next_after(now_epoch) for tz_name in (zones or [UNLOCK_TZ_NAME])
+        ))
+
+    @staticmethod
+    def active_zones(db: Session) -> List[str]:
+        """Time zones in use (a DISTINCT over ix_users_timezone)"""
+        return [row.timezone for row in db.query(User.timezone).distinct()]
+
+    @staticmethod
+    def advance_all(db: Session, now: Optional[datetime] = None, chunk_size: Optional[int] = None) -> int:
+        """
+        Advance every user whose current day was fully completed before the latest
+        midnight of their own time zone. Each zone is processed separately with its
+        own boundary; see advance_zone. Streaks that lapsed at that midnight are
+        reset in the same pass.
+        """
+        advanced = 0
+        for tz_name in DayAdvancementService.active_zones(db):
+            if settings.debug_mode:
+                # Debug mode has no timer: everything completed so far is due
+                boundary = datetime.utcnow()
+            else:
+                boundary = DayAdvancementService.latest_boundary(now, tz_name)
+            advanced += DayAdvancementService.advance_zone(db, tz_name, boundary, chunk_size)
+            UserCounterService.reset_lapsed_streaks(db, tz_name, boundary)
+        return advanced
+
+    @staticmethod
+    def advance_zone(db: Session, tz_name: str, boundary: datetime, chunk_size: Optional[int] = None) -> int:
+        """
+        Advance the users of ``tz_name`` whose current day was completed before ``boundary``.
+
+        Users are walked in primary-key order, one chunk per transaction. The query
+        only finds users whose current day is complete; gate_many, the rule the
+        dashboard applies through gate, decides at ``boundary`` which of them are
+        due, and those are advanced with a single UPDATE. ``day_advanced_at`` records the boundary that
+        advanced a user, so re-running for the same boundary (after a crash or from
+        another worker) is a no-op for users already moved.
+        """
+        chunk_size = chunk_size or settings.day_advancement_chunk_size
+
+        not_yet_advanced = or_(User.day_advanced_at.is_(None), User.day_advanced_at < boundary)
+        boundaries = boundaries_for(tz_name)
+        boundary_epoch = to_epoch(boundary)
+        advanced = 0
+        last_id = ""
+        while True:
+            rows = db.query(User.id, User.current_day, User.libre_mode, UserProgress.completed_at).join(
+                UserProgress,
+                and_(UserProgress.user_id == User.id, UserProgress.day == User.current_day)
+            ).filter(
+                User.timezone == tz_name,
+                User.id > last_id,
+                User.current_day < LAST_DAY,
+                User.is_active == True,
+                not_yet_advanced,
+                UserProgress.meditation_completed == True,
+                UserProgress.video_completed == True,
+                UserProgress.rosary_completed == True,
+                UserProgress.completed_at.isnot(None)
+            ).order_by(User.id).limit(chunk_size).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            available_days, _ = gate_many(
+                [row.current_day for row in rows],
+                [to_epoch(row.completed_at) for row in rows],
+                [bool(row.libre_mode) for row in rows],
+                boundary_epoch,
+                debug_mode=settings.debug_mode,
+                boundaries=boundaries
+            )
+            ids = [row.id for row, available_day in zip(rows, available_days) if available_day > row.current_day]
+            if not ids:
+                continue
+
+            advanced_rows = db.execute(update(User).where(
+                User.id.in_(ids),
+                User.current_day < LAST_DAY,
+                not_yet_advanced
+            ).values({
+                User.current_day: User.current_day + 1,
+                User.day_advanced_at: boundary,
+                User.progress_version: User.progress_version + 1
+            }).returning(User.id, User.current_day, User.start_day).execution_options(synchronize_session=False)).all()
+            # Day and group statistics move in the same transaction as the users
+            delta = StatsDelta()
+            for (day, start_day), users in Counter((row.current_day, row.start_day) for row in advanced_rows).items():
+                delta.advance(day - 1, day, users, start_day=start_day)
+            for row in advanced_rows:
+                delta.member(row.id, row.current_day - 1, current_members=-1).member(row.id, row.current_day, current_members=1)
+            delta.apply(db)
+            db.commit()
+            advanced += len(advanced_rows)
+
+        logger.info("Day advancement for %s (boundary %s) advanced %d users", tz_name, boundary.isoformat(), advanced)
+        return advanced
+
+    @staticmethod
+    def advance_immediately(user: User, db: Session, current_day_completed: Optional[bool] = None,
+                            stats: Optional[StatsDelta] = None) -> bool:
+        """
+        Libre-mode and debug-mode users skip the timer: move them to the next day as
+        soon as the current one is complete. The caller commits; a caller passing
+        ``stats`` also applies the statistics change.
+        """
+        if not (settings.debug_mode or user.libre_mode) or user.current_day >= LAST_DAY:
+            return False
+
+        completed_at = None
+        if current_day_completed is None:
+            progress = db.query(
+                UserProgress.meditation_completed,
+                UserProgress.video_completed,
+                UserProgress.rosary_completed,
+                UserProgress.completed_at
+            ).filter(
+                UserProgress.user_id == user.id,
+                UserProgress.day == user.current_day
+            ).first()
+            if (progress and progress.meditation_completed and progress.video_completed
+                    and progress.rosary_completed and progress.completed_at):
+                completed_at = progress.completed_at
+        elif current_day_completed:
+            completed_at = datetime.utcnow()
+
+        now_epoch = to_epoch(datetime.utcnow())
+        available_day, _ = gate(
+            user.current_day,
+            to_epoch(completed_at) if completed_at else None,
+            bool(user.libre_mode),
+            now_epoch,
+            debug_mode=settings.debug_mode,
+            boundaries=boundaries_for(user.timezone)
+        )
+        if available_day == user.current_day:
+            return False
+
+        if stats is not None:
+            stats.advance(user.current_day, available_day, user_id=user.id, start_day=user.start_day)
+        else:
+            StatsDelta().advance(user.current_day, available_day, user_id=user.id, start_day=user.start_day).apply(db)
+        user.current_day = available_day
+        return True
+
+class DayAdvancementScheduler:
+    """Runs DayAdvancementService.advance_all at every local midnight of the zones in use"""
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.zones: List[str] = [UNLOCK_TZ_NAME]
+
+    async def start(self):
+        if self._task is None and settings.day_advancement_scheduler:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        # Catch up on a boundary missed while no process was running
+        await loop.run_in_executor(None, self.run_once)
+        while True:
+            delay = (DayAdvancementService.next_boundary(zones=self.zones) - datetime.now(pytz.UTC)).total_seconds()
+            await asyncio.sleep(max(delay, 0) + 1)
+            await loop.run_in_executor(None, self.run_once)
+
+    def run_once(self) -> int:
+        from app.database import SessionLocal
+        db = SessionLocal()
+        try:
+            self.zones = DayAdvancementService.active_zones(db) or [UNLOCK_TZ_NAME]
+            return DayAdvancementService.advance_all(db)
+        except Exception:
+            db.rollback()
+            logger.exception("Day advancement failed")
+            return 0
+        finally:
+            db.close()
+
+# Global scheduler instance
+day_advancement_scheduler = DayAdvancementScheduler()
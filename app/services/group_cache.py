@@ -0,0 +1,78 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.models.group import GroupDayStats
+from app.utils.metrics import cache_requests
+from collections import OrderedDict
+from typing import Iterable, List
+import threading
+import time
+
+# Local changes invalidate at once; changes made by other workers show up within this
+GROUP_STATS_CACHE_TTL_SECONDS = 30
+
+# Groups kept in memory; the least recently read is dropped first
+GROUP_STATS_CACHE_SIZE = 1000
+
+CACHE_HITS = cache_requests.labels("group_stats", "hit")
+CACHE_MISSES = cache_requests.labels("group_stats", "miss")
+
+GROUP_DAY_COLUMNS = ("current_members", "completed_members")
+
+# Session.info key of the groups to invalidate when the session commits
+PENDING_KEY = "group_stats_pending"
+
+class GroupStatsCache:
+    """Per-group day statistics (33 rows at most), loaded with one query and kept for a short TTL"""
+    def __init__(self, ttl_seconds: int = GROUP_STATS_CACHE_TTL_SECONDS, max_groups: int = GROUP_STATS_CACHE_SIZE):
+        self.ttl_seconds = ttl_seconds
+        self.max_groups = max_groups
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, group_id: str) -> List[dict]:
+        """``[{"day", "current_members", "completed_members"}, ...]`` for days with any count, by day"""
+        with self._lock:
+            entry = self._entries.get(group_id)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+                self._entries.move_to_end(group_id)
+                CACHE_HITS.inc()
+                return entry[1]
+
+        CACHE_MISSES.inc()
+        rows = db.query(GroupDayStats.day, *[getattr(GroupDayStats, name) for name in GROUP_DAY_COLUMNS]).filter(
+            GroupDayStats.group_id == group_id
+        ).order_by(GroupDayStats.day).all()
+        days = [dict(zip(("day",) + GROUP_DAY_COLUMNS, row)) for row in rows]
+        with self._lock:
+            self._entries[group_id] = (time.monotonic(), days)
+            self._entries.move_to_end(group_id)
+            while len(self._entries) > self.max_groups:
+                self._entries.popitem(last=False)
+        return days
+
+    def invalidate(self, group_ids: Iterable[str]):
+        """Drop the given groups so their next read reloads them"""
+        with self._lock:
+            for group_id in group_ids:
+                self._entries.pop(group_id, None)
+
+    def invalidate_after_commit(self, db: Session, group_ids: Iterable[str]):
+        """Invalidate once ``db`` commits: invalidating earlier would let a concurrent read cache the old rows"""
+        db.info.setdefault(PENDING_KEY, set()).update(group_ids)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+# Global group statistics cache instance
+group_stats_cache = GroupStatsCache()
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session):
+    group_ids = session.info.pop(PENDING_KEY, None)
+    if group_ids:
+        group_stats_cache.invalidate(group_ids)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session):
+    session.info.pop(PENDING_KEY, None)
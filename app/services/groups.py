@@ -0,0 +1,146 @@
+from fastapi import HTTPException, status
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
+from app.models.content import UserProgress
+from app.models.group import Group, GroupMembership
+from app.models.user import User
+from app.services.analytics import StatsDelta
+from typing import Iterable, List, Optional
+import secrets
+import uuid
+
+# No 0/O or 1/I, so codes can be read out loud at the parish
+INVITE_CODE_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+INVITE_CODE_LENGTH = 8
+
+MAX_GROUPS_PER_USER = 20
+
+class GroupService:
+    @staticmethod
+    def new_invite_code() -> str:
+        return "".join(secrets.choice(INVITE_CODE_ALPHABET) for _ in range(INVITE_CODE_LENGTH))
+
+    @staticmethod
+    def membership_group_ids(db: Session, user: User) -> List[str]:
+        return [row.group_id for row in db.query(GroupMembership.group_id).filter(GroupMembership.user_id == user.id)]
+
+    @staticmethod
+    def add_member_stats(db: Session, user: User, group_ids: Iterable[str], sign: int,
+                         completed_days: Optional[List[int]] = None):
+        """
+        Add (``sign`` 1) or remove (-1) the user's current day and completed days
+        to the day statistics of ``group_ids``: one progress query (none when the
+        caller already has ``completed_days``) and one upsert.
+        """
+        if completed_days is None:
+            completed_days = [row.day for row in db.query(UserProgress.day).filter(
+                UserProgress.user_id == user.id,
+                UserProgress.completed_at.isnot(None)
+            )]
+        delta = StatsDelta()
+        for group_id in group_ids:
+            delta.group(group_id, user.current_day, current_members=sign)
+            for day in completed_days:
+                delta.group(group_id, day, completed_members=sign)
+        delta.apply(db)
+
+    @staticmethod
+    def _check_group_limit(group_ids: List[str]):
+        if len(group_ids) >= MAX_GROUPS_PER_USER:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Solo puedes pertenecer a {MAX_GROUPS_PER_USER} grupos"
+            )
+
+    @staticmethod
+    def create_group(db: Session, user: User, name: str) -> Group:
+        """Create a group with the user as its first member"""
+        GroupService._check_group_limit(GroupService.membership_group_ids(db, user))
+        group = Group(
+            id=str(uuid.uuid4()),
+            name=name,
+            invite_code=GroupService.new_invite_code(),
+            created_by=user.id,
+            member_count=1
+        )
+        db.add(group)
+        db.add(GroupMembership(group_id=group.id, user_id=user.id))
+        db.flush()
+        GroupService.add_member_stats(db, user, [group.id], 1)
+        db.commit()
+        return group
+
+    @staticmethod
+    def join_group(db: Session, user: User, invite_code: str) -> Group:
+        group = db.query(Group).filter(Group.invite_code == invite_code).first()
+        if not group:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Código de invitación no válido"
+            )
+
+        group_ids = GroupService.membership_group_ids(db, user)
+        if group.id in group_ids:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Ya eres miembro de este grupo"
+            )
+        GroupService._check_group_limit(group_ids)
+
+        db.add(GroupMembership(group_id=group.id, user_id=user.id))
+        db.query(Group).filter(Group.id == group.id).update(
+            {Group.member_count: Group.member_count + 1}, synchronize_session=False
+        )
+        db.flush()
+        GroupService.add_member_stats(db, user, [group.id], 1)
+        db.commit()
+        return group
+
+    @staticmethod
+    def leave_group(db: Session, user: User, group_id: str):
+        removed = db.query(GroupMembership).filter(
+            GroupMembership.group_id == group_id,
+            GroupMembership.user_id == user.id
+        ).delete(synchronize_session=False)
+        if not removed:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No perteneces a este grupo"
+            )
+        db.query(Group).filter(Group.id == group_id).update(
+            {Group.member_count: Group.member_count - 1}, synchronize_session=False
+        )
+        GroupService.add_member_stats(db, user, [group_id], -1)
+        db.commit()
+
+    @staticmethod
+    def leave_all(db: Session, user: User, completed_days: Optional[List[int]] = None):
+        """Remove the user from every group (account deletion); the caller commits"""
+        group_ids = GroupService.membership_group_ids(db, user)
+        if not group_ids:
+            return
+        db.query(GroupMembership).filter(GroupMembership.user_id == user.id).delete(synchronize_session=False)
+        db.query(Group).filter(Group.id.in_(group_ids)).update(
+            {Group.member_count: Group.member_count - 1}, synchronize_session=False
+        )
+        GroupService.add_member_stats(db, user, group_ids, -1, completed_days)
+
+    @staticmethod
+    def groups_of(db: Session, user: User) -> List[Group]:
+        return db.query(Group).join(GroupMembership, GroupMembership.group_id == Group.id).filter(
+            GroupMembership.user_id == user.id
+        ).order_by(GroupMembership.joined_at).all()
+
+    @staticmethod
+    def get_member_group(db: Session, user: User, group_id: str) -> Group:
+        """The group, if the user belongs to it (one query that also checks membership)"""
+        group = db.query(Group).join(GroupMembership, and_(
+            GroupMembership.group_id == Group.id,
+            GroupMembership.user_id == user.id
+        )).filter(Group.id == group_id).first()
+        if not group:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Grupo no encontrado"
+            )
+        return group
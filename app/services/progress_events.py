@@ -0,0 +1,238 @@
+from sqlalchemy import insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import Session
+from app.models.content import UserProgress
+from app.models.progress_event import ProgressEvent
+from app.models.user import User
+from app.config import settings
+from app.services.user_counters import UserCounterService
+from app.utils.metrics import metrics
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import asyncio
+import logging
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+TASKS = ("meditation", "video", "rosary")
+PROGRESS_COLUMNS = tuple(f"{task}_completed" for task in TASKS)
+
+# Events read per round trip and rows compared/written per transaction by the replay
+REPLAY_BATCH_SIZE = 1000
+
+events_written = metrics.counter("progress_events_written_total", "Progress events inserted by the background writer")
+events_dropped = metrics.counter(
+    "progress_events_dropped_total", "Progress events lost because the queue was full or their insert failed"
+)
+events_queued = metrics.gauge("progress_events_queued", "Progress events waiting in this worker's queue")
+
+def toggle_events(user_id: str, day: int, before: Sequence[bool], after: Sequence[bool],
+                  occurred_at: datetime, version: int) -> List[dict]:
+    """One event per task whose value changed between ``before`` and ``after``"""
+    return [
+        {"user_id": user_id, "day": day, "task": task, "completed": bool(new),
+         "occurred_at": occurred_at, "version": version}
+        for task, old, new in zip(TASKS, before, after) if bool(old) != bool(new)
+    ]
+
+class ProgressEventWriter:
+    """
+    In-process queue of progress events, inserted in batches by a background task.
+    Requests only append to the queue, so they never wait for the log write. Events
+    still queued when the process dies are lost; stop() writes the rest on shutdown.
+    """
+    def __init__(self):
+        self._queue: deque = deque()
+        self._task: Optional[asyncio.Task] = None
+        # One flush at a time, so events are inserted in the order they were queued
+        self._flush_lock = threading.Lock()
+
+    def enqueue(self, events: List[dict]):
+        """Called from request threads: never blocks and never touches the database"""
+        if not events or not settings.progress_event_log:
+            return
+        if len(self._queue) + len(events) > settings.progress_event_queue_size:
+            events_dropped.inc(len(events))
+            logger.warning("Progress event queue full, dropped %d events", len(events))
+            return
+        self._queue.extend(events)
+        events_queued.set(len(self._queue))
+
+    async def start(self):
+        if self._task is None and settings.progress_event_log:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Whatever the last requests queued
+        if self._queue:
+            await asyncio.get_running_loop().run_in_executor(None, self.flush)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(settings.progress_event_flush_interval_ms / 1000)
+            if self._queue:
+                await loop.run_in_executor(None, self.flush)
+
+    def flush(self) -> int:
+        """Insert everything queued, ``progress_event_batch_size`` events per transaction"""
+        from app.database import SessionLocal
+        written = 0
+        with self._flush_lock:
+            while self._queue:
+                batch = []
+                while self._queue and len(batch) < settings.progress_event_batch_size:
+                    batch.append(self._queue.popleft())
+                db = SessionLocal()
+                try:
+                    db.execute(insert(ProgressEvent), batch)
+                    db.commit()
+                except IntegrityError:
+                    db.rollback()
+                    # One bad row (e.g. its user was purged since) must not cost the whole batch
+                    inserted, unsent = self._insert_one_by_one(db, batch)
+                    written += inserted
+                    events_written.inc(inserted)
+                    if unsent:
+                        self._queue.extendleft(reversed(unsent))
+                        logger.error("Progress event flush failed, %d events kept in the queue", len(self._queue))
+                        break
+                    continue
+                except OperationalError:
+                    db.rollback()
+                    # Database unreachable: keep the batch for the next flush
+                    self._queue.extendleft(reversed(batch))
+                    logger.exception("Progress event flush failed, %d events kept in the queue", len(self._queue))
+                    break
+                except Exception:
+                    db.rollback()
+                    events_dropped.inc(len(batch))
+                    logger.exception("Progress event batch of %d events could not be inserted", len(batch))
+                    continue
+                finally:
+                    db.close()
+                written += len(batch)
+                events_written.inc(len(batch))
+            events_queued.set(len(self._queue))
+        return written
+
+    @staticmethod
+    def _insert_one_by_one(db: Session, batch: List[dict]) -> Tuple[int, List[dict]]:
+        """
+        Insert ``batch`` one event per transaction, dropping only the events that
+        violate a constraint. Returns the inserted count and, if the database became
+        unreachable, the events not attempted yet.
+        """
+        inserted = 0
+        for index, event in enumerate(batch):
+            try:
+                db.execute(insert(ProgressEvent), [event])
+                db.commit()
+                inserted += 1
+            except IntegrityError:
+                db.rollback()
+                events_dropped.inc()
+                logger.warning("Dropped progress event of user %s, day %s: integrity error", event["user_id"], event["day"])
+            except OperationalError:
+                db.rollback()
+                return inserted, batch[index:]
+        return inserted, []
+
+class ProgressEventService:
+    @staticmethod
+    def replay(db: Session, user_id: Optional[str] = None) -> Iterator[dict]:
+        """
+        user_progress rows rebuilt from the log, one per (user, day) that has events,
+        in user and day order. Events are applied in progress_version order, which
+        is the order of the updates even when several workers wrote the log. A day
+        is completed at the event that made all three tasks true.
+        """
+        query = db.query(
+            ProgressEvent.user_id, ProgressEvent.day, ProgressEvent.task, ProgressEvent.completed,
+            ProgressEvent.occurred_at, ProgressEvent.version
+        )
+        if user_id is not None:
+            query = query.filter(ProgressEvent.user_id == user_id)
+        events = query.order_by(
+            ProgressEvent.user_id, ProgressEvent.day, ProgressEvent.version, ProgressEvent.id
+        ).execution_options(stream_results=True, yield_per=REPLAY_BATCH_SIZE)
+
+        row = None
+        for event in events:
+            if row is None or row["user_id"] != event.user_id or row["day"] != event.day:
+                if row is not None:
+                    yield row
+                row = {"user_id": event.user_id, "day": event.day, **dict.fromkeys(PROGRESS_COLUMNS, False),
+                       "completed_at": None, "version": 0, "updated_at": None}
+            was_complete = all(row[column] for column in PROGRESS_COLUMNS)
+            row[f"{event.task}_completed"] = event.completed
+            if all(row[column] for column in PROGRESS_COLUMNS):
+                if not was_complete:
+                    row["completed_at"] = event.occurred_at
+            else:
+                row["completed_at"] = None
+            row["version"] = event.version
+            row["updated_at"] = event.occurred_at
+        if row is not None:
+            yield row
+
+    @staticmethod
+    def changed_rows(db: Session, rows: List[dict]) -> List[dict]:
+        """The replayed ``rows`` that are missing from user_progress or differ from it"""
+        current = {
+            (progress.user_id, progress.day): progress
+            for progress in db.query(
+                UserProgress.user_id, UserProgress.day, UserProgress.completed_at,
+                *[getattr(UserProgress, column) for column in PROGRESS_COLUMNS]
+            ).filter(UserProgress.user_id.in_({row["user_id"] for row in rows}))
+        }
+        changed = []
+        for row in rows:
+            existing = current.get((row["user_id"], row["day"]))
+            if existing is None or existing.completed_at != row["completed_at"] or any(
+                bool(getattr(existing, column)) != row[column] for column in PROGRESS_COLUMNS
+            ):
+                changed.append(row)
+        return changed
+
+    @staticmethod
+    def write_rows(db: Session, rows: List[dict]):
+        """
+        Upsert replayed rows into user_progress and commit. The users' progress_version
+        is bumped and given to the rows, so syncing clients pick up the repaired days,
+        and their counters are recomputed from the repaired progress.
+        """
+        if not rows:
+            return
+        versions: Dict[str, int] = dict(db.execute(
+            update(User).where(User.id.in_({row["user_id"] for row in rows})).values(
+                {User.progress_version: User.progress_version + 1}
+            ).returning(User.id, User.progress_version).execution_options(synchronize_session=False)
+        ).all())
+        values = [
+            {**row, "id": str(uuid.uuid4()), "version": versions[row["user_id"]]}
+            for row in rows if row["user_id"] in versions
+        ]
+        dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+        statement = dialect.insert(UserProgress).values(values)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=["user_id", "day"],
+            set_={column: statement.excluded[column]
+                  for column in PROGRESS_COLUMNS + ("completed_at", "version", "updated_at")}
+        ))
+        UserCounterService.refresh(db, versions)
+        db.commit()
+
+# Global progress event writer instance
+progress_event_writer = ProgressEventWriter()
@@ -0,0 +1,152 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+# Wheel geometry: 1s resolution, one hour per revolution; later deadlines wait extra rounds
+TICK_SECONDS = 1.0
+WHEEL_SLOTS = 3600
+
+# Idle SSE connections get a comment line this often so proxies keep them open
+HEARTBEAT_SECONDS = 25
+
+# Bounded per-connection buffer; a client this far behind just misses events
+MAX_QUEUED_EVENTS = 16
+
+class TimerWheel:
+    """
+    Hashed timing wheel: O(1) schedule and cancel, one pass per tick over a
+    single slot. Deadlines are absolute tick numbers, so entries more than one
+    revolution away simply stay in their slot until their tick comes up.
+    """
+    def __init__(self, slots: int = WHEEL_SLOTS, tick_seconds: float = TICK_SECONDS, start: Optional[float] = None):
+        self.slots: List[List[Tuple[int, str, int]]] = [[] for _ in range(slots)]
+        self.tick_seconds = tick_seconds
+        self.origin = time.time() if start is None else start
+        self.current_tick = 0
+        # key -> generation; bumping the generation cancels older entries lazily
+        self.generations: Dict[str, int] = {}
+        self.size = 0
+
+    def tick_for(self, deadline: float) -> int:
+        return max(int((deadline - self.origin) // self.tick_seconds) + 1, self.current_tick + 1)
+
+    def schedule(self, key: str, deadline: float):
+        """Schedule ``key`` to fire at epoch ``deadline``, replacing any earlier schedule"""
+        generation = self.generations.get(key, 0) + 1
+        self.generations[key] = generation
+        tick = self.tick_for(deadline)
+        self.slots[tick % len(self.slots)].append((tick, key, generation))
+        self.size += 1
+
+    def cancel(self, key: str):
+        self.generations.pop(key, None)
+
+    def advance(self, now: float) -> List[str]:
+        """Advance the wheel up to ``now`` and return the keys that are due"""
+        due = []
+        target = int((now - self.origin) // self.tick_seconds)
+        while self.current_tick < target:
+            self.current_tick += 1
+            slot_index = self.current_tick % len(self.slots)
+            slot = self.slots[slot_index]
+            if not slot:
+                continue
+            pending = []
+            for entry in slot:
+                tick, key, generation = entry
+                if self.generations.get(key) != generation:
+                    self.size -= 1  # cancelled or rescheduled
+                elif tick <= self.current_tick:
+                    del self.generations[key]
+                    self.size -= 1
+                    due.append(key)
+                else:
+                    pending.append(entry)
+            self.slots[slot_index] = pending
+        return due
+
+class UnlockNotifier:
+    """
+    Pushes a ``day_unlocked`` event to every open stream of a user when their
+    next day unlocks. All timers share one wheel and one ticker task.
+    """
+    def __init__(self):
+        self.wheel = TimerWheel()
+        self.subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        tick = self.wheel.tick_seconds
+        while True:
+            now = time.time()
+            # Sleep to the next tick boundary so wakeups don't drift
+            await asyncio.sleep(tick - ((now - self.wheel.origin) % tick))
+            for user_id in self.wheel.advance(time.time()):
+                self.publish(user_id, {"type": "day_unlocked"})
+
+    def subscribe(self, user_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=MAX_QUEUED_EVENTS)
+        self.subscribers.setdefault(user_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue):
+        queues = self.subscribers.get(user_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self.subscribers[user_id]
+            self.wheel.cancel(user_id)
+
+    def publish(self, user_id: str, event: dict):
+        for queue in self.subscribers.get(user_id, ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                pass
+
+    def schedule(self, user_id: str, unlock_at: datetime):
+        """Schedule the unlock event; safe to call from threadpool workers"""
+        if user_id not in self.subscribers or self.loop is None:
+            return  # nobody listening, the dashboard shows the timer instead
+        self._call_on_loop(self.wheel.schedule, user_id, unlock_at.timestamp())
+
+    def cancel(self, user_id: str):
+        """Drop a scheduled unlock event (the day is no longer complete); safe from threadpool workers"""
+        if user_id not in self.subscribers or self.loop is None:
+            return
+        self._call_on_loop(self.wheel.cancel, user_id)
+
+    def _call_on_loop(self, func, *args):
+        """The wheel is only touched from the notifier's loop"""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            func(*args)
+        else:
+            self.loop.call_soon_threadsafe(func, *args)
+
+    @property
+    def connection_count(self) -> int:
+        return sum(len(queues) for queues in self.subscribers.values())
+
+# Global unlock notifier instance
+unlock_notifier = UnlockNotifier()
@@ -0,0 +1,159 @@
+from sqlalchemy import case, or_, update
+from sqlalchemy.orm import Session
+from app.models.content import UserProgress
+from app.models.user import User
+from app.utils.gating import local_date
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+COUNTER_COLUMNS = ("tasks_completed", "days_completed", "current_streak", "longest_streak", "last_completed_on")
+
+# Users recomputed per query (and per transaction when repairing)
+VERIFY_CHUNK_SIZE = 1000
+
+ONE_DAY = timedelta(days=1)
+
+def streaks(dates: Iterable[date], today: date) -> Tuple[int, int, Optional[date]]:
+    """
+    ``(current_streak, longest_streak, last_date)`` over the local dates on which a
+    day was completed. The current streak is still alive if its last date is today
+    or yesterday.
+    """
+    ordered = sorted(set(dates))
+    if not ordered:
+        return 0, 0, None
+    longest = run = 1
+    for previous, current in zip(ordered, ordered[1:]):
+        run = run + 1 if current - previous == ONE_DAY else 1
+        longest = max(longest, run)
+    last = ordered[-1]
+    return (run if last >= today - ONE_DAY else 0), longest, last
+
+class UserCounterService:
+    @staticmethod
+    def progress_changes(db: Session, user: User, day: int, before: Sequence[bool], after: Sequence[bool],
+                         was_completed_at: Optional[datetime], completed_at: Optional[datetime],
+                         now: datetime) -> dict:
+        """
+        Values for the UPDATE of the user row that keep the counters in step with one
+        progress change, as SQL expressions on the current values so concurrent
+        requests can't lose an increment. Only a completion that goes away costs a
+        query (the streaks are recomputed from the user's other completed days).
+        """
+        changes = {}
+        task_delta = sum(map(bool, after)) - sum(map(bool, before))
+        if task_delta:
+            changes[User.tasks_completed] = User.tasks_completed + task_delta
+        if was_completed_at == completed_at:
+            return changes
+
+        changes[User.days_completed] = User.days_completed + (completed_at is not None) - (was_completed_at is not None)
+        if was_completed_at is None:
+            # New completion: same date keeps the streak, the day after the last one extends it
+            on = local_date(completed_at, user.timezone)
+            streak = case(
+                (User.last_completed_on == on, User.current_streak),
+                (User.last_completed_on == on - ONE_DAY, User.current_streak + 1),
+                else_=1
+            )
+            changes[User.current_streak] = streak
+            changes[User.longest_streak] = case((streak > User.longest_streak, streak), else_=User.longest_streak)
+            changes[User.last_completed_on] = on
+        else:
+            dates = [local_date(row.completed_at, user.timezone) for row in db.query(UserProgress.completed_at).filter(
+                UserProgress.user_id == user.id,
+                UserProgress.day != day,
+                UserProgress.completed_at.isnot(None)
+            )]
+            if completed_at is not None:
+                dates.append(local_date(completed_at, user.timezone))
+            current, longest, last = streaks(dates, local_date(now, user.timezone))
+            changes.update({User.current_streak: current, User.longest_streak: longest, User.last_completed_on: last})
+        return changes
+
+    @staticmethod
+    def current_streak(user: User, now: Optional[datetime] = None) -> int:
+        """The stored streak, or 0 if it lapsed since the last midnight reset"""
+        if user.last_completed_on is None:
+            return 0
+        today = local_date(now or datetime.utcnow(), user.timezone)
+        return user.current_streak if user.last_completed_on >= today - ONE_DAY else 0
+
+    @staticmethod
+    def reset_lapsed_streaks(db: Session, tz_name: str, boundary: datetime) -> int:
+        """
+        At the midnight ``boundary`` of ``tz_name``, zero the streaks of users of that
+        zone who completed nothing yesterday. One UPDATE; running it again is a no-op.
+        """
+        today = local_date(boundary, tz_name)
+        reset = db.query(User).filter(
+            User.timezone == tz_name,
+            User.current_streak > 0,
+            or_(User.last_completed_on.is_(None), User.last_completed_on < today - ONE_DAY)
+        ).update({User.current_streak: 0}, synchronize_session=False)
+        db.commit()
+        return reset
+
+    @staticmethod
+    def compute(db: Session, users: Sequence[Tuple[str, Optional[str]]], now: Optional[datetime] = None) -> Dict[str, dict]:
+        """Counters of ``users`` (``(id, timezone)`` pairs) recomputed from user_progress with one query"""
+        now = now or datetime.utcnow()
+        timezones = dict(users)
+        tasks = dict.fromkeys(timezones, 0)
+        dates: Dict[str, List[date]] = {user_id: [] for user_id in timezones}
+        for row in db.query(
+            UserProgress.user_id, UserProgress.meditation_completed, UserProgress.video_completed,
+            UserProgress.rosary_completed, UserProgress.completed_at
+        ).filter(UserProgress.user_id.in_(list(timezones))):
+            tasks[row.user_id] += bool(row.meditation_completed) + bool(row.video_completed) + bool(row.rosary_completed)
+            if row.completed_at is not None:
+                dates[row.user_id].append(local_date(row.completed_at, timezones[row.user_id]))
+
+        counters = {}
+        for user_id, tz_name in timezones.items():
+            current, longest, last = streaks(dates[user_id], local_date(now, tz_name))
+            counters[user_id] = {
+                "tasks_completed": tasks[user_id],
+                "days_completed": len(dates[user_id]),
+                "current_streak": current,
+                "longest_streak": longest,
+                "last_completed_on": last,
+            }
+        return counters
+
+    @staticmethod
+    def refresh(db: Session, user_ids: Iterable[str]):
+        """Recompute and store the counters of ``user_ids``; the caller commits"""
+        users = db.query(User.id, User.timezone).filter(User.id.in_(list(user_ids))).all()
+        if users:
+            counters = UserCounterService.compute(db, users)
+            db.execute(update(User), [{"id": user_id, **values} for user_id, values in counters.items()])
+
+    @staticmethod
+    def verify(db: Session, repair: bool = False, chunk_size: int = VERIFY_CHUNK_SIZE) -> Iterator[Tuple[str, dict, dict]]:
+        """
+        Walk all users in primary-key order, ``chunk_size`` per query, and yield
+        ``(user_id, stored, expected)`` for every user whose counters drifted. With
+        ``repair`` each chunk's drifted users are rewritten in its own transaction.
+        """
+        columns = [getattr(User, name) for name in COUNTER_COLUMNS]
+        last_id = ""
+        while True:
+            rows = db.query(User.id, User.timezone, *columns).filter(User.id > last_id).order_by(User.id).limit(chunk_size).all()
+            if not rows:
+                break
+            expected = UserCounterService.compute(db, [(row.id, row.timezone) for row in rows])
+            drifted = []
+            for row in rows:
+                stored = {name: getattr(row, name) for name in COUNTER_COLUMNS}
+                if stored != expected[row.id]:
+                    drifted.append({"id": row.id, **expected[row.id]})
+                    yield row.id, stored, expected[row.id]
+            if repair and drifted:
+                db.execute(update(User), drifted)
+                db.commit()
+                logger.info("Repaired the progress counters of %d users", len(drifted))
+            last_id = rows[-1].id
@@ -0,0 +1,146 @@
+from sqlalchemy import text
+from app.config import settings
+from app.database import engine, Base, SessionLocal
+from typing import Dict, Optional
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Phase name -> milliseconds of the last startup, exposed on /health/startup
+startup_timings: Dict[str, float] = {}
+
+# Set by serve.py once the parent process has run the startup; forked workers
+# inherit the warmed caches and only need connections of their own
+preloaded = False
+
+def load_initial_data(db) -> int:
+    """Load daily content from the JSON file if the table is empty"""
+    from app.models.content import DailyContent
+
+    if db.query(DailyContent.id).first():
+        return 0
+
+    json_file_path = os.path.join(PROJECT_ROOT, "data", "daily_content.json")
+    if not os.path.exists(json_file_path):
+        return 0
+
+    with open(json_file_path, 'r', encoding='utf-8') as file:
+        content_data = json.load(file)
+
+    for day_data in content_data:
+        db.add(DailyContent(**day_data))
+    db.commit()
+    print(f"✅ Loaded {len(content_data)} days of content into database")
+    return len(content_data)
+
+def expected_alembic_head() -> Optional[str]:
+    """Head revision of the migration scripts shipped with this build"""
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config(os.path.join(PROJECT_ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(PROJECT_ROOT, "alembic"))
+    return ScriptDirectory.from_config(config).get_current_head()
+
+def check_alembic_head(db) -> bool:
+    """Compare the database revision with the expected head once; warn on mismatch"""
+    try:
+        current = db.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except Exception:
+        db.rollback()
+        current = None
+
+    head = expected_alembic_head()
+    if current != head:
+        logger.warning("Database revision %s does not match migration head %s; run `alembic upgrade head`", current, head)
+        print(f"⚠️  Database revision {current} does not match migration head {head}")
+        return False
+    return True
+
+def warm_caches(db):
+    """Fill the in-process caches so the first requests don't pay for them"""
+    from app.services.content_cache import content_cache
+    from app.utils.gating import default_boundaries
+    from app.utils.security import create_access_token, verify_token
+
+    content_cache.invalidate()
+    content_cache.get(db)
+    default_boundaries()
+    # First JWT encode/decode imports and initializes the jose backends
+    verify_token(create_access_token(data={"sub": "warmup"}))
+
+def warm_pool(connections: Optional[int] = None) -> int:
+    """Open ``connections`` pooled connections up front (defaults to the pool size)"""
+    size = connections or getattr(engine.pool, "size", lambda: 1)()
+    opened = []
+    try:
+        for _ in range(size):
+            opened.append(engine.connect())
+    finally:
+        for connection in opened:
+            connection.close()
+    return len(opened)
+
+def run_worker_startup() -> Dict[str, float]:
+    """Startup of a worker forked from a preloaded parent: caches are inherited, only the pool is new"""
+    started = time.perf_counter()
+    warm_pool()
+    startup_timings["worker_pool"] = round((time.perf_counter() - started) * 1000, 2)
+    return startup_timings
+
+def run_startup(fast_start: Optional[bool] = None) -> Dict[str, float]:
+    """
+    Prepare the database and caches, recording how long each phase took.
+
+    Fast start (FAST_START=true, used after `alembic upgrade head` in start.sh)
+    skips create_all and only checks the Alembic head revision; otherwise tables
+    are created for local SQLite development as before.
+    """
+    fast_start = settings.fast_start if fast_start is None else fast_start
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+
+    def mark(phase: str, since: float) -> float:
+        now = time.perf_counter()
+        timings[phase] = round((now - since) * 1000, 2)
+        return now
+
+    phase_start = started
+    db = SessionLocal()
+    try:
+        # Opening the first connection also warms the pool
+        db.execute(text("SELECT 1"))
+        phase_start = mark("db_connect", phase_start)
+
+        if fast_start:
+            check_alembic_head(db)
+            phase_start = mark("alembic_check", phase_start)
+        else:
+            Base.metadata.create_all(bind=engine)
+            phase_start = mark("create_all", phase_start)
+
+        try:
+            load_initial_data(db)
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️  Could not load initial data: {e}")
+        phase_start = mark("initial_data", phase_start)
+
+        try:
+            warm_caches(db)
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️  Could not warm caches: {e}")
+        phase_start = mark("warm_caches", phase_start)
+    finally:
+        db.close()
+
+    timings["total"] = round((time.perf_counter() - started) * 1000, 2)
+    startup_timings.clear()
+    startup_timings.update(timings)
+    return timings
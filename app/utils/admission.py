@@ -0,0 +1,182 @@
+"""
+Admission control: track how loaded this process is and answer low-priority
+reads with a fast 503 while it is saturated, so that progress updates, logins
+and the dashboard keep getting the threads and connections.
+"""
+from sqlalchemy.pool import QueuePool
+from app.config import settings
+from typing import Optional
+import math
+import time
+import anyio.to_thread
+import orjson
+
+# Reads whose data the client already has or can retry later
+LOW_PRIORITY_ROUTES = (
+    ("GET", settings.api_v1_str + "/content/"),
+    ("GET", settings.api_v1_str + "/users/profile"),
+)
+
+# Never shed or counted: probes and long-lived event streams
+EXEMPT_PATHS = frozenset({
+    "/health", "/health/startup", "/health/timings", "/ready", "/metrics", settings.api_v1_str + "/users/events"
+})
+
+# Latency samples lose half their weight every this many seconds, so the state
+# recovers even when only shed requests arrive
+DECAY_HALF_LIFE_SECONDS = 5.0
+EWMA_ALPHA = 0.2
+
+# The saturation check is cached this long; it reads the threadpool statistics
+EVALUATE_INTERVAL_SECONDS = 0.1
+
+MAX_RETRY_AFTER_SECONDS = 30
+
+class DecayingAverage:
+    """Exponentially weighted moving average that decays toward zero while idle"""
+    def __init__(self):
+        self.value = 0.0
+        self.updated_at = time.monotonic()
+
+    def current(self, now: Optional[float] = None) -> float:
+        now = now or time.monotonic()
+        return self.value * 0.5 ** ((now - self.updated_at) / DECAY_HALF_LIFE_SECONDS)
+
+    def add(self, sample: float):
+        now = time.monotonic()
+        self.value = self.current(now) + EWMA_ALPHA * (sample - self.current(now))
+        self.updated_at = now
+
+class AdmissionController:
+    def __init__(self):
+        self.in_flight = 0
+        self.latency = DecayingAverage()
+        self.pool_wait = DecayingAverage()
+        self.shed_count = 0
+        self._reason: Optional[str] = None
+        self._evaluated_at = 0.0
+
+    def record_latency(self, seconds: float):
+        self.latency.add(seconds)
+
+    def record_pool_wait(self, seconds: float):
+        self.pool_wait.add(seconds)
+
+    def threadpool_statistics(self):
+        """Default anyio limiter used by sync routes and dependencies (needs a running loop)"""
+        try:
+            return anyio.to_thread.current_default_thread_limiter().statistics()
+        except RuntimeError:
+            return None
+
+    def saturation_reason(self) -> Optional[str]:
+        """Name of the first breached target, or None while within targets"""
+        now = time.monotonic()
+        if now - self._evaluated_at < EVALUATE_INTERVAL_SECONDS:
+            return self._reason
+
+        reason = None
+        stats = self.threadpool_statistics()
+        if self.in_flight > settings.admission_max_in_flight:
+            reason = "in_flight"
+        elif stats is not None and stats.tasks_waiting > settings.admission_max_threadpool_queue:
+            reason = "threadpool_queue"
+        elif self.pool_wait.current(now) * 1000 > settings.admission_pool_wait_target_ms:
+            reason = "pool_wait"
+        elif self.latency.current(now) * 1000 > settings.admission_latency_target_ms:
+            reason = "latency"
+
+        self._reason = reason
+        self._evaluated_at = now
+        return reason
+
+    def retry_after(self) -> int:
+        """Roughly how long the current backlog takes to drain"""
+        backlog = max(self.latency.current(), self.pool_wait.current())
+        return min(max(math.ceil(backlog), 1), MAX_RETRY_AFTER_SECONDS)
+
+    def snapshot(self) -> dict:
+        stats = self.threadpool_statistics()
+        return {
+            "in_flight": self.in_flight,
+            "threadpool_busy": stats.borrowed_tokens if stats else None,
+            "threadpool_waiting": stats.tasks_waiting if stats else None,
+            "latency_ms": round(self.latency.current() * 1000, 1),
+            "pool_wait_ms": round(self.pool_wait.current() * 1000, 1),
+            "shed": self.shed_count,
+        }
+
+# Global admission controller instance
+admission_controller = AdmissionController()
+
+def is_low_priority(method: str, path: str) -> bool:
+    for route_method, prefix in LOW_PRIORITY_ROUTES:
+        if method == route_method and path.startswith(prefix):
+            return True
+    return False
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited for a connection"""
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            admission_controller.record_pool_wait(time.perf_counter() - start)
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware: counts in-flight requests, samples latency and sheds low-priority reads"""
+    def __init__(self, app, controller: AdmissionController = admission_controller):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        controller = self.controller
+        if is_low_priority(scope["method"], scope["path"]) and controller.saturation_reason():
+            controller.shed_count += 1
+            await self.reject(send, controller.retry_after())
+            return
+
+        controller.in_flight += 1
+        start = time.perf_counter()
+        finished = False
+
+        def finish():
+            nonlocal finished
+            finished = True
+            controller.in_flight -= 1
+            controller.record_latency(time.perf_counter() - start)
+
+        async def send_and_record(message):
+            # The request stops counting when the response starts: a streamed body (an
+            # export download) lasts as long as the client reads and says nothing about load
+            if message["type"] == "http.response.start" and not finished:
+                finish()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_record)
+        finally:
+            if not finished:
+                finish()
+
+    @staticmethod
+    async def reject(send, retry_after: int):
+        body = orjson.dumps({"detail": {
+            "message": "El servidor está ocupado. Por favor, intenta de nuevo en unos segundos.",
+            "retry_after": retry_after
+        }})
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
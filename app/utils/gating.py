@@ -0,0 +1,167 @@
+"""
+Day gating rules shared by the dashboard, the event stream and the batch jobs.
+Times are integer UTC epochs and local midnights come from a precomputed table,
+so gating a user is a few integer comparisons with no tz conversion.
+"""
+from bisect import bisect_right
+from calendar import timegm
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+import time
+import pytz
+from app.utils.metrics import cache_requests
+
+LAST_DAY = 33
+UNLOCK_TZ_NAME = 'America/Lima'
+SECONDS_PER_DAY = 86400
+
+# Boundaries cover this many days around "now"; completions older than that are
+# always unlocked and newer ones are impossible. Tables are rebuilt daily.
+BOUNDARY_WINDOW_DAYS = 60
+
+def to_epoch(value: datetime) -> int:
+    """Naive-UTC or aware datetime to integer epoch seconds"""
+    if value.tzinfo is not None:
+        value = value.astimezone(pytz.UTC)
+    return timegm(value.utctimetuple())
+
+def from_epoch(epoch: int) -> datetime:
+    return datetime.fromtimestamp(epoch, pytz.UTC)
+
+class MidnightBoundaries:
+    """Sorted UTC epochs of every local midnight of one time zone over a window"""
+    def __init__(self, tz_name: str = UNLOCK_TZ_NAME, around: Optional[datetime] = None,
+                 window_days: int = BOUNDARY_WINDOW_DAYS):
+        tz = pytz.timezone(tz_name)
+        around = (around or datetime.now(pytz.UTC)).astimezone(tz)
+        first = datetime(around.year, around.month, around.day) - timedelta(days=window_days)
+        self.tz_name = tz_name
+        self.epochs: List[int] = [
+            to_epoch(tz.localize(first + timedelta(days=i)))
+            for i in range(2 * window_days + 1)
+        ]
+        # Zones without DST inside the window (e.g. Lima) reduce to modular arithmetic
+        steps = {b - a for a, b in zip(self.epochs, self.epochs[1:])}
+        self.fixed_offset: Optional[int] = (
+            self.epochs[0] % SECONDS_PER_DAY if steps == {SECONDS_PER_DAY} else None
+        )
+
+    @property
+    def first(self) -> int:
+        return self.epochs[0]
+
+    @property
+    def last(self) -> int:
+        return self.epochs[-1]
+
+    def next_after(self, epoch: int) -> int:
+        """First local midnight strictly after ``epoch``"""
+        if self.fixed_offset is not None:
+            return epoch - (epoch - self.fixed_offset) % SECONDS_PER_DAY + SECONDS_PER_DAY
+        i = bisect_right(self.epochs, epoch)
+        if i == len(self.epochs):
+            return self.epochs[-1] + SECONDS_PER_DAY
+        return self.epochs[i]
+
+    def latest_at_or_before(self, epoch: int) -> int:
+        """Most recent local midnight at or before ``epoch``"""
+        if self.fixed_offset is not None:
+            return epoch - (epoch - self.fixed_offset) % SECONDS_PER_DAY
+        i = bisect_right(self.epochs, epoch)
+        return self.epochs[i - 1] if i else self.epochs[0] - SECONDS_PER_DAY
+
+CACHE_HITS = cache_requests.labels("boundaries", "hit")
+CACHE_MISSES = cache_requests.labels("boundaries", "miss")
+
+class BoundaryCache:
+    """MidnightBoundaries per time zone, built once per zone per UTC day"""
+    def __init__(self):
+        self._tables: Dict[str, Tuple[int, MidnightBoundaries]] = {}
+
+    def get(self, tz_name: Optional[str]) -> MidnightBoundaries:
+        tz_name = tz_name or UNLOCK_TZ_NAME
+        today = int(time.time()) // SECONDS_PER_DAY
+        cached = self._tables.get(tz_name)
+        if cached is not None and cached[0] == today:
+            CACHE_HITS.inc()
+            return cached[1]
+        CACHE_MISSES.inc()
+        boundaries = MidnightBoundaries(tz_name)
+        self._tables[tz_name] = (today, boundaries)
+        return boundaries
+
+    def zones(self) -> List[str]:
+        return list(self._tables)
+
+# Global boundary cache instance
+boundary_cache = BoundaryCache()
+
+def boundaries_for(tz_name: Optional[str]) -> MidnightBoundaries:
+    """Cached midnight boundaries of ``tz_name`` (Lima when unset)"""
+    return boundary_cache.get(tz_name)
+
+def default_boundaries() -> MidnightBoundaries:
+    return boundary_cache.get(UNLOCK_TZ_NAME)
+
+def local_date(value: datetime, tz_name: Optional[str]) -> date:
+    """Calendar date of a naive-UTC or aware datetime in ``tz_name`` (Lima when unset)"""
+    if value.tzinfo is None:
+        value = pytz.UTC.localize(value)
+    return value.astimezone(pytz.timezone(tz_name or UNLOCK_TZ_NAME)).date()
+
+def is_valid_timezone(tz_name: str) -> bool:
+    return tz_name in pytz.all_timezones_set
+
+def gate(current_day: int, completed_epoch: Optional[int], libre_mode: bool, now_epoch: int,
+         debug_mode: bool = False, boundaries: Optional[MidnightBoundaries] = None) -> Tuple[int, Optional[int]]:
+    """
+    Gate one user. ``completed_epoch`` is when the current day was fully completed
+    (None/0 if it isn't). Returns ``(available_day, next_available_epoch)``,
+    the latter None unless a timer is running.
+    """
+    if not completed_epoch or current_day >= LAST_DAY:
+        return current_day, None
+    if debug_mode or libre_mode:
+        return current_day + 1, None
+    unlock = (boundaries or default_boundaries()).next_after(completed_epoch)
+    if now_epoch >= unlock:
+        return current_day + 1, None
+    return current_day, unlock
+
+def gate_many(current_days: Sequence[int], completed_epochs: Sequence[int], libre_modes: Sequence[bool],
+              now_epoch: int, debug_mode: bool = False,
+              boundaries: Optional[MidnightBoundaries] = None) -> Tuple[List[int], List[int]]:
+    """
+    Gate many users at once. Inputs are parallel sequences (lists or ``array('q')``),
+    with 0 in ``completed_epochs`` meaning "current day not completed". Returns
+    ``(available_days, next_available_epochs)`` where 0 means no timer.
+    """
+    boundaries = boundaries or default_boundaries()
+    count = len(current_days)
+    available = list(current_days)
+    next_times = [0] * count
+    if debug_mode:
+        for i in range(count):
+            if completed_epochs[i] and current_days[i] < LAST_DAY:
+                available[i] = current_days[i] + 1
+        return available, next_times
+
+    offset = boundaries.fixed_offset
+    next_after = boundaries.next_after
+    for i in range(count):
+        completed = completed_epochs[i]
+        day = current_days[i]
+        if not completed or day >= LAST_DAY:
+            continue
+        if libre_modes[i]:
+            available[i] = day + 1
+            continue
+        if offset is not None:
+            unlock = completed - (completed - offset) % SECONDS_PER_DAY + SECONDS_PER_DAY
+        else:
+            unlock = next_after(completed)
+        if now_epoch >= unlock:
+            available[i] = day + 1
+        else:
+            next_times[i] = unlock
+    return available, next_times
@@ -0,0 +1,321 @@
+"""
+Dependency-free metrics in the Prometheus text format.
+
+Metrics live in plain dicts keyed by label values; hot paths bind their labels
+once (``.labels(...)``) so recording is a lock plus an addition. With several
+workers (serve.py) each process periodically writes its values to
+``METRICS_DIR/<pid>.json`` and ``/metrics`` merges every file: counters and
+histograms are summed over all workers, including ones that have exited,
+while gauges only count live workers.
+"""
+from bisect import bisect_left
+from app.utils.admission import EXEMPT_PATHS, admission_controller
+from app.utils.request_context import current_request
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import json
+import os
+import threading
+import time
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+# How often each worker writes its snapshot for the others to merge
+FLUSH_INTERVAL_SECONDS = 5
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Tuple[str, ...], object] = {}
+        self.lock = threading.Lock()
+
+    def labels(self, *labelvalues) -> "_Child":
+        return _Child(self, tuple(str(value) for value in labelvalues))
+
+    def samples(self) -> List[Tuple[Tuple[str, ...], object]]:
+        with self.lock:
+            return [(key, list(value) if isinstance(value, list) else value) for key, value in self.values.items()]
+
+class _Child:
+    """A metric with its label values bound"""
+    __slots__ = ("metric", "key")
+
+    def __init__(self, metric: _Metric, key: Tuple[str, ...]):
+        self.metric = metric
+        self.key = key
+
+    def inc(self, amount: float = 1):
+        self.metric.inc_key(self.key, amount)
+
+    def dec(self, amount: float = 1):
+        self.metric.inc_key(self.key, -amount)
+
+    def set(self, value: float):
+        self.metric.set_key(self.key, value)
+
+    def observe(self, value: float):
+        self.metric.observe_key(self.key, value)
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc_key(self, key: Tuple[str, ...], amount: float = 1):
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def inc(self, amount: float = 1):
+        self.inc_key((), amount)
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set_key(self, key: Tuple[str, ...], value: float):
+        with self.lock:
+            self.values[key] = value
+
+    def set(self, value: float):
+        self.set_key((), value)
+
+    def dec(self, amount: float = 1):
+        self.inc_key((), -amount)
+
+class Histogram(_Metric):
+    """Values are ``[count per bucket..., +Inf count, sum]`` (non-cumulative until rendered)"""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe_key(self, key: Tuple[str, ...], value: float):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.values.get(key)
+            if series is None:
+                series = self.values[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def observe(self, value: float):
+        self.observe_key((), value)
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+        self.collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def reset(self):
+        """Forget all recorded values (forked workers must not re-report the parent's)"""
+        for metric in self.metrics.values():
+            with metric.lock:
+                metric.values.clear()
+
+    def add_collector(self, collect: Callable[[], None]):
+        """``collect`` refreshes gauges right before a snapshot is taken"""
+        self.collectors.append(collect)
+
+    def snapshot(self) -> dict:
+        for collect in self.collectors:
+            try:
+                collect()
+            except Exception:
+                pass
+        return {
+            name: {
+                "type": metric.kind,
+                "help": metric.help,
+                "labels": list(metric.labelnames),
+                "buckets": list(getattr(metric, "buckets", ())),
+                "samples": [[list(key), value] for key, value in metric.samples()],
+            }
+            for name, metric in self.metrics.items()
+        }
+
+    # Multi-worker files
+
+    def flush(self, directory: str):
+        """Write this process's snapshot atomically to ``directory/<pid>.json``"""
+        path = os.path.join(directory, f"{os.getpid()}.json")
+        temporary = path + ".tmp"
+        with open(temporary, "w") as file:
+            json.dump({"pid": os.getpid(), "written_at": time.time(), "metrics": self.snapshot()}, file)
+        os.replace(temporary, path)
+
+    def collect_all(self, directory: Optional[str]) -> Dict[str, dict]:
+        """This process's snapshot merged with every other worker's file"""
+        merged = self.snapshot()
+        if not directory or not os.path.isdir(directory):
+            return merged
+
+        own = {name: {tuple(key): value for key, value in data["samples"]} for name, data in merged.items()}
+        for filename in os.listdir(directory):
+            if not filename.endswith(".json") or filename == f"{os.getpid()}.json":
+                continue
+            try:
+                with open(os.path.join(directory, filename)) as file:
+                    other = json.load(file)
+            except (OSError, ValueError):
+                continue
+            alive = _pid_alive(other.get("pid", 0))
+            for name, data in other.get("metrics", {}).items():
+                if name not in own or (data["type"] == "gauge" and not alive):
+                    continue
+                series = own[name]
+                for key, value in data["samples"]:
+                    key = tuple(key)
+                    current = series.get(key)
+                    if isinstance(value, list):
+                        series[key] = [a + b for a, b in zip(current, value)] if current else value
+                    else:
+                        series[key] = (current or 0) + value
+
+        for name, data in merged.items():
+            data["samples"] = [[list(key), value] for key, value in own[name].items()]
+        return merged
+
+    def render(self, directory: Optional[str] = None) -> str:
+        lines = []
+        for name, data in self.collect_all(directory).items():
+            lines.append(f"# HELP {name} {data['help']}")
+            lines.append(f"# TYPE {name} {data['type']}")
+            labelnames = data["labels"]
+            for key, value in sorted(data["samples"], key=lambda sample: sample[0]):
+                pairs = [f'{label}="{_escape(str(v))}"' for label, v in zip(labelnames, key)]
+                if data["type"] != "histogram":
+                    lines.append(f"{name}{_labels(pairs)} {_number(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(list(data["buckets"]) + ["+Inf"], value[:-1]):
+                    cumulative += count
+                    le = 'le="%s"' % (bound if bound == "+Inf" else _number(bound))
+                    lines.append(f"{name}_bucket{_labels(pairs + [le])} {cumulative}")
+                lines.append(f"{name}_sum{_labels(pairs)} {_number(value[-1])}")
+                lines.append(f"{name}_count{_labels(pairs)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+def _labels(pairs: List[str]) -> str:
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return pid > 0
+
+# Global metrics registry and the application's metrics
+metrics = MetricsRegistry()
+
+http_requests = metrics.counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+http_request_duration = metrics.histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+db_queries_per_request = metrics.histogram(
+    "db_queries_per_request", "SQL statements executed per request", ("route",), buckets=QUERY_COUNT_BUCKETS
+)
+db_pool_connections = metrics.gauge("db_pool_connections", "Database pool connections by state", ("state",))
+rate_limit_rejections = metrics.counter("rate_limit_rejections_total", "Requests rejected by each rate limiter", ("limiter",))
+cache_requests = metrics.counter("cache_requests_total", "In-process cache lookups", ("cache", "result"))
+password_hash_in_flight = metrics.gauge("password_hash_in_flight", "bcrypt hashes/verifications running or waiting for CPU")
+admission_shed = metrics.gauge("admission_shed_requests", "Low-priority requests shed by admission control since start")
+
+metrics.add_collector(lambda: admission_shed.set(admission_controller.shed_count))
+
+class MetricsFlusher:
+    """Writes this worker's snapshot to the shared metrics directory every few seconds"""
+    def __init__(self):
+        self.directory: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, directory: Optional[str]):
+        self.directory = directory
+        if directory and self._task is None:
+            os.makedirs(directory, exist_ok=True)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            # Final values, so counters of a stopped worker keep counting in the totals
+            metrics.flush(self.directory)
+
+    async def _run(self):
+        while True:
+            metrics.flush(self.directory)
+            await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+
+# Global metrics flusher instance
+metrics_flusher = MetricsFlusher()
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request count, latency and query count per route template"""
+    def __init__(self, app):
+        self.app = app
+        self._children: Dict[tuple, tuple] = {}
+
+    async def __call__(self, scope, receive, send):
+        # Probes and event streams would only skew the latency histograms
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_holder = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            if route is not None:
+                self.record(scope["method"], route.path, status_holder[0], time.perf_counter() - start,
+                            current_request.get())
+
+    def record(self, method: str, route: str, status: int, seconds: float, context):
+        children = self._children.get((method, route, status))
+        if children is None:
+            children = self._children[(method, route, status)] = (
+                http_requests.labels(method, route, status),
+                http_request_duration.labels(method, route),
+                db_queries_per_request.labels(route),
+            )
+        children[0].inc()
+        children[1].observe(seconds)
+        if context is not None:
+            children[2].observe(context.db_count)
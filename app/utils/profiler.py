@@ -0,0 +1,325 @@
+"""
+On-demand profiling of single requests in production.
+
+A request is profiled when it carries a valid ``X-Debug-Profile`` header
+(``<expires epoch>.<HMAC-SHA256 of the expiry with SECRET_KEY>``, see
+scripts/profile_header.py) or comes from a user an admin enabled through
+/api/v1/admin/profiling. While it runs, a sampler thread records the stacks of
+every thread that is executing application code, and the result is written in
+folded-stack format (flamegraph.pl, speedscope) with a JSON sidecar to a ring of
+at most PROFILE_RING_SIZE profiles in PROFILE_DIR.
+
+Off unless PROFILING_ENABLED=true. When on, requests that trigger nothing pay
+one header scan and one in-memory flag check: a background task picks up the
+admin toggles of the other workers, never the request path.
+"""
+from app.config import settings
+from app.utils.admission import admission_controller
+from app.utils.security import verify_token
+from typing import Dict, List, Optional
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+
+PROFILE_HEADER = b"x-debug-profile"
+
+# Signed headers may not be valid for longer than this
+MAX_SIGNATURE_TTL_SECONDS = 3600
+
+# Profiled requests running at once; further ones run unprofiled
+MAX_CONCURRENT_PROFILES = 2
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_ROOT = os.path.dirname(APP_ROOT)
+
+PROFILE_NAME_PATTERN = re.compile(r"^[\w.-]+$")
+
+# Admin toggles are shared with the other workers through this file
+TARGETS_FILE = "targets.json"
+TARGETS_RELOAD_SECONDS = 1.0
+
+def sign_profile_request(expires: int) -> str:
+    """Header value that enables profiling until ``expires`` (epoch seconds)"""
+    signature = hmac.new(settings.secret_key.encode(), str(expires).encode(), hashlib.sha256).hexdigest()
+    return f"{expires}.{signature}"
+
+def verify_profile_signature(value: str, now: Optional[float] = None) -> bool:
+    expires, _, signature = value.partition(".")
+    if not expires.isdigit():
+        return False
+    now = now or time.time()
+    if not now < int(expires) <= now + MAX_SIGNATURE_TTL_SECONDS:
+        return False
+    return hmac.compare_digest(sign_profile_request(int(expires)), value)
+
+class SamplingProfiler:
+    """Samples the stacks of threads running application code every ``interval`` seconds"""
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.counts: Dict[str, int] = {}
+        self.labels: Dict[object, str] = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Dict[str, int]:
+        self._stop.set()
+        self._thread.join()
+        return self.counts
+
+    def label(self, code) -> str:
+        """``function (path:line)``, project files relative to the repository root"""
+        label = self.labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            if filename.startswith(PROJECT_ROOT):
+                filename = os.path.relpath(filename, PROJECT_ROOT)
+            else:
+                filename = os.path.basename(filename)
+            label = self.labels[code] = f"{code.co_name} ({filename}:{code.co_firstlineno})"
+        return label
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                in_app = False
+                while frame is not None:
+                    code = frame.f_code
+                    if code.co_filename.startswith(APP_ROOT):
+                        in_app = True
+                    stack.append(self.label(code))
+                    frame = frame.f_back
+                if not in_app:
+                    continue  # idle threadpool workers, other background threads
+                folded = ";".join(reversed(stack))
+                self.counts[folded] = self.counts.get(folded, 0) + 1
+                self.samples += 1
+
+class ProfileStore:
+    """Bounded on-disk ring of profiles: ``<name>.folded`` plus ``<name>.json``"""
+    def __init__(self, directory: str, max_profiles: int):
+        self.directory = directory
+        self.max_profiles = max_profiles
+
+    def save(self, name: str, counts: Dict[str, int], meta: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, f"{name}.folded"), "w") as file:
+            for stack, count in sorted(counts.items()):
+                file.write(f"{stack} {count}\n")
+        with open(os.path.join(self.directory, f"{name}.json"), "w") as file:
+            json.dump(meta, file)
+        self.prune()
+
+    def prune(self):
+        names = self.names()
+        for name in names[:-self.max_profiles] if len(names) > self.max_profiles else []:
+            for suffix in (".folded", ".json"):
+                try:
+                    os.remove(os.path.join(self.directory, name + suffix))
+                except FileNotFoundError:
+                    pass
+
+    def names(self) -> List[str]:
+        """Stored profile names, oldest first (names start with a timestamp)"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(f[:-len(".folded")] for f in os.listdir(self.directory) if f.endswith(".folded"))
+
+    def list(self) -> List[dict]:
+        profiles = []
+        for name in reversed(self.names()):
+            try:
+                with open(os.path.join(self.directory, f"{name}.json")) as file:
+                    profiles.append({"name": name, **json.load(file)})
+            except (OSError, ValueError):
+                profiles.append({"name": name})
+        return profiles
+
+    def path(self, name: str) -> Optional[str]:
+        if not PROFILE_NAME_PATTERN.match(name):
+            return None
+        path = os.path.join(self.directory, f"{name}.folded")
+        return path if os.path.exists(path) else None
+
+class ProfilingTargets:
+    """Users an admin asked to profile: user_id -> {"until": epoch, "remaining": requests}"""
+    def __init__(self, directory: str):
+        self.path = os.path.join(directory, TARGETS_FILE)
+        self.targets: Dict[str, dict] = {}
+        self.armed = False  # Some toggle is live; the only thing requests read
+        self._mtime = 0.0
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await loop.run_in_executor(None, self.refresh)
+            await asyncio.sleep(TARGETS_RELOAD_SECONDS)
+
+    def refresh(self):
+        """Pick up toggles made by other workers and re-arm the per-request flag"""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            self.targets = {}
+            mtime = None
+        if mtime is not None and mtime != self._mtime:
+            try:
+                with open(self.path) as file:
+                    self.targets = json.load(file)
+                self._mtime = mtime
+            except (OSError, ValueError):
+                pass
+        self.armed = bool(self.active())
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temporary = self.path + ".tmp"
+        with open(temporary, "w") as file:
+            json.dump(self.targets, file)
+        os.replace(temporary, self.path)
+        self._mtime = os.stat(self.path).st_mtime
+
+    def enable(self, user_id: str, requests: int, minutes: int) -> dict:
+        with self._lock:
+            self.refresh()
+            self.targets[user_id] = {"until": time.time() + minutes * 60, "remaining": requests}
+            self.save()
+            self.armed = True
+            return self.targets[user_id]
+
+    def disable(self, user_id: str) -> bool:
+        with self._lock:
+            self.refresh()
+            removed = self.targets.pop(user_id, None) is not None
+            self.save()
+            self.armed = bool(self.active())
+            return removed
+
+    def any(self) -> bool:
+        """Per-request check: an in-memory flag, kept current by the background refresh"""
+        return self.armed
+
+    def is_target(self, user_id: str) -> bool:
+        """In-memory check before consume(), which writes the file"""
+        target = self.targets.get(user_id)
+        return target is not None and target["until"] > time.time() and target["remaining"] > 0
+
+    def active(self) -> Dict[str, dict]:
+        now = time.time()
+        return {user_id: target for user_id, target in self.targets.items()
+                if target["until"] > now and target["remaining"] > 0}
+
+    def consume(self, user_id: str) -> bool:
+        """True if ``user_id``'s request should be profiled, counting it against the toggle (file I/O)"""
+        with self._lock:
+            if not self.is_target(user_id):
+                return False
+            self.targets[user_id]["remaining"] -= 1
+            self.save()
+            self.armed = bool(self.active())
+            return True
+
+# Global profiling instances
+profile_store = ProfileStore(settings.profile_dir, settings.profile_ring_size)
+profiling_targets = ProfilingTargets(settings.profile_dir)
+
+class ProfilerMiddleware:
+    """Pure ASGI middleware running triggered requests under the sampling profiler"""
+    def __init__(self, app):
+        self.app = app
+        self.running = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trigger = await self.trigger(scope)
+        if trigger is None or self.running >= MAX_CONCURRENT_PROFILES:
+            await self.app(scope, receive, send)
+            return
+
+        now = time.time()
+        name = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(now))}{int(now * 1000) % 1000:03d}-{uuid.uuid4().hex[:8]}"
+        status_holder = [500]
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-profile-id", name.encode())]}
+            await send(message)
+
+        self.running += 1
+        in_flight = admission_controller.in_flight
+        profiler = SamplingProfiler(settings.profile_sample_interval_ms / 1000)
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            counts = profiler.stop()
+            self.running -= 1
+            meta = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status_holder[0],
+                "trigger": trigger,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                "samples": profiler.samples,
+                "interval_ms": settings.profile_sample_interval_ms,
+                # Other requests running meanwhile also show up in the samples
+                "concurrent_requests": in_flight,
+                "pid": os.getpid(),
+                "created_at": time.time(),
+            }
+            profile_store.save(name, counts, meta)
+
+    async def trigger(self, scope) -> Optional[str]:
+        """"signature" or "user:<id>" if this request must be profiled, otherwise None"""
+        headers = scope["headers"]
+        for key, value in headers:
+            if key == PROFILE_HEADER:
+                return "signature" if verify_profile_signature(value.decode("latin-1")) else None
+
+        if not profiling_targets.any():
+            return None
+        for key, value in headers:
+            if key == b"authorization":
+                payload = verify_token(value.decode("latin-1").partition(" ")[2])
+                user_id = str(payload.get("sub")) if payload else None
+                if not user_id or not profiling_targets.is_target(user_id):
+                    return None
+                # Counting the request rewrites the shared file: keep it off the event loop
+                if await asyncio.get_running_loop().run_in_executor(None, profiling_targets.consume, user_id):
+                    return f"user:{user_id}"
+                return None
+        return None
@@ -0,0 +1,54 @@
+import base64
+from typing import Iterable, List, Optional, Tuple
+
+TOTAL_DAYS = 33
+TASKS_PER_DAY = 3  # meditation, video, rosary
+BITMASK_BYTES = (TOTAL_DAYS * TASKS_PER_DAY + 7) // 8  # 99 bits -> 13 bytes
+
+# Clients on metered connections opt in with ?format=compact or this Accept type
+COMPACT_PROGRESS_MEDIA_TYPE = "application/vnd.totustuus.progress+compact"
+
+def wants_compact_progress(format: Optional[str], accept: Optional[str]) -> bool:
+    """Return True when the client negotiated the compact progress format"""
+    if format:
+        return format == "compact"
+    return bool(accept) and COMPACT_PROGRESS_MEDIA_TYPE in accept
+
+def encode_progress(rows: Iterable[Tuple[int, bool, bool, bool]]) -> dict:
+    """
+    Encode (day, meditation, video, rosary) rows as a base64 bitmask.
+    Bit ``(day - 1) * 3 + task`` is set when that task is completed,
+    with task 0 = meditation, 1 = video, 2 = rosary (little-endian bytes).
+    """
+    mask = 0
+    total_completed = 0
+    completed_days = 0
+    for day, meditation, video, rosary in rows:
+        if day < 1 or day > TOTAL_DAYS:
+            continue
+        bits = (1 if meditation else 0) | (2 if video else 0) | (4 if rosary else 0)
+        if not bits:
+            continue
+        mask |= bits << ((day - 1) * TASKS_PER_DAY)
+        day_total = (bits & 1) + ((bits >> 1) & 1) + (bits >> 2)
+        total_completed += day_total
+        if day_total == TASKS_PER_DAY:
+            completed_days += 1
+
+    return {
+        "format": "compact",
+        "days": TOTAL_DAYS,
+        "tasks_per_day": TASKS_PER_DAY,
+        "bits": base64.b64encode(mask.to_bytes(BITMASK_BYTES, "little")).decode("ascii"),
+        "total_completed": total_completed,
+        "completed_days": completed_days
+    }
+
+def decode_progress(bits: str) -> List[Tuple[int, bool, bool, bool]]:
+    """Inverse of encode_progress: return (day, meditation, video, rosary) for all 33 days"""
+    mask = int.from_bytes(base64.b64decode(bits), "little")
+    days = []
+    for day in range(1, TOTAL_DAYS + 1):
+        day_bits = (mask >> ((day - 1) * TASKS_PER_DAY)) & 7
+        days.append((day, bool(day_bits & 1), bool(day_bits & 2), bool(day_bits & 4)))
+    return days
@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
+from app.utils.metrics import rate_limit_rejections
 
 # Rate limits for different operations
 PROGRESS_RATE_LIMIT = 10      # Progress updates: 10 per 5 minutes (normal spiritual practice)
@@ -8,10 +9,11 @@ GENERAL_RATE_LIMIT = 60       # General API: 60 per 5 minutes (dashboard, conten
 LIBRE_MODE_RATE_LIMIT = 2     # Libre mode toggle: 2 per hour (prevent abuse)
 
 class RateLimiter:
-    def __init__(self, max_requests: int = GENERAL_RATE_LIMIT, window_seconds: int = 300):
+    def __init__(self, max_requests: int = GENERAL_RATE_LIMIT, window_seconds: int = 300, name: Optional[str] = None):
         self.max_requests = max_requests
         self.window_seconds = window_seconds
         self.requests: Dict[str, list] = {}  # user_id -> list of timestamps
+        self.rejections = rate_limit_rejections.labels(name or "general")
     
     def is_allowed(self, user_id: str) -> Tuple[bool, int]:
         """
@@ -32,6 +34,7 @@ class RateLimiter:
         
         # Check if user has exceeded the limit
         if len(recent_requests) >= self.max_requests:
+            self.rejections.inc()
             return False, 0
         
         # Add current request
@@ -56,7 +59,7 @@ class RateLimiter:
         return 0
 
 # Global rate limiter instances
-progress_rate_limiter = RateLimiter(max_requests=PROGRESS_RATE_LIMIT, window_seconds=300)
-auth_rate_limiter = RateLimiter(max_requests=AUTH_RATE_LIMIT, window_seconds=300)
-general_rate_limiter = RateLimiter(max_requests=GENERAL_RATE_LIMIT, window_seconds=300)
-libre_mode_rate_limiter = RateLimiter(max_requests=LIBRE_MODE_RATE_LIMIT, window_seconds=3600)  # 1 hour 
\ No newline at end of file
+progress_rate_limiter = RateLimiter(max_requests=PROGRESS_RATE_LIMIT, window_seconds=300, name="progress")
+auth_rate_limiter = RateLimiter(max_requests=AUTH_RATE_LIMIT, window_seconds=300, name="auth")
+general_rate_limiter = RateLimiter(max_requests=GENERAL_RATE_LIMIT, window_seconds=300, name="general")
+libre_mode_rate_limiter = RateLimiter(max_requests=LIBRE_MODE_RATE_LIMIT, window_seconds=3600, name="libre_mode")  # 1 hour 
\ No newline at end of file
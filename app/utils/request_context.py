@@ -0,0 +1,338 @@
+"""
+Per-request timing. A RequestContext lives in a contextvar for the duration of
+each HTTP request (anyio copies it into the threadpool), and instrumented code
+adds named phases to it: auth, jwt, db, hash, endpoint, serialize. The phases
+are sent back in a ``Server-Timing`` header and aggregated per route.
+
+REQUEST_TIMING selects the mode:
+    off       no Server-Timing header and no phase hooks
+    basic     phase totals only (default; cheap enough for production)
+    detailed  also one Server-Timing entry per SQL statement
+
+The same context counts the statements of each request for query budgets: a
+route declares ``dependencies=[Depends(query_budget(n))]`` and QUERY_BUDGET_MODE
+decides what happens when it runs more than ``n`` statements, or repeats one
+statement (the N+1 pattern): ``warn`` logs it, ``enforce`` (the default with
+ENVIRONMENT=test) fails the request at the offending statement, before it runs
+(so nothing past the budget is committed), ``off`` stops counting. A request
+that goes over only after committing is not failed, since its write persisted:
+it is logged and flagged with an ``X-Query-Budget-Exceeded`` response header.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from app.config import settings
+from typing import Dict, List, Optional, Tuple
+import functools
+import inspect
+import logging
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+TIMING_ENABLED = settings.request_timing != "off"
+QUERY_BUDGET_MODE = settings.query_budget_mode
+# The context, engine hooks and route wrapper are needed by either feature
+INSTRUMENTED = TIMING_ENABLED or QUERY_BUDGET_MODE != "off"
+
+# Server-Timing entries for individual statements in detailed mode
+MAX_STATEMENT_ENTRIES = 20
+
+# Without a declared budget, a statement repeated more often than this is still reported
+DEFAULT_MAX_REPEATS = 2
+
+class RequestContext:
+    __slots__ = ("start", "route", "phases", "db_count", "db_seconds", "statements", "endpoint_done",
+                 "statement_counts", "query_budget", "user_id", "committed", "handling")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.route: Optional[str] = None
+        self.phases: Dict[str, float] = {}
+        self.db_count = 0
+        self.db_seconds = 0.0
+        self.statements: List[Tuple[str, float]] = []
+        self.endpoint_done: Optional[float] = None
+        self.statement_counts: Dict[str, int] = {}
+        self.query_budget: Optional[Tuple[int, int]] = None
+        self.user_id: Optional[str] = None
+        self.committed = False  # A transaction of this request was committed
+        self.handling = False  # The route handler is running (a streamed body is outside the budget)
+
+    def add(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def server_timing(self, total: float) -> str:
+        entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.phases.items()]
+        if self.db_count:
+            entries.append(f'db;desc="{self.db_count} queries";dur={self.db_seconds * 1000:.2f}')
+        for index, (statement, seconds) in enumerate(self.statements[:MAX_STATEMENT_ENTRIES], 1):
+            entries.append(f'db-{index};desc="{statement}";dur={seconds * 1000:.2f}')
+        entries.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(entries)
+
+current_request: ContextVar[Optional[RequestContext]] = ContextVar("current_request", default=None)
+
+@contextmanager
+def phase(name: str):
+    """Time the enclosed block as ``name`` on the current request, if any"""
+    context = current_request.get()
+    if context is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        context.add(name, time.perf_counter() - start)
+
+def set_request_user(user_id: str):
+    """Attribute the current request (logs, profiles) to ``user_id``"""
+    context = current_request.get()
+    if context is not None:
+        context.user_id = user_id
+
+def timed(name: str):
+    """Decorator form of phase() for plain functions"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class TimingStats:
+    """Per-route phase totals: route -> phase -> [count, total_ms, max_ms]"""
+    def __init__(self):
+        self.routes: Dict[str, Dict[str, List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, route: str, phases: Dict[str, float]):
+        with self._lock:
+            stats = self.routes.setdefault(route, {})
+            for name, seconds in phases.items():
+                ms = seconds * 1000
+                entry = stats.get(name)
+                if entry is None:
+                    stats[name] = [1, ms, ms]
+                else:
+                    entry[0] += 1
+                    entry[1] += ms
+                    if ms > entry[2]:
+                        entry[2] = ms
+
+    def snapshot(self) -> Dict[str, Dict[str, dict]]:
+        with self._lock:
+            return {
+                route: {
+                    name: {"count": int(count), "avg_ms": round(total / count, 2), "max_ms": round(peak, 2)}
+                    for name, (count, total, peak) in phases.items()
+                }
+                for route, phases in self.routes.items()
+            }
+
+# Global timing stats instance
+timing_stats = TimingStats()
+
+_TABLE_PATTERN = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+"?(\w+)', re.IGNORECASE)
+
+def _statement_label(statement: str) -> str:
+    """``SELECT users`` style label: verb plus the first table after FROM/INTO/UPDATE"""
+    verb = statement.split(None, 1)[0].upper() if statement.strip() else "SQL"
+    match = _TABLE_PATTERN.search(statement)
+    return f"{verb} {match.group(1)}" if match else verb
+
+def instrument_engine(engine):
+    """Count and time every statement executed on ``engine`` against the current request"""
+    detailed = settings.request_timing == "detailed"
+    counting = QUERY_BUDGET_MODE != "off"
+    enforcing = QUERY_BUDGET_MODE == "enforce"
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        request = current_request.get()
+        if request is not None:
+            if enforcing and request.handling and request.query_budget is not None and not request.committed:
+                # Fail before the statement runs, so the request can't commit past its budget
+                problem = _next_statement_problem(request, statement)
+                if problem:
+                    raise QueryBudgetExceeded(f"Query budget of {request.route}: {problem}")
+            conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        request = current_request.get()
+        if request is None:
+            return
+        starts = conn.info.get("query_start")
+        if not starts:
+            return
+        seconds = time.perf_counter() - starts.pop()
+        request.db_count += 1
+        request.db_seconds += seconds
+        if detailed:
+            request.statements.append((_statement_label(statement), seconds))
+        if counting:
+            request.statement_counts[statement] = request.statement_counts.get(statement, 0) + 1
+
+    @event.listens_for(engine, "commit")
+    def commit(conn):
+        request = current_request.get()
+        if request is not None:
+            request.committed = True
+
+class QueryBudgetExceeded(AssertionError):
+    """A route ran more statements than its budget, or repeated one (enforce mode)"""
+
+def _next_statement_problem(context: RequestContext, statement: str) -> Optional[str]:
+    """What running ``statement`` next would break in the declared budget, if anything"""
+    max_queries, max_repeats = context.query_budget
+    if context.db_count + 1 > max_queries:
+        return f"{context.db_count + 1} statements (budget {max_queries})"
+    count = context.statement_counts.get(statement, 0) + 1
+    if count > max_repeats:
+        return f"{count}x {' '.join(statement.split())[:200]}"
+    return None
+
+def query_budget(max_queries: int, max_repeats: int = 1):
+    """
+    Route dependency declaring that the route runs at most ``max_queries``
+    statements, none of them more than ``max_repeats`` times. Routes set it to
+    their worst case plus one statement of headroom, listed next to the route.
+    """
+    async def declare_query_budget():
+        context = current_request.get()
+        if context is not None:
+            context.query_budget = (max_queries, max_repeats)
+    return declare_query_budget
+
+def check_query_budget(context: RequestContext) -> Optional[str]:
+    """
+    Warn about, or in enforce mode raise on, a blown budget or repeated statements.
+    Before a commit, routes with a declared budget already failed at the offending
+    statement in enforce mode. Once the request has committed, failing would report
+    an error for a write that was persisted, so the problem is only logged (as an
+    error in enforce mode) and returned for the response header.
+    """
+    max_queries, max_repeats = context.query_budget or (None, DEFAULT_MAX_REPEATS)
+    problems = []
+    if max_queries is not None and context.db_count > max_queries:
+        problems.append(f"{context.db_count} statements (budget {max_queries})")
+    for statement, count in context.statement_counts.items():
+        if count > max_repeats:
+            problems.append(f"{count}x {' '.join(statement.split())[:200]}")
+    if not problems:
+        return
+
+    message = f"Query budget of {context.route}: " + "; ".join(problems)
+    if QUERY_BUDGET_MODE == "enforce":
+        if not context.committed:
+            raise QueryBudgetExceeded(message)
+        logger.error(message)
+    else:
+        logger.warning(message)
+    return message
+
+def _timed_endpoint(endpoint):
+    """Wrap a route function so its own run time is the ``endpoint`` phase"""
+    if getattr(endpoint, "_timed_endpoint", False):
+        return endpoint  # include_router re-creates routes from already wrapped endpoints
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            with phase("endpoint"):
+                result = await endpoint(*args, **kwargs)
+            context = current_request.get()
+            if context is not None:
+                context.endpoint_done = time.perf_counter()
+            return result
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            with phase("endpoint"):
+                result = endpoint(*args, **kwargs)
+            context = current_request.get()
+            if context is not None:
+                context.endpoint_done = time.perf_counter()
+            return result
+    wrapper._timed_endpoint = True
+    return wrapper
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute that names the request after its path template and splits the
+    handler into ``endpoint`` and ``serialize`` (response validation and rendering)
+    """
+    def __init__(self, path: str, endpoint, **kwargs):
+        if TIMING_ENABLED:
+            endpoint = _timed_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        if not INSTRUMENTED:
+            return handler
+        route_name = " ".join(sorted(self.methods)) + " " + self.path
+        checking = QUERY_BUDGET_MODE != "off"
+
+        async def timed_handler(request):
+            context = current_request.get()
+            if context is not None:
+                context.route = route_name
+                context.handling = True
+            try:
+                response = await handler(request)
+            finally:
+                if context is not None:
+                    context.handling = False
+            if context is not None:
+                if context.endpoint_done is not None:
+                    context.add("serialize", time.perf_counter() - context.endpoint_done)
+                if checking:
+                    problem = check_query_budget(context)
+                    if problem:
+                        response.headers["X-Query-Budget-Exceeded"] = problem.encode("latin-1", "replace").decode("latin-1")
+            return response
+        return timed_handler
+
+class RequestTimingMiddleware:
+    """Pure ASGI middleware: opens the RequestContext and, if timing is on, adds the Server-Timing header"""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        context = RequestContext()
+        token = current_request.set(context)
+
+        if not TIMING_ENABLED:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                current_request.reset(token)
+            return
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                total = time.perf_counter() - context.start
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", context.server_timing(total).encode("latin-1", "replace")))
+                message = {**message, "headers": headers}
+                if context.route is not None:
+                    phases = dict(context.phases)
+                    phases["db"] = context.db_seconds
+                    phases["total"] = total
+                    timing_stats.record(context.route, phases)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request.reset(token)
@@ -3,16 +3,28 @@ from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.config import settings
+from app.utils.request_context import timed
+from app.utils.metrics import password_hash_in_flight
 import uuid
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+@timed("hash")
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    password_hash_in_flight.inc()
+    try:
+        return pwd_context.verify(plain_password, hashed_password)
+    finally:
+        password_hash_in_flight.dec()
 
+@timed("hash")
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    password_hash_in_flight.inc()
+    try:
+        return pwd_context.hash(password)
+    finally:
+        password_hash_in_flight.dec()
 
 # JWT Token functions
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -33,6 +45,15 @@ def create_refresh_token(data: dict) -> str:
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
+def create_events_token(data: dict) -> str:
+    """Short-lived token that only opens the events stream (it travels in the query string)"""
+    to_encode = data.copy()
+    expire = datetime.utcnow() + timedelta(seconds=settings.events_token_expire_seconds)
+    to_encode.update({"exp": expire, "type": "events"})
+    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
+    return encoded_jwt
+
+@timed("jwt")
 def verify_token(token: str) -> Optional[dict]:
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
@@ -0,0 +1,91 @@
+"""
+Slow-statement log: every SQL statement slower than SLOW_QUERY_THRESHOLD_MS is
+written as one JSON line to a size-rotated file, with the route and a hash of
+the user that issued it. Parameter values are never written, only their shape.
+"""
+from logging.handlers import RotatingFileHandler
+from sqlalchemy import event
+from app.config import settings
+from app.utils.request_context import current_request
+from datetime import datetime
+from typing import Optional
+import hashlib
+import hmac
+import logging
+import os
+import time
+import orjson
+
+MAX_SQL_LENGTH = 4000
+
+logger = logging.getLogger("app.slow_queries")
+logger.propagate = False
+
+def user_hash(user_id: Optional[str]) -> Optional[str]:
+    """Stable, non-reversible id to group statements by user without storing the id"""
+    if not user_id:
+        return None
+    return hmac.new(settings.secret_key.encode(), user_id.encode(), hashlib.sha256).hexdigest()[:16]
+
+def parameter_shape(parameters, executemany: bool):
+    """Types of the bound parameters (values are left out), e.g. {"id_1": "str"}"""
+    if executemany:
+        rows = list(parameters) if not isinstance(parameters, (list, tuple)) else parameters
+        return {"rows": len(rows), "row": parameter_shape(rows[0], False) if rows else None}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+def _ensure_handler():
+    """Open the file lazily so forked workers each get their own handle (and file with {pid})"""
+    if logger.handlers:
+        return
+    path = settings.slow_query_log.format(pid=os.getpid())
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    handler = RotatingFileHandler(
+        path,
+        maxBytes=settings.slow_query_log_max_bytes,
+        backupCount=settings.slow_query_log_backups,
+        encoding="utf-8"
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+def log_slow_statement(statement: str, parameters, executemany: bool, seconds: float):
+    request = current_request.get()
+    record = {
+        "ts": datetime.utcnow().isoformat() + "Z",
+        "duration_ms": round(seconds * 1000, 2),
+        "sql": " ".join(statement.split())[:MAX_SQL_LENGTH],
+        "params": parameter_shape(parameters, executemany),
+        "route": request.route if request is not None else None,
+        "user": user_hash(request.user_id) if request is not None else None,
+        "pid": os.getpid(),
+    }
+    _ensure_handler()
+    logger.info(orjson.dumps(record, default=str).decode())
+
+def instrument_slow_queries(engine):
+    """Time every statement on ``engine`` and log the slow ones"""
+    threshold = settings.slow_query_threshold_ms / 1000
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("slow_query_start")
+        if not starts:
+            return
+        seconds = time.perf_counter() - starts.pop()
+        if seconds >= threshold:
+            try:
+                log_slow_statement(statement, parameters, executemany, seconds)
+            except Exception:
+                pass  # never fail a query because of its log line
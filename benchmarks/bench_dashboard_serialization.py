@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark comparing the old and new serialization paths of /users/dashboard.
+
+- old: ORM ``__dict__`` copy, ``jsonable_encoder`` and ``JSONResponse`` (stdlib json)
+- new: ``DashboardResponse`` validation/serialization and ``ORJSONResponse``
+
+Usage: python benchmarks/bench_dashboard_serialization.py [iterations]
+"""
+
+import sys
+import os
+import timeit
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from app.models.user import User
+from app.schemas.dashboard import DashboardResponse
+
+def build_user() -> User:
+    """Transient user row with every column populated"""
+    now = datetime.utcnow()
+    return User(
+        id="0ac14edc-cb47-438f-8327-040f56296863",
+        name="María García",
+        email="maria@gmail.com",
+        password_hash="$2b$12$" + "x" * 53,
+        current_day=12,
+        start_day=1,
+        has_chosen_start_day=True,
+        libre_mode=False,
+        start_date=now,
+        is_active=True,
+        created_at=now,
+        updated_at=now
+    )
+
+def build_payload_parts():
+    """Progress summaries and daily content shaped like get_dashboard_data output"""
+    summaries = []
+    for day in range(1, 34):
+        done = day < 12
+        summaries.append({
+            "day": day,
+            "meditation_completed": done,
+            "video_completed": done,
+            "rosary_completed": done,
+            "total_completed": 3 if done else 0
+        })
+    daily_content = {
+        "id": "5f0c3c4e-3c55-4a57-9a4e-0d5f2b1f7f10",
+        "day": 12,
+        "title": "Día 12: Continuando la Jornada",
+        "description": "En este día 12 de nuestra jornada de consagración, continuamos profundizando. " * 4,
+        "readingTime": "5 min",
+        "mysteries": "Dolorosos",
+        "mysteriesDescription": "Reza el rosario completo con devoción",
+        "video": {"title": "Video del Día 12", "youtubeUrl": "https://www.youtube.com/watch?v=example12"},
+        "rosaryVideo": {"title": "Guía para Rezar el Rosario", "youtubeUrl": "https://www.youtube.com/watch?v=rosary12"},
+        "quote": {"text": "La consagración total a María es el secreto de la santidad.", "author": "San Luis María Grignion de Montfort"},
+        "tasks": {"meditationCompleted": False, "videoCompleted": False, "rosaryCompleted": False},
+        "meditationPdfUrl": "/pdfs/meditation_day_12.pdf"
+    }
+    return summaries, daily_content
+
+def old_path(user: User, summaries, daily_content) -> bytes:
+    """Previous implementation: untyped route, ORM __dict__ and jsonable_encoder"""
+    user_dict = user.__dict__.copy()
+    user_dict["totalDays"] = 33
+    user_dict["currentDay"] = 12
+    user_dict["progressPercentage"] = 33
+    payload = {
+        "user": user_dict,
+        "available_day": 12,
+        "progress": summaries,
+        "daily_content": daily_content,
+        "next_available_time": None
+    }
+    return JSONResponse(jsonable_encoder(payload)).body
+
+def new_path(user: User, summaries, daily_content) -> bytes:
+    """Current implementation: explicit columns, response_model and orjson"""
+    payload = {
+        "user": {
+            "id": user.id,
+            "name": user.name,
+            "email": user.email,
+            "current_day": user.current_day,
+            "start_day": user.start_day,
+            "has_chosen_start_day": user.has_chosen_start_day,
+            "libre_mode": user.libre_mode,
+            "start_date": user.start_date,
+            "is_active": user.is_active,
+            "created_at": user.created_at,
+            "updated_at": user.updated_at,
+            "totalDays": 33,
+            "currentDay": 12,
+            "progressPercentage": 33
+        },
+        "available_day": 12,
+        "progress": summaries,
+        "daily_content": daily_content,
+        "next_available_time": None
+    }
+    # Same steps FastAPI runs for a route with response_model
+    model = DashboardResponse.model_validate(payload)
+    return ORJSONResponse(model.model_dump(mode="json")).body
+
+def main():
+    """Run both paths and print per-call timings"""
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    user = build_user()
+    summaries, daily_content = build_payload_parts()
+
+    results = {}
+    for name, func in (("old", old_path), ("new", new_path)):
+        func(user, summaries, daily_content)  # warm up
+        best = min(timeit.repeat(lambda: func(user, summaries, daily_content), number=iterations, repeat=5))
+        results[name] = best / iterations * 1e6
+        size = len(func(user, summaries, daily_content))
+        print(f"{name:>4}: {results[name]:8.1f} µs/call  ({size} bytes)")
+
+    print(f"speedup: {results['old'] / results['new']:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark for app.utils.gating: gate 1M synthetic users with gate_many.
+
+Runs once with the fixed-offset fast path (America/Lima) and once with the
+boundary-table path of a DST zone (Europe/Madrid).
+
+Usage: python benchmarks/bench_gating.py [users]
+"""
+
+import sys
+import os
+import random
+import time
+from array import array
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.gating import MidnightBoundaries, gate, gate_many
+
+def build_users(count: int, now_epoch: int):
+    """Random current days, ~60% completed within the last 2 days, ~10% libre mode"""
+    rng = random.Random(33)
+    current_days = array('q', (rng.randint(1, 33) for _ in range(count)))
+    completed = array('q', (
+        now_epoch - rng.randint(0, 2 * 86400) if rng.random() < 0.6 else 0
+        for _ in range(count)
+    ))
+    libre = [rng.random() < 0.1 for _ in range(count)]
+    return current_days, completed, libre
+
+def main():
+    """Gate all users per zone and check against the scalar gate()"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    now_epoch = int(time.time())
+    current_days, completed, libre = build_users(count, now_epoch)
+    print(f"users: {count:,}")
+
+    for tz_name in ("America/Lima", "Europe/Madrid"):
+        start = time.perf_counter()
+        boundaries = MidnightBoundaries(tz_name)
+        built = time.perf_counter() - start
+
+        start = time.perf_counter()
+        available, next_times = gate_many(current_days, completed, libre, now_epoch, boundaries=boundaries)
+        elapsed = time.perf_counter() - start
+
+        # Spot-check the vectorized path against the scalar one
+        for i in range(0, count, max(count // 1000, 1)):
+            day, next_epoch = gate(current_days[i], completed[i], libre[i], now_epoch, boundaries=boundaries)
+            assert (day, next_epoch or 0) == (available[i], next_times[i])
+
+        unlocked = sum(1 for a, d in zip(available, current_days) if a != d)
+        waiting = sum(1 for t in next_times if t)
+        path = "fixed offset" if boundaries.fixed_offset is not None else "boundary table"
+        print(f"{tz_name:>15} ({path}): {elapsed:.2f}s total, {elapsed / count * 1e9:.0f} ns/user, "
+              f"boundaries built in {built * 1000:.1f} ms; {unlocked:,} unlocked, {waiting:,} waiting")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
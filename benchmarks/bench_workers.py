@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark for serve.py: dashboard throughput with 1..N pre-forked workers.
+
+For each worker count a fresh launcher is started on a temporary SQLite
+database (or DATABASE_URL if set), a user is registered, and client processes
+request /api/v1/users/dashboard over keep-alive connections for a fixed time.
+Clients run in their own processes, so on a machine with N cores the clients
+compete with the workers; compare the curve, not the absolute numbers.
+
+Usage: python benchmarks/bench_workers.py [max_workers] [seconds]
+"""
+
+import sys
+import os
+import json
+import http.client
+import multiprocessing
+import signal
+import socket
+import subprocess
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def request(conn, method, path, body=None, headers=None):
+    conn.request(method, path, body=body, headers=headers or {})
+    response = conn.getresponse()
+    return response.status, response.read()
+
+def wait_healthy(port: int, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            if request(conn, "GET", "/health")[0] == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+def client(port: int, token: str, seconds: float, results):
+    """Hit the dashboard until time runs out; report completed requests"""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    headers = {"Authorization": f"Bearer {token}"}
+    done = errors = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        status, _ = request(conn, "GET", "/api/v1/users/dashboard", headers=headers)
+        if status == 200:
+            done += 1
+        else:
+            errors += 1
+    results.put((done, errors))
+
+def run(workers: int, clients: int, seconds: float) -> float:
+    port = free_port()
+    env = dict(os.environ)
+    if "DATABASE_URL" not in env:
+        env["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "serve.py"), "--workers", str(workers), "--port", str(port)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_healthy(port)
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        body = json.dumps({"name": "Bench", "email": f"bench{port}@gmail.com", "password": "Bench123!"})
+        status, payload = request(conn, "POST", "/api/v1/auth/register", body, {"Content-Type": "application/json"})
+        if status != 200:
+            raise RuntimeError(f"register failed: {status} {payload[:200]}")
+        token = json.loads(payload)["access_token"]
+
+        results = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=client, args=(port, token, seconds, results)) for _ in range(clients)]
+        for proc in procs:
+            proc.start()
+        totals = [results.get() for _ in procs]
+        for proc in procs:
+            proc.join()
+        done = sum(t[0] for t in totals)
+        errors = sum(t[1] for t in totals)
+        if errors:
+            print(f"  ⚠️  {errors} failed requests with {workers} workers")
+        return done / seconds
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+def main():
+    """Measure requests/second for each worker count and print the scaling curve"""
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 1)
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    clients = max(2 * max_workers, 2)
+    print(f"cpus: {os.cpu_count()}  clients: {clients}  duration: {seconds}s per run")
+
+    baseline = None
+    for workers in range(1, max_workers + 1):
+        rps = run(workers, clients, seconds)
+        baseline = baseline or rps
+        speedup = rps / baseline
+        print(f"workers={workers:<3} {rps:>9.1f} req/s   speedup x{speedup:.2f}   efficiency {speedup / workers:.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test: concurrent user journeys against the whole API.
+
+Each virtual user runs the journey of a new app user:
+
+    register -> login -> dashboard -> 3 progress toggles (day 1) -> daily content
+    -> dashboard -> refresh token
+
+By default the app is driven in-process through a minimal ASGI client (no
+sockets, so the numbers are the app's own cost); with --url the same journeys
+go over HTTP to a running server (uvicorn or serve.py). In-process runs use a
+temporary SQLite database unless DATABASE_URL is set, so the Postgres numbers
+come from pointing DATABASE_URL at a local Postgres (migrated with alembic).
+QUERY_BUDGET_MODE defaults to ``enforce`` here: a route that blows its query
+budget fails the run instead of just getting slower.
+
+Every virtual user gets its own client address (X-Forwarded-For over HTTP), so
+the per-IP login limiter sees real users, not one client hammering it.
+
+Reports p50/p95/p99 and throughput per endpoint. --save NAME stores the results
+in benchmarks/baselines/NAME.json; --compare NAME prints the change against a
+stored baseline and exits with 1 if a p95 regressed by more than --threshold.
+Baselines are machine specific: save one before the change, compare after it.
+
+Usage: python benchmarks/load_test.py [--users N] [--concurrency C] [--url URL]
+                                      [--save NAME] [--compare NAME] [--threshold 0.25]
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import http.client
+import json
+import platform
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_DIR = os.path.join(ROOT, "benchmarks", "baselines")
+sys.path.append(ROOT)
+
+API = "/api/v1"
+PASSWORD = "Bench123!"
+
+class InProcessClient:
+    """Calls the ASGI app directly; one instance per virtual user"""
+    def __init__(self, app, client_ip: str):
+        self.app = app
+        self.client_ip = client_ip
+
+    async def request(self, method: str, path: str, body: Optional[dict] = None, token: Optional[str] = None):
+        payload = json.dumps(body).encode() if body is not None else b""
+        headers = [(b"host", b"loadtest"), (b"content-length", str(len(payload)).encode())]
+        if body is not None:
+            headers.append((b"content-type", b"application/json"))
+        if token:
+            headers.append((b"authorization", f"Bearer {token}".encode()))
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": headers,
+            "client": (self.client_ip, 50000),
+            "server": ("loadtest", 80),
+        }
+        sent = False
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": payload, "more_body": False}
+            await asyncio.sleep(3600)  # nothing reads past the body; mimic an idle connection
+
+        response = {"status": 500, "body": b""}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["body"] += message.get("body", b"")
+
+        await self.app(scope, receive, send)
+        return response["status"], response["body"]
+
+    def close(self):
+        pass
+
+class HTTPClient:
+    """Keep-alive HTTP connection of one virtual user; blocking calls run in a thread pool"""
+    def __init__(self, url: str, client_ip: str, executor: ThreadPoolExecutor):
+        parts = urlsplit(url)
+        self.conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+        self.client_ip = client_ip
+        self.executor = executor
+
+    def _request(self, method, path, body, token):
+        headers = {"X-Forwarded-For": self.client_ip}
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        self.conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+        response = self.conn.getresponse()
+        return response.status, response.read()
+
+    async def request(self, method: str, path: str, body: Optional[dict] = None, token: Optional[str] = None):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._request, method, path, body, token)
+
+    def close(self):
+        self.conn.close()
+
+class Recorder:
+    """Latencies (seconds) and failures per endpoint"""
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.failures: List[str] = []
+
+    async def call(self, client, name: str, method: str, path: str, body=None, token=None, expected=(200,)):
+        start = time.perf_counter()
+        status, payload = await client.request(method, path, body, token)
+        self.latencies.setdefault(name, []).append(time.perf_counter() - start)
+        if status not in expected:
+            self.errors[name] = self.errors.get(name, 0) + 1
+            if len(self.failures) < 5:
+                self.failures.append(f"{name}: {status} {payload[:200]!r}")
+            raise JourneyFailed(name)
+        return json.loads(payload) if payload else None
+
+class JourneyFailed(Exception):
+    pass
+
+async def journey(client, recorder: Recorder, index: int, run_id: str):
+    email = f"load{run_id}u{index}@gmail.com"
+    await recorder.call(client, "POST /auth/register", "POST", f"{API}/auth/register",
+                        {"name": f"Carga {index}", "email": email, "password": PASSWORD})
+    tokens = await recorder.call(client, "POST /auth/login", "POST", f"{API}/auth/login",
+                                 {"email": email, "password": PASSWORD})
+    access = tokens["access_token"]
+    await recorder.call(client, "GET /users/dashboard", "GET", f"{API}/users/dashboard", token=access)
+    for field in ("meditation_completed", "video_completed", "rosary_completed"):
+        await recorder.call(client, "POST /users/progress", "POST", f"{API}/users/progress",
+                            {"day": 1, field: True}, token=access)
+    await recorder.call(client, "GET /content/daily/{day}", "GET", f"{API}/content/daily/1", token=access)
+    await recorder.call(client, "GET /users/dashboard", "GET", f"{API}/users/dashboard", token=access)
+    await recorder.call(client, "POST /auth/refresh", "POST", f"{API}/auth/refresh", token=tokens["refresh_token"])
+
+def client_address(index: int) -> str:
+    return f"10.{(index >> 16) & 255}.{(index >> 8) & 255}.{index & 255}"
+
+async def run_journeys(make_client, users: int, concurrency: int, recorder: Recorder) -> float:
+    run_id = str(int(time.time() * 1000))
+    semaphore = asyncio.Semaphore(concurrency)
+    failed = 0
+
+    async def one(index: int):
+        nonlocal failed
+        async with semaphore:
+            client = make_client(client_address(index + 1))
+            try:
+                await journey(client, recorder, index, run_id)
+            except JourneyFailed:
+                failed += 1
+            finally:
+                client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(users)))
+    elapsed = time.perf_counter() - start
+    if failed:
+        print(f"⚠️  {failed}/{users} journeys failed")
+    return elapsed
+
+async def run_in_process(users: int, concurrency: int, recorder: Recorder) -> float:
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        return await run_journeys(lambda ip: InProcessClient(app, ip), users, concurrency, recorder)
+
+async def run_http(url: str, users: int, concurrency: int, recorder: Recorder) -> float:
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return await run_journeys(lambda ip: HTTPClient(url, ip, executor), users, concurrency, recorder)
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+def summarize(recorder: Recorder, elapsed: float) -> Dict[str, dict]:
+    results = {}
+    for name, values in recorder.latencies.items():
+        values = sorted(values)
+        results[name] = {
+            "count": len(values),
+            "errors": recorder.errors.get(name, 0),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+            "rps": round(len(values) / elapsed, 1),
+        }
+    return results
+
+def print_report(results: Dict[str, dict], elapsed: float, journeys: int):
+    total = sum(r["count"] for r in results.values())
+    print(f"\n{'endpoint':<26}{'count':>7}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}")
+    for name, r in results.items():
+        print(f"{name:<26}{r['count']:>7}{r['errors']:>5}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}"
+              f"{r['p99_ms']:>10.2f}{r['rps']:>9.1f}")
+    print(f"\n{total} requests in {elapsed:.2f}s: {total / elapsed:.1f} req/s, {journeys / elapsed:.2f} journeys/s")
+
+def compare(results: Dict[str, dict], name: str, threshold: float) -> bool:
+    """Print the change against baseline ``name``; False if a p95 regressed beyond ``threshold``"""
+    with open(os.path.join(BASELINE_DIR, f"{name}.json")) as file:
+        baseline = json.load(file)
+    print(f"\nAgainst baseline '{name}' ({baseline['created_at']}, {baseline['database']}, {baseline['mode']}):")
+    ok = True
+    for endpoint, r in results.items():
+        before = baseline["endpoints"].get(endpoint)
+        if before is None:
+            continue
+        p50 = r["p50_ms"] / before["p50_ms"] - 1 if before["p50_ms"] else 0.0
+        p95 = r["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0.0
+        regressed = p95 > threshold
+        ok = ok and not regressed
+        print(f"{'❌' if regressed else '  '} {endpoint:<26} p50 {p50:+7.1%}   p95 {p95:+7.1%}")
+    return ok
+
+def main():
+    """Run the journeys, print the report and save or compare baselines"""
+    parser = argparse.ArgumentParser(description="Load test with realistic user journeys")
+    parser.add_argument("--users", type=int, default=50, help="journeys to run (one new user each)")
+    parser.add_argument("--concurrency", type=int, default=10, help="journeys running at once")
+    parser.add_argument("--url", help="base URL of a running server instead of the in-process app")
+    parser.add_argument("--save", metavar="NAME", help="save the results as benchmarks/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare with benchmarks/baselines/NAME.json")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed p95 regression (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    recorder = Recorder()
+    if args.url:
+        mode, database = "http", os.getenv("DATABASE_URL", "server").split(":", 1)[0]
+        elapsed = asyncio.run(run_http(args.url.rstrip("/"), args.users, args.concurrency, recorder))
+    else:
+        os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='totus-load-')}/load.db")
+        os.environ.setdefault("QUERY_BUDGET_MODE", "enforce")
+        mode, database = "in-process", os.environ["DATABASE_URL"].split(":", 1)[0]
+        elapsed = asyncio.run(run_in_process(args.users, args.concurrency, recorder))
+
+    print(f"mode: {mode}  database: {database}  users: {args.users}  concurrency: {args.concurrency}")
+    results = summarize(recorder, elapsed)
+    print_report(results, elapsed, args.users)
+    for failure in recorder.failures:
+        print(f"  ❌ {failure}")
+
+    if args.save:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(os.path.join(BASELINE_DIR, f"{args.save}.json"), "w") as file:
+            json.dump({
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "cpus": os.cpu_count(),
+                "mode": mode,
+                "database": database,
+                "users": args.users,
+                "concurrency": args.concurrency,
+                "endpoints": results,
+            }, file, indent=2)
+            file.write("\n")
+        print(f"\n✅ Baseline saved: benchmarks/baselines/{args.save}.json")
+
+    ok = not recorder.failures
+    if args.compare:
+        ok = compare(results, args.compare, args.threshold) and ok
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
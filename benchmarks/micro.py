@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the helpers on the hot request paths.
+
+Each case is timed with timeit: the loop count is calibrated so one repetition
+takes about 0.2 s, then it is repeated (7 times by default) and the per-call
+minimum, median, mean and standard deviation are reported. The minimum is the
+number to compare between commits; a large stdev means the machine was busy.
+
+The controller cases run on a stub session that returns prebuilt rows, so they
+measure the Python work of the method (summaries, gating, dict assembly), not
+the database.
+
+Usage: python benchmarks/micro.py [-k SUBSTRING] [--repeat N] [--json PATH|-]
+"""
+
+import sys
+import os
+import argparse
+import json
+import platform
+import statistics
+import time
+import timeit
+from collections import namedtuple
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Importing the controllers creates the engine; it is never connected
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.controllers.users import UserController
+from app.models.content import UserProgress
+from app.models.user import User
+from app.schemas.user import UserResponse
+from app.services.content_cache import ContentSnapshot, content_cache
+from app.utils.rate_limiter import RateLimiter
+from app.utils.security import create_access_token, create_refresh_token, verify_token
+
+USER_ID = "0ac14edc-cb47-438f-8327-040f56296863"
+
+class StubQuery:
+    """Enough of Query for the controller methods: every chain ends in the prebuilt rows"""
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, *args):
+        return self
+
+    def order_by(self, *args):
+        return self
+
+    def all(self):
+        return self.rows
+
+class StubSession:
+    """query(Model) returns the ORM objects, query(*columns) named-tuple rows like Query does"""
+    def __init__(self, objects):
+        self.objects = objects
+        self.row_sets = {}
+
+    def query(self, *entities):
+        if len(entities) == 1 and isinstance(entities[0], type):
+            return StubQuery(self.objects)
+        columns = tuple(entity.key for entity in entities)
+        rows = self.row_sets.get(columns)
+        if rows is None:
+            Row = namedtuple("Row", columns)
+            rows = self.row_sets[columns] = [Row(*(getattr(o, c) for c in columns)) for o in self.objects]
+        return StubQuery(rows)
+
+def build_user() -> User:
+    """Transient user on day 12 who completed days 1-11"""
+    now = datetime.utcnow()
+    return User(
+        id=USER_ID,
+        name="María García",
+        email="maria@gmail.com",
+        password_hash="$2b$12$" + "x" * 53,
+        current_day=12,
+        start_day=1,
+        has_chosen_start_day=True,
+        libre_mode=False,
+        timezone="America/Lima",
+        start_date=now - timedelta(days=11),
+        is_active=True,
+        created_at=now - timedelta(days=11),
+        updated_at=now,
+        progress_version=33
+    )
+
+def build_progress(user: User):
+    completed_at = datetime.utcnow() - timedelta(days=1)
+    return [
+        UserProgress(
+            id=f"p{day}", user_id=user.id, day=day,
+            meditation_completed=True, video_completed=True, rosary_completed=day < 12,
+            completed_at=completed_at if day < 12 else None
+        )
+        for day in range(1, 13)
+    ]
+
+def install_content_snapshot():
+    """Synthetic 33-day content so get_dashboard_data never reaches the database"""
+    now = datetime.utcnow()
+    content_cache._snapshot = ContentSnapshot([
+        {
+            "id": f"c{day}", "day": day, "title": f"Día {day}",
+            "description": "Meditación del día. " * 10, "video_url": f"https://www.youtube.com/watch?v=v{day}",
+            "rosary_video_url": "https://www.youtube.com/watch?v=rosary", "meditation_pdf_url": f"/pdfs/{day}.pdf",
+            "mysteries": "Gozosos", "quote": "A Jesús por María.", "created_at": now, "updated_at": now
+        }
+        for day in range(1, 34)
+    ])
+    content_cache.ttl_seconds = 10 ** 9
+
+def build_cases():
+    """name -> zero-argument callable"""
+    user = build_user()
+    session = StubSession(build_progress(user))
+    install_content_snapshot()
+
+    access_token = create_access_token({"sub": USER_ID})
+    now = datetime.now()
+    allowed_history = [now - timedelta(seconds=seconds) for seconds in range(5)]
+    allowed_limiter = RateLimiter(max_requests=10, window_seconds=300, name="bench")
+    full_limiter = RateLimiter(max_requests=10, window_seconds=300, name="bench")
+    full_limiter.requests[USER_ID] = [now - timedelta(seconds=seconds) for seconds in range(10)]
+    user_fields = {column: getattr(user, column) for column in UserResponse.model_fields}
+
+    def rate_limiter_allowed():
+        # Restore 5 requests in the window; the copy is part of the measured time
+        allowed_limiter.requests[USER_ID] = allowed_history[:]
+        allowed_limiter.is_allowed(USER_ID)
+
+    return {
+        "rate_limiter.is_allowed (allowed)": rate_limiter_allowed,
+        "rate_limiter.is_allowed (rejected)": lambda: full_limiter.is_allowed(USER_ID),
+        "security.create_access_token": lambda: create_access_token({"sub": USER_ID}),
+        "security.create_refresh_token": lambda: create_refresh_token({"sub": USER_ID}),
+        "security.verify_token": lambda: verify_token(access_token),
+        "users.get_progress (summaries)": lambda: UserController.get_progress(user, session),
+        "users.get_progress (compact)": lambda: UserController.get_progress(user, session, compact=True),
+        "users.get_dashboard_data": lambda: UserController.get_dashboard_data(user, session),
+        "users.get_dashboard_data (compact)": lambda: UserController.get_dashboard_data(user, session, compact=True),
+        "UserResponse.model_validate (ORM)": lambda: UserResponse.model_validate(user),
+        "UserResponse.model_validate (dict)": lambda: UserResponse.model_validate(user_fields),
+    }
+
+def measure(func, repeat: int) -> dict:
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    # autorange stops at >= 0.2 s; keep each repetition around that long
+    per_call = [total / number for total in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "loops": number,
+        "repeat": repeat,
+        "min_us": round(min(per_call) * 1e6, 3),
+        "median_us": round(statistics.median(per_call) * 1e6, 3),
+        "mean_us": round(statistics.mean(per_call) * 1e6, 3),
+        "stdev_us": round(statistics.stdev(per_call) * 1e6, 3) if repeat > 1 else 0.0,
+        "ops_per_second": round(1 / min(per_call)),
+    }
+
+def main():
+    """Run the selected cases, print a table and optionally write JSON"""
+    parser = argparse.ArgumentParser(description="Microbenchmarks of the hot helper functions")
+    parser.add_argument("-k", dest="select", help="only cases whose name contains this substring")
+    parser.add_argument("--repeat", type=int, default=7, help="repetitions per case")
+    parser.add_argument("--json", metavar="PATH", help="write the results as JSON to PATH ('-' for stdout)")
+    args = parser.parse_args()
+
+    cases = {name: func for name, func in build_cases().items() if not args.select or args.select in name}
+    quiet = args.json == "-"
+    results = {}
+    if not quiet:
+        print(f"{'case':<38}{'min us':>11}{'median us':>11}{'stdev us':>10}{'ops/s':>12}")
+    for name, func in cases.items():
+        results[name] = result = measure(func, args.repeat)
+        if not quiet:
+            print(f"{name:<38}{result['min_us']:>11.2f}{result['median_us']:>11.2f}"
+                  f"{result['stdev_us']:>10.2f}{result['ops_per_second']:>12,}")
+
+    if args.json:
+        report = {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "results": results,
+        }
+        if quiet:
+            json.dump(report, sys.stdout, indent=2)
+            print()
+        else:
+            with open(args.json, "w") as file:
+                json.dump(report, file, indent=2)
+                file.write("\n")
+            print(f"\n✅ Results written to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Script to run the day advancement job once (e.g. hourly from cron; each time
+zone is advanced at its own midnight). Safe to re-run: users already advanced
+for a boundary are skipped.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.services.day_advancement import DayAdvancementService
+
+def main():
+    """Main function to advance eligible users"""
+    print("🚀 Running day advancement...")
+    
+    db = SessionLocal()
+    try:
+        advanced = DayAdvancementService.advance_all(db)
+        print(f"✅ Advanced {advanced} users")
+    except Exception as e:
+        print(f"❌ Error advancing users: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
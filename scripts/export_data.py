@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Script to export every user with their progress history (backups, data
+requests in bulk). Rows are streamed with a server-side cursor and written as
+they arrive, so memory use does not grow with the number of users.
+
+Usage: python scripts/export_data.py [--format ndjson|csv] [--output FILE] [--include-deleted]
+"""
+
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.services.data_export import DataExportService
+
+def main():
+    """Main function to export all users"""
+    parser = argparse.ArgumentParser(description="Bulk export of users and progress")
+    parser.add_argument("--format", choices=("ndjson", "csv"), default="ndjson")
+    parser.add_argument("--output", help="file to write (default: stdout)")
+    parser.add_argument("--include-deleted", action="store_true", help="also export soft-deleted accounts")
+    args = parser.parse_args()
+
+    # Progress messages go to stderr so stdout can be piped
+    print(f"🚀 Exporting users as {args.format}...", file=sys.stderr)
+    
+    db = SessionLocal()
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        written = 0
+        for chunk in DataExportService.export(db, args.format, include_deleted=args.include_deleted):
+            output.write(chunk)
+            written += len(chunk)
+        output.flush()
+        print(f"✅ Exported {written:,} bytes", file=sys.stderr)
+    except Exception as e:
+        print(f"❌ Error exporting data: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if args.output:
+            output.close()
+        db.close()
+
+if __name__ == "__main__":
+    main()
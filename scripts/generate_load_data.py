@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Script to generate synthetic users and progress for capacity testing.
+
+Users get realistic start days, current days (most people drop off in the first
+two weeks), time zones, libre-mode, partial progress on their current day and
+the matching progress counters and streaks.
+Everything is generated and written in chunks, so memory stays bounded at any
+size; rows go in with COPY on PostgreSQL and executemany on SQLite (one
+transaction per chunk). All users share one password, hashed once up front.
+
+Content must already be loaded (scripts/load_daily_content.py) for the app to
+be usable, and the tables must exist (alembic upgrade head).
+
+Usage: python scripts/generate_load_data.py --users 1000000 [--chunk 10000]
+       [--libre-ratio 0.05] [--password Prueba123!] [--prefix load] [--seed 33]
+"""
+
+import sys
+import os
+import argparse
+import csv
+import io
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine
+from app.services.user_counters import streaks
+from app.utils.gating import local_date
+from app.utils.security import get_password_hash
+
+TOTAL_DAYS = 33
+
+# Share of users per time zone
+TIMEZONE_WEIGHTS = (
+    ("America/Lima", 60),
+    ("America/Mexico_City", 10),
+    ("America/Bogota", 10),
+    ("Europe/Madrid", 8),
+    ("America/Argentina/Buenos_Aires", 7),
+    ("America/New_York", 5),
+)
+
+# Share of users who picked a start day other than 1
+CHOSEN_START_RATIO = 0.2
+
+# Mean number of days users get through before stopping
+MEAN_DAYS_COMPLETED = 10
+
+USER_COLUMNS = (
+    "id", "name", "email", "password_hash", "current_day", "start_day", "has_chosen_start_day",
+    "libre_mode", "timezone", "progress_version", "day_advanced_at", "tasks_completed", "days_completed",
+    "current_streak", "longest_streak", "last_completed_on", "start_date", "is_active", "created_at", "updated_at"
+)
+PROGRESS_COLUMNS = (
+    "id", "user_id", "day", "meditation_completed", "video_completed", "rosary_completed",
+    "completed_at", "version", "updated_at"
+)
+
+def timestamp(value: datetime) -> str:
+    """SQLAlchemy's SQLite DateTime storage format, also valid input for PostgreSQL"""
+    return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+def generate_chunk(rng: random.Random, first: int, count: int, password_hash: str, prefix: str,
+                   libre_ratio: float, now: datetime):
+    """User rows and their progress rows for users ``first`` .. ``first + count - 1``"""
+    zones = [zone for zone, _ in TIMEZONE_WEIGHTS]
+    weights = [weight for _, weight in TIMEZONE_WEIGHTS]
+    users, progress = [], []
+
+    for index in range(first, first + count):
+        user_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        chosen = rng.random() < CHOSEN_START_RATIO
+        start_day = rng.randint(1, TOTAL_DAYS) if chosen else 1
+        days_done = min(int(rng.expovariate(1 / MEAN_DAYS_COMPLETED)), TOTAL_DAYS - start_day)
+        current_day = start_day + days_done
+        start_date = now - timedelta(days=days_done, seconds=rng.randint(0, 86399))
+
+        timezone = rng.choices(zones, weights)[0]
+        version = tasks_done = 0
+        completed_on = []
+        for day in range(start_day, current_day + 1):
+            if day < current_day:
+                tasks = (True, True, True)
+            else:
+                tasks = (rng.random() < 0.5, rng.random() < 0.4, rng.random() < 0.3)
+                if not any(tasks):
+                    continue  # nothing done yet today: no row, like the app
+            version += 1
+            day_start = start_date + timedelta(days=day - start_day)
+            changed = day_start + timedelta(seconds=rng.randint(0, 20 * 3600))
+            changed_at = timestamp(changed)
+            progress.append((
+                str(uuid.UUID(int=rng.getrandbits(128), version=4)), user_id, day,
+                tasks[0], tasks[1], tasks[2], changed_at if all(tasks) else None, version, changed_at
+            ))
+            tasks_done += sum(tasks)
+            if all(tasks):
+                completed_on.append(local_date(changed, timezone))
+
+        created_at = timestamp(start_date)
+        current_streak, longest_streak, last_completed_on = streaks(completed_on, local_date(now, timezone))
+        users.append((
+            user_id, f"Usuario {index}", f"{prefix}{index}@gmail.com", password_hash, current_day, start_day,
+            chosen, rng.random() < libre_ratio, timezone, version, None, tasks_done, len(completed_on),
+            current_streak, longest_streak, last_completed_on, created_at, True, created_at, created_at
+        ))
+    return users, progress
+
+def copy_rows(cursor, table: str, columns, rows):
+    """PostgreSQL: stream the rows through COPY ... FROM STDIN as CSV"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+def insert_rows(cursor, table: str, columns, rows, placeholder: str):
+    cursor.executemany(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join([placeholder] * len(columns))})",
+        rows
+    )
+
+def main():
+    """Generate and load the synthetic users chunk by chunk"""
+    parser = argparse.ArgumentParser(description="Generate synthetic users and progress")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--chunk", type=int, default=10000, help="users per transaction")
+    parser.add_argument("--libre-ratio", type=float, default=0.05)
+    parser.add_argument("--password", default="Prueba123!", help="password of every generated user")
+    parser.add_argument("--prefix", default=f"load{int(time.time())}_", help="email prefix (must be unique per run)")
+    parser.add_argument("--seed", type=int, default=33)
+    args = parser.parse_args()
+
+    dialect = engine.dialect.name
+    print(f"🚀 Generating {args.users:,} users on {dialect} in chunks of {args.chunk:,}...")
+    rng = random.Random(args.seed)
+    password_hash = get_password_hash(args.password)
+    now = datetime.utcnow()
+
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        if dialect == "sqlite":
+            # Test data only: skip the fsync per transaction
+            cursor.execute("PRAGMA synchronous=OFF")
+        placeholder = "?" if engine.dialect.paramstyle == "qmark" else "%s"
+
+        started = time.perf_counter()
+        total_progress = 0
+        for first in range(0, args.users, args.chunk):
+            count = min(args.chunk, args.users - first)
+            users, progress = generate_chunk(
+                rng, first, count, password_hash, args.prefix, args.libre_ratio, now
+            )
+            if dialect == "postgresql":
+                copy_rows(cursor, "users", USER_COLUMNS, users)
+                copy_rows(cursor, "user_progress", PROGRESS_COLUMNS, progress)
+            else:
+                insert_rows(cursor, "users", USER_COLUMNS, users, placeholder)
+                insert_rows(cursor, "user_progress", PROGRESS_COLUMNS, progress, placeholder)
+            raw.commit()
+
+            total_progress += len(progress)
+            elapsed = time.perf_counter() - started
+            print(f"  {first + count:>12,} users  {total_progress:>13,} progress rows  "
+                  f"{(first + count + total_progress) / elapsed:>10,.0f} rows/s")
+
+        # Fresh planner statistics for the new data distribution
+        cursor.execute("ANALYZE")
+        raw.commit()
+        print(f"✅ Loaded {args.users:,} users and {total_progress:,} progress rows "
+              f"in {time.perf_counter() - started:.1f}s (password: {args.password})")
+        print("ℹ️  Run scripts/rebuild_analytics.py to include them in the analytics tables")
+    except Exception as e:
+        print(f"❌ Error generating data: {e}")
+        raw.rollback()
+    finally:
+        raw.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Script to print a signed X-Debug-Profile header. Any request sent with it is
+profiled until it expires; the profile name comes back in X-Profile-Id.
+Must run with the same SECRET_KEY as the server.
+
+Usage: python scripts/profile_header.py [minutes]
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.profiler import sign_profile_request, MAX_SIGNATURE_TTL_SECONDS
+
+def main():
+    """Print the header for the requested validity"""
+    minutes = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    seconds = min(minutes * 60, MAX_SIGNATURE_TTL_SECONDS)
+    expires = int(time.time()) + seconds
+    print(f"🔑 Valid for {seconds // 60} minutes:")
+    print(f"X-Debug-Profile: {sign_profile_request(expires)}")
+
+if __name__ == "__main__":
+    main()
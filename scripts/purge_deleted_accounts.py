@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Script to purge soft-deleted accounts once (e.g. from cron when the in-app
+purger is disabled with ACCOUNT_PURGER=false). Accounts deleted less than
+ACCOUNT_PURGE_GRACE_HOURS ago are kept; pass --grace-hours to override.
+"""
+
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.services.account_purge import AccountPurgeService
+
+def main():
+    """Main function to purge deleted accounts"""
+    parser = argparse.ArgumentParser(description="Purge soft-deleted accounts")
+    parser.add_argument("--grace-hours", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+
+    print("🚀 Purging deleted accounts...")
+    
+    db = SessionLocal()
+    try:
+        purged = AccountPurgeService.purge_deleted(db, args.grace_hours, args.batch_size)
+        print(f"✅ Purged {purged} accounts")
+    except Exception as e:
+        print(f"❌ Error purging accounts: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Script to check or rebuild the analytics tables (day_stats, date_stats,
+group_day_stats and the groups' member_count) from users, user_progress and
+group_memberships. With --check it only reports where the incrementally
+maintained values differ from a full recomputation (exit code 1 if they do).
+Needed after loading data outside the app, e.g. scripts/generate_load_data.py.
+"""
+
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.services.analytics import AnalyticsService
+
+def main():
+    """Main function to check or rebuild the analytics tables"""
+    parser = argparse.ArgumentParser(description="Check or rebuild the analytics tables")
+    parser.add_argument("--check", action="store_true", help="only compare, don't write")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.check:
+            print("🔍 Checking analytics tables...")
+            problems = AnalyticsService.differences(db)
+            for problem in problems[:100]:
+                print(f"  ❌ {problem}")
+            if problems:
+                print(f"⚠️  {len(problems)} differences; run without --check to rebuild")
+                sys.exit(1)
+            print("✅ Analytics tables are consistent")
+        else:
+            print("🚀 Rebuilding analytics tables...")
+            AnalyticsService.rebuild(db)
+            print("✅ Analytics tables rebuilt")
+    except Exception as e:
+        print(f"❌ Error with analytics tables: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
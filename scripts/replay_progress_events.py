@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild user_progress from the append-only progress event log.
+
+By default it only compares: every (user, day) with events is replayed and the
+rows that are missing from user_progress or differ from it are counted (and
+listed with --verbose). With --apply those rows are written; the users'
+progress_version is bumped so syncing clients pick up the repaired days. Days
+without any event (e.g. rows loaded by generate_load_data.py) are left as they
+are. Run scripts/rebuild_analytics.py afterwards if rows were written.
+
+Usage: python scripts/replay_progress_events.py [--user USER_ID] [--apply] [--verbose]
+"""
+
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.services.progress_events import ProgressEventService, REPLAY_BATCH_SIZE
+
+def main():
+    """Replay the event log and compare with (or write to) user_progress"""
+    parser = argparse.ArgumentParser(description="Rebuild user_progress from the progress event log")
+    parser.add_argument("--user", help="only this user id")
+    parser.add_argument("--apply", action="store_true", help="write the rebuilt rows (default: compare only)")
+    parser.add_argument("--verbose", action="store_true", help="print every differing row")
+    args = parser.parse_args()
+
+    print(f"🚀 Replaying progress events{' for ' + args.user if args.user else ''}...")
+    # The event stream stays open on its own connection while the other session reads and writes
+    read_db = SessionLocal()
+    write_db = SessionLocal()
+    replayed = changed = 0
+    try:
+        batch = []
+        for row in ProgressEventService.replay(read_db, args.user):
+            batch.append(row)
+            if len(batch) >= REPLAY_BATCH_SIZE:
+                changed += process(write_db, batch, args)
+                replayed += len(batch)
+                batch = []
+        changed += process(write_db, batch, args)
+        replayed += len(batch)
+
+        if args.apply:
+            print(f"✅ Replayed {replayed:,} days, wrote {changed:,} rows")
+            if changed:
+                print("ℹ️  Run scripts/rebuild_analytics.py to update the statistics")
+        else:
+            print(f"✅ Replayed {replayed:,} days, {changed:,} differ from user_progress")
+            if changed:
+                print("ℹ️  Run again with --apply to write them")
+    except Exception as e:
+        print(f"❌ Error replaying progress events: {e}")
+        write_db.rollback()
+        sys.exit(1)
+    finally:
+        read_db.close()
+        write_db.close()
+
+def process(db, batch, args) -> int:
+    if not batch:
+        return 0
+    rows = ProgressEventService.changed_rows(db, batch)
+    if args.verbose:
+        for row in rows:
+            tasks = "".join("x" if row[f"{task}_completed"] else "-" for task in ("meditation", "video", "rosary"))
+            print(f"  {row['user_id']} day {row['day']:>2} {tasks} completed_at={row['completed_at']}")
+    if args.apply:
+        ProgressEventService.write_rows(db, rows)
+    return len(rows)
+
+if __name__ == "__main__":
+    main()
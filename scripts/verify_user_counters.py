@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Script to verify the progress counters stored on users (tasks_completed,
+days_completed, current_streak, longest_streak, last_completed_on) against a
+full recomputation from user_progress. Users are checked in chunks of
+--chunk; drifted users are listed and, with --repair, rewritten (exit code 1
+if drift was found and not repaired).
+"""
+
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.services.user_counters import UserCounterService, VERIFY_CHUNK_SIZE
+
+def main():
+    """Main function to verify and optionally repair the user counters"""
+    parser = argparse.ArgumentParser(description="Verify the progress counters stored on users")
+    parser.add_argument("--repair", action="store_true", help="rewrite the counters that drifted")
+    parser.add_argument("--chunk", type=int, default=VERIFY_CHUNK_SIZE, help="users per query")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print("🔍 Verifying user counters...")
+        drifted = 0
+        for user_id, stored, expected in UserCounterService.verify(db, args.repair, args.chunk):
+            drifted += 1
+            if drifted <= 100:
+                changed = {name: (stored[name], value) for name, value in expected.items() if stored[name] != value}
+                print(f"  ❌ {user_id}: {changed}")
+        if not drifted:
+            print("✅ User counters are consistent")
+        elif args.repair:
+            print(f"✅ Repaired the counters of {drifted} users")
+        else:
+            print(f"⚠️  {drifted} users drifted; run with --repair to fix them")
+            sys.exit(1)
+    except Exception as e:
+        print(f"❌ Error verifying user counters: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Production launcher for the Totus Tuus Backend API.
+
+The parent process imports the app, runs the startup (checks, content snapshot,
+midnight tables, JWT backends) once and binds the listening socket. It then forks
+the workers, which share the preloaded memory copy-on-write and accept on the
+same socket. The parent only supervises:
+
+    SIGHUP           reload caches in the parent, then replace workers one by one
+    SIGTERM/SIGINT   graceful shutdown of every worker
+    worker crash     the worker is forked again
+
+One worker is the default (WEB_CONCURRENCY or --workers raise it). Some state
+is still per process: the rate limiters and the SSE subscribers of the unlock
+notifier. With N workers each limiter allows N times its limit, and a progress
+update handled by one worker doesn't reach streams held by another.
+
+Usage: python serve.py [--workers N] [--host HOST] [--port PORT]
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import select
+import signal
+import socket
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds a new worker gets to become ready, and an old one to finish its requests
+WORKER_READY_TIMEOUT = 60
+GRACEFUL_TIMEOUT = 30
+
+# A worker that dies this soon after starting is respawned with a delay
+RESPAWN_BACKOFF_SECONDS = 1.0
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+async def serve_worker(server, sock: socket.socket, ready_fd: int):
+    """Run uvicorn on the shared socket and tell the parent once startup finished"""
+    serving = asyncio.create_task(server.serve(sockets=[sock]))
+    while not server.started and not serving.done():
+        await asyncio.sleep(0.05)
+    if server.started:
+        os.write(ready_fd, b"1")
+    os.close(ready_fd)
+    await serving
+
+def run_worker(app, sock: socket.socket, index: int, ready_fd: int):
+    """Body of a forked worker; never returns"""
+    import uvicorn
+    from app.config import settings
+    from app.database import engine
+    from app.utils.metrics import metrics
+
+    for sig in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+        signal.signal(sig, signal.SIG_DFL)
+
+    # Connections opened by the parent must not be shared; each worker gets its own pool
+    engine.dispose(close=False)
+    # Cache lookups made while preloading belong to the parent, not to every worker
+    metrics.reset()
+    # Midnight advancement and the account purge are idempotent, but one worker running them is enough
+    if index != 0:
+        settings.day_advancement_scheduler = False
+        settings.account_purger = False
+
+    config = uvicorn.Config(
+        app,
+        log_level="info",
+        proxy_headers=True,
+        forwarded_allow_ips="*",
+        timeout_graceful_shutdown=GRACEFUL_TIMEOUT
+    )
+    server = uvicorn.Server(config)
+    code = 0
+    try:
+        asyncio.run(serve_worker(server, sock, ready_fd))
+    except Exception as e:
+        print(f"❌ Worker {index} ({os.getpid()}) failed: {e}")
+        code = 1
+    os._exit(code)
+
+class Arbiter:
+    """Forks and supervises the workers of a preloaded app"""
+    def __init__(self, app, sock: socket.socket, workers: int):
+        self.app = app
+        self.sock = sock
+        self.worker_count = workers
+        self.workers = {}  # pid -> (index, started_at)
+        self.signals = []
+        self.running = True
+
+    def spawn(self, index: int):
+        """Fork worker ``index``; returns (pid, fd that becomes readable once it is ready)"""
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            run_worker(self.app, self.sock, index, write_fd)
+        os.close(write_fd)
+        self.workers[pid] = (index, time.monotonic())
+        return pid, read_fd
+
+    def wait_ready(self, pid: int, read_fd: int) -> bool:
+        try:
+            readable, _, _ = select.select([read_fd], [], [], WORKER_READY_TIMEOUT)
+            ready = bool(readable) and os.read(read_fd, 1) == b"1"
+        finally:
+            os.close(read_fd)
+        if not ready:
+            print(f"❌ Worker {pid} did not become ready")
+        return ready
+
+    def stop_worker(self, pid: int, timeout: float = GRACEFUL_TIMEOUT):
+        """SIGTERM a worker and wait for it; SIGKILL if it overruns ``timeout``"""
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                done, _ = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if done:
+                break
+            time.sleep(0.1)
+        else:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.workers.pop(pid, None)
+
+    def reload(self):
+        """Refresh the parent's caches, then replace workers one at a time"""
+        from app.database import SessionLocal, engine
+        from app.startup import warm_caches
+
+        print("🔄 Rolling restart...")
+        db = SessionLocal()
+        try:
+            warm_caches(db)
+        except Exception as e:
+            print(f"⚠️  Could not refresh caches: {e}")
+        finally:
+            db.close()
+            engine.dispose()
+
+        for old_pid, (index, _) in sorted(self.workers.items(), key=lambda item: item[1][0]):
+            new_pid, read_fd = self.spawn(index)
+            if not self.wait_ready(new_pid, read_fd):
+                # Keep the old worker serving; the broken one is reaped as a crash
+                self.stop_worker(new_pid, timeout=0)
+                continue
+            self.stop_worker(old_pid)
+            print(f"✅ Worker {index}: {old_pid} -> {new_pid}")
+
+    def reap(self):
+        """Collect exited workers and fork replacements"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+            index, started_at = self.workers.pop(pid, (None, 0))
+            if index is None or not self.running:
+                continue
+            print(f"⚠️  Worker {index} ({pid}) exited with status {status}; restarting")
+            if time.monotonic() - started_at < RESPAWN_BACKOFF_SECONDS:
+                time.sleep(RESPAWN_BACKOFF_SECONDS)
+            self.spawn_ready(index)
+
+    def spawn_ready(self, index: int):
+        pid, read_fd = self.spawn(index)
+        self.wait_ready(pid, read_fd)
+
+    def handle_signal(self, sig, frame):
+        self.signals.append(sig)
+
+    def run(self):
+        for sig in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+            signal.signal(sig, self.handle_signal)
+
+        for index in range(self.worker_count):
+            self.spawn_ready(index)
+        print(f"✅ {len(self.workers)} workers ready (parent {os.getpid()})")
+
+        while self.running:
+            while self.signals:
+                sig = self.signals.pop(0)
+                if sig in (signal.SIGTERM, signal.SIGINT):
+                    self.running = False
+                elif sig == signal.SIGHUP:
+                    self.reload()
+            self.reap()
+            if self.running:
+                time.sleep(0.5)
+
+        print("🛑 Stopping workers...")
+        for pid in list(self.workers):
+            os.kill(pid, signal.SIGTERM)
+        for pid in list(self.workers):
+            self.stop_worker(pid)
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork launcher for the Totus Tuus API")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "0")) or 1)
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    args = parser.parse_args()
+
+    # Workers merge their metrics through per-process files in a shared directory
+    metrics_dir = os.environ.setdefault("METRICS_DIR", tempfile.mkdtemp(prefix="totus-metrics-"))
+    os.makedirs(metrics_dir, exist_ok=True)
+    for filename in os.listdir(metrics_dir):
+        if filename.endswith(".json"):
+            os.remove(os.path.join(metrics_dir, filename))
+
+    # Preload: import and start the app once; the workers inherit all of it
+    from app.main import app
+    from app import startup
+    from app.database import engine
+
+    timings = startup.run_startup()
+    startup.preloaded = True
+    engine.dispose()
+    print(f"✅ App preloaded in {timings['total']} ms: {timings}")
+
+    sock = bind_socket(args.host, args.port)
+    print(f"🚀 Serving on {args.host}:{args.port} with {args.workers} workers")
+    if args.workers > 1:
+        print("⚠️  Rate limits and unlock events are per worker: limits are "
+              f"{args.workers}x looser and events only reach streams on the same worker")
+
+    # Move everything allocated so far out of the GC's reach so collections in
+    # the workers don't touch (and copy) the shared pages
+    gc.collect()
+    gc.freeze()
+
+    Arbiter(app, sock, args.workers).run()
+
+if __name__ == "__main__":
+    main()
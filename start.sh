@@ -41,4 +41,8 @@ fi
 
 # Start the FastAPI application
 echo "🚀 Starting FastAPI server..."
-exec uvicorn app.main:app --host 0.0.0.0 --port ${PORT:-8080} --workers 1
\ No newline at end of file
+# Migrations already ran above, so the app only checks the Alembic head on startup
+export FAST_START=${FAST_START:-true}
+# Pre-fork launcher: preloads and warms the app once, then forks WEB_CONCURRENCY workers (default: 1,
+# since rate limits and unlock events are still per process)
+exec python serve.py --host 0.0.0.0 --port ${PORT:-8080}
\ No newline at end of file